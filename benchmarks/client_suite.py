@@ -0,0 +1,158 @@
+"""Throughput and latency of client calls against the local stand-in server.
+
+python benchmarks/client_suite.py --requests 2000 --threads 16 --latency 0.005 > suite.json
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from entity_disambiguator_py.auth import UnsignedAuth
+from entity_disambiguator_py.batching import chunked
+from entity_disambiguator_py.cache import ResponseCache
+from entity_disambiguator_py.client import EntityDisambiguatorLambdaClient
+from entity_disambiguator_py.stand_in import FaultProfile, StandInServer, SyntheticUMLS
+
+
+def percentile(timings: list[float], q: float) -> float:
+    return timings[min(int(q * len(timings)), len(timings) - 1)]
+
+
+def run(scenario: str, op: Callable[[object], int], items: list, threads: int, **extra) -> dict:
+    """Call ``op`` on every item from ``threads`` threads; ``op`` returns the ids it covered."""
+
+    # ids covered, latency and whether it failed, so the threads share no counters
+    def timed(item) -> tuple[int, float, bool]:
+        start = time.perf_counter()
+        try:
+            covered, failed = op(item), False
+        except Exception:
+            covered, failed = 0, True
+        return covered, time.perf_counter() - start, failed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        outcomes = list(pool.map(timed, items))
+    elapsed = time.perf_counter() - start
+
+    ids = sum(covered for covered, _, _ in outcomes)
+    errors = sum(failed for _, _, failed in outcomes)
+    latencies = sorted(latency for _, latency, _ in outcomes)
+    ms = [t * 1000 for t in latencies]
+    return {
+        "benchmark": "client_suite",
+        "scenario": scenario,
+        "calls": len(items),
+        "ids": ids,
+        "errors": errors,
+        "threads": threads,
+        "seconds": elapsed,
+        "calls_per_s": len(items) / elapsed,
+        "ids_per_s": ids / elapsed,
+        "p50_ms": statistics.median(ms),
+        "p99_ms": percentile(ms, 0.99),
+        **extra,
+    }
+
+
+def scenarios(server: StandInServer, args) -> dict[str, Callable[[], dict]]:
+    rng = random.Random(0)
+    concept_ids = server.data.concept_ids
+    sample = [rng.choice(concept_ids) for _ in range(args.requests)]
+    graph_nodes = sample[: max(args.requests // 10, 1)]
+
+    def client(**kwargs) -> EntityDisambiguatorLambdaClient:
+        kwargs.setdefault("pool_maxsize", args.threads)
+        return EntityDisambiguatorLambdaClient(server.url, "local", auth=UnsignedAuth(), **kwargs)
+
+    def single() -> dict:
+        with client() as c:
+            op = lambda cid: bool(c.get_concept(cid))
+            return run("single_get_concept", op, sample, args.threads)
+
+    def single_one_connection() -> dict:
+        with client(pool_maxsize=1) as c:
+            op = lambda cid: bool(c.get_concept(cid))
+            return run("single_get_concept_pool_1", op, sample, args.threads, pool_maxsize=1)
+
+    def batch() -> dict:
+        with client() as c:
+            chunks = chunked(sample, args.batch_size)
+            op = lambda ids: len(c.get_batch_concept(ids, parallelism=1).result)
+            return run("batch_get_concept", op, chunks, args.threads, batch_size=args.batch_size)
+
+    def coalesced() -> dict:
+        with client(coalesce_window=0.002, coalesce_max_batch_size=args.batch_size) as c:
+            op = lambda cid: bool(c.get_concept(cid))
+            result = run("coalesced_get_concept", op, sample, args.threads)
+            result["mean_batch_size"] = c.coalescer_stats()["get_concept"].mean_batch_size
+            return result
+
+    def cached() -> dict:
+        cache = ResponseCache(maxsize=len(concept_ids))
+        with client(cache=cache) as c:
+            op = lambda cid: bool(c.get_concept(cid))
+            run("warm_cache", op, sample, args.threads)
+            result = run("cached_get_concept", op, sample, args.threads)
+            result["hit_rate"] = cache.stats().hit_rate
+            return result
+
+    def graph(method: str) -> Callable[[], dict]:
+        def scenario() -> dict:
+            with client() as c:
+                fn = getattr(c, method)
+                op = lambda cid: len(fn(cid, "PRED").edges)
+                return run(method, op, graph_nodes, args.threads)
+
+        return scenario
+
+    def parents() -> dict:
+        with client() as c:
+            op = lambda cid: len(c.get_parents(cid, "PRED").result)
+            return run("get_parents", op, graph_nodes, args.threads)
+
+    return {
+        "single": single,
+        "single_pool_1": single_one_connection,
+        "batch": batch,
+        "coalesced": coalesced,
+        "cached": cached,
+        "parents": parents,
+        "ancestors": graph("get_ancestors"),
+        "subgraph": graph("get_subgraph"),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concepts", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=1_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("scenarios", nargs="*")
+    args = parser.parse_args()
+
+    faults = FaultProfile(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=0
+    )
+    with StandInServer(SyntheticUMLS(args.concepts), faults) as server:
+        available = scenarios(server, args)
+        names = args.scenarios or list(available)
+        results = []
+        for name in names:
+            result = available[name]()
+            result.update(concepts=args.concepts, latency=args.latency, error_rate=args.error_rate)
+            results.append(result)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Where response compression stops paying off, per codec and response size.
+
+For each codec and subgraph size the ``codec`` rows report the compression ratio and
+the time to compress and decompress. ``break_even_mbit_s`` is the link speed at
+which the transfer time saved equals that time, so compression is faster below it.
+The ``live`` rows time ``get_subgraph`` against the stand-in server, throttled to
+each ``--bandwidth``, with and without compression:
+
+python benchmarks/compression.py --edges 1000 10000 100000 --bandwidth 10 100 1000 > c.json
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from entity_disambiguator_py.auth import UnsignedAuth
+from entity_disambiguator_py.client import EntityDisambiguatorLambdaClient
+from entity_disambiguator_py.compression import (
+    CODECS,
+    CompressionPolicy,
+    compress,
+    decompress,
+)
+from entity_disambiguator_py.stand_in import FaultProfile, StandInServer, SyntheticUMLS
+
+
+def response(edges: int) -> bytes:
+    rows = [{"parent": f"C{i // 4:07d}", "child": f"C{i:07d}"} for i in range(edges)]
+    return json.dumps({"id": 1, "result": {"edges": rows}}).encode()
+
+
+def median_ms(fn, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def codec(name: str, edges: int, runs: int) -> dict:
+    raw = response(edges)
+    packed = compress(name, raw)
+    compress_ms = median_ms(lambda: compress(name, raw), runs)
+    decompress_ms = median_ms(lambda: decompress(name, packed), runs)
+    saved_bits = (len(raw) - len(packed)) * 8
+    return {
+        "benchmark": "compression",
+        "kind": "codec",
+        "codec": name,
+        "edges": edges,
+        "response_bytes": len(raw),
+        "wire_bytes": len(packed),
+        "ratio": len(raw) / len(packed),
+        "compress_ms": compress_ms,
+        "decompress_ms": decompress_ms,
+        "break_even_mbit_s": saved_bits / (compress_ms + decompress_ms) / 1000,
+    }
+
+
+def live(edges: int, mbit_s: float, runs: int) -> list[dict]:
+    # a fanout of 1 makes concept 0 the root of a chain of ``edges`` descendants
+    data = SyntheticUMLS(num_concepts=edges + 1, fanout=1, cross_edges=0, name_period=10)
+    faults = FaultProfile(bandwidth=mbit_s * 1e6 / 8)
+    results = []
+    with StandInServer(data, faults) as server:
+        for name, policy in [("identity", CompressionPolicy(accept=()))] + [
+            (c, CompressionPolicy(accept=(c,))) for c in CODECS
+        ]:
+            with EntityDisambiguatorLambdaClient(
+                server.url, "local", auth=UnsignedAuth(), compression=policy
+            ) as client:
+                fetch = lambda: client.get_subgraph("C0000000", "PRED")
+                fetch()
+                results.append(
+                    {
+                        "benchmark": "compression",
+                        "kind": "live",
+                        "codec": name,
+                        "edges": edges,
+                        "mbit_s": mbit_s,
+                        "median_ms": median_ms(fetch, runs),
+                    }
+                )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--edges", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--bandwidth", type=float, nargs="*", default=[10, 100, 1000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    results = [codec(name, edges, args.runs) for edges in args.edges for name in CODECS]
+    for edges in args.edges:
+        for mbit_s in args.bandwidth:
+            results.extend(live(edges, mbit_s, args.runs))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
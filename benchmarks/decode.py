@@ -0,0 +1,75 @@
+"""Compare decoding a large subgraph response as models, in one pass and as columns.
+
+python benchmarks/decode.py --edges 200000 --runs 5 > decode.json
+"""
+
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+from typing import Callable
+
+from entity_disambiguator_py.decoding import edge_columns, traversal_response
+from entity_disambiguator_py.model import GraphTraversalResponse
+
+
+def two_pass(raw: bytes) -> GraphTraversalResponse:
+    # the decoding the client used before responses were validated straight from bytes
+    content = json.loads(raw)
+    content = {"id": content["id"], "edges": content["result"]["edges"]}
+    return GraphTraversalResponse.model_validate(content)
+
+
+DECODERS: dict[str, Callable[[bytes], object]] = {
+    "two_pass": two_pass,
+    "one_pass": traversal_response,
+    "columns": lambda raw: edge_columns("get_subgraph", raw),
+}
+
+
+def response(edges: int) -> bytes:
+    rows = [{"parent": f"C{i // 4:07d}", "child": f"C{i:07d}"} for i in range(edges)]
+    return json.dumps({"id": 1, "result": {"edges": rows}}).encode()
+
+
+def measure(name: str, raw: bytes, edges: int, runs: int) -> dict:
+    decode = DECODERS[name]
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        decode(raw)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    result = decode(raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    timings.sort()
+    return {
+        "benchmark": "decode",
+        "decoder": name,
+        "edges": edges,
+        "response_bytes": len(raw),
+        "runs": runs,
+        "median_ms": statistics.median(timings),
+        "min_ms": timings[0],
+        "peak_mib": peak / 2**20,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--edges", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("decoders", nargs="*", default=list(DECODERS))
+    args = parser.parse_args()
+
+    raw = response(args.edges)
+    print(json.dumps([measure(d, raw, args.edges, args.runs) for d in args.decoders], indent=2))
+
+
+if __name__ == "__main__":
+    main()
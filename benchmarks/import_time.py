@@ -0,0 +1,62 @@
+"""Measure how long importing the client modules takes in a fresh interpreter.
+
+python benchmarks/import_time.py --runs 20 > import_time.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+MODULES = [
+    "entity_disambiguator_py.client",
+    "entity_disambiguator_py.async_client",
+    "boto3",
+]
+
+SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed, "boto3" in sys.modules)
+"""
+
+
+def measure(module: str, runs: int) -> dict:
+    timings = []
+    imports_boto3 = False
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", SNIPPET.format(module=module)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.split()
+        timings.append(float(out[0]) * 1000)
+        imports_boto3 = out[1] == "True"
+
+    timings.sort()
+    return {
+        "benchmark": "import_time",
+        "module": module,
+        "runs": runs,
+        "median_ms": statistics.median(timings),
+        "p90_ms": timings[int(0.9 * (len(timings) - 1))],
+        "min_ms": timings[0],
+        "imports_boto3": imports_boto3,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    print(json.dumps([measure(m, args.runs) for m in args.modules], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,868 @@
+import asyncio
+import json
+import logging
+from time import perf_counter
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Hashable,
+    Iterable,
+    Optional,
+    TypeVar,
+)
+from urllib.parse import urljoin
+
+try:
+    import httpx
+except ImportError as e:  # pragma: no cover
+    raise ImportError(
+        "AsyncEntityDisambiguatorLambdaClient requires httpx, "
+        "install with `pip install entity-disambiguator-py[async]`"
+    ) from e
+
+from requests.exceptions import HTTPError
+
+from entity_disambiguator_py.auth import LazySigV4Auth, UnsignedAuth
+from entity_disambiguator_py.batching import (
+    DEFAULT_BATCH_CHUNK_SIZE,
+    DEFAULT_BATCH_PARALLELISM,
+    DEFAULT_COALESCE_MAX_BATCH_SIZE,
+    AsyncCoalescer,
+    CoalescerStats,
+    afan_out,
+    aichunked,
+    apipeline,
+    chunked,
+    dedupe,
+    merge_in_order,
+)
+from entity_disambiguator_py.cache import (
+    NO_SYNSET,
+    Cache,
+    ResponseCache,
+    SynonymCache,
+    T,
+)
+from entity_disambiguator_py.client import (
+    NoSynonymsFound,
+    _check_sort_prefix,
+    _graph_payload,
+    _no_synonyms,
+    fold_name,
+)
+from entity_disambiguator_py.compression import CompressionPolicy, decode_response
+from entity_disambiguator_py.decoding import (
+    EdgeColumns,
+    check_edge_method,
+    edge_columns,
+    neighbors_response,
+    traversal_response,
+)
+from entity_disambiguator_py.interning import (
+    INTERNER,
+    InternedEdges,
+    Interner,
+    interned_edges,
+)
+from entity_disambiguator_py.model import (
+    BatchCanonicalSynonymsResponse,
+    BatchGetAliasNameResponse,
+    BatchGetAliasResponse,
+    BatchGetConceptResponse,
+    CanonicalSynonym,
+    CanonicalSynonymsResponse,
+    DocDBRelationship,
+    GetAliasesResponse,
+    GetAliasNameResponse,
+    GetAliasResponse,
+    GetConceptInfoResponse,
+    GetConceptResponse,
+    GetNeighborsResponse,
+    GetTypeDefinitionResponse,
+    GraphTraversalResponse,
+    ListConceptResponse,
+    MessageResponse,
+    SynonymSetResponse,
+    UMLSAtom,
+    UMLSAtomName,
+    UMLSConcept,
+)
+from entity_disambiguator_py.streaming import (
+    DEFAULT_PAGE_SIZE,
+    STREAM_CHUNK_SIZE,
+    AsyncConceptStream,
+    _page_payload,
+)
+from entity_disambiguator_py.transport import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+)
+
+# opt-in features are imported when they are used, not with the client
+if TYPE_CHECKING:
+    from entity_disambiguator_py.concurrency import AdaptiveLimiter
+    from entity_disambiguator_py.instrumentation import Instrumentation
+    from entity_disambiguator_py.negative import NegativeCache
+    from entity_disambiguator_py.prefetch import AsyncPrefetcher, PrefetchPolicy
+    from entity_disambiguator_py.resilience import ResiliencePolicy
+    from entity_disambiguator_py.rpc_batch import AsyncRpcBatch
+    from entity_disambiguator_py.traversal import AsyncGraphWalker
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+DEFAULT_MAX_CONCURRENCY = 100
+DEFAULT_MAX_CONNECTIONS = 100
+
+
+class AsyncEntityDisambiguatorLambdaClient:
+    """asyncio counterpart of ``EntityDisambiguatorLambdaClient``.
+
+    Requests are SigV4 signed with botocore, share one ``httpx.AsyncClient``
+    connection pool and are capped at ``max_concurrency`` in flight.
+    """
+
+    def __init__(
+        self,
+        lambda_url: str,
+        region: str,
+        call_id: int = 1,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        cache: Optional[Cache] = None,
+        batch_chunk_size: int = DEFAULT_BATCH_CHUNK_SIZE,
+        batch_parallelism: int = DEFAULT_BATCH_PARALLELISM,
+        coalesce_window: Optional[float] = None,
+        coalesce_max_batch_size: int = DEFAULT_COALESCE_MAX_BATCH_SIZE,
+        instrumentation: Optional["Instrumentation"] = None,
+        resilience: Optional["ResiliencePolicy"] = None,
+        synonym_cache: Optional[SynonymCache] = None,
+        negative_cache: Optional["NegativeCache"] = None,
+        limiter: Optional["AdaptiveLimiter"] = None,
+        compression: Optional[CompressionPolicy] = None,
+        auth: Optional[LazySigV4Auth | UnsignedAuth] = None,
+        prefetch: Optional["PrefetchPolicy"] = None,
+        interner: Optional[Interner] = None,
+    ) -> None:
+        self.headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        self.url = lambda_url
+        self.rpc_url = urljoin(self.url, "/api/rpc")
+        self.region = region
+        self.call_id = call_id
+        self.cache = cache
+        # a DiskCache, or a TieredCache holding one, blocks on SQLite: keep it off the loop
+        self._cache_blocks = cache is not None and not isinstance(cache, ResponseCache)
+        self.batch_chunk_size = batch_chunk_size
+        self.batch_parallelism = batch_parallelism
+        self.instrumentation = instrumentation
+        self.resilience = resilience
+        self.synonym_cache = synonym_cache if synonym_cache is not None else SynonymCache()
+        self.negative_cache = negative_cache
+        self.limiter = limiter
+        self.compression = compression if compression is not None else CompressionPolicy()
+        self.interner = interner if interner is not None else INTERNER
+        self._walker: Optional["AsyncGraphWalker"] = None
+
+        self._concept_coalescer: Optional[AsyncCoalescer[UMLSConcept]] = None
+        self._alias_coalescer: Optional[AsyncCoalescer[UMLSAtom]] = None
+        if coalesce_window is not None:
+            self._concept_coalescer = AsyncCoalescer(
+                "batch_get_concept",
+                self._get_batch_concept,
+                key=lambda c: c.concept_id,
+                fetch_one=self._get_concept_item,
+                window=coalesce_window,
+                max_batch_size=coalesce_max_batch_size,
+            )
+            self._alias_coalescer = AsyncCoalescer(
+                "batch_get_alias_id",
+                self._get_batch_alias_id,
+                key=lambda a: a.atom_id,
+                fetch_one=self._get_alias_item,
+                window=coalesce_window,
+                max_batch_size=coalesce_max_batch_size,
+            )
+
+        self.auth = auth if auth is not None else LazySigV4Auth(region)
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        )
+
+        self.prefetcher: Optional["AsyncPrefetcher"] = None
+        if prefetch is not None:
+            from entity_disambiguator_py.prefetch import AsyncPrefetcher
+
+            self.prefetcher = AsyncPrefetcher(self, prefetch)
+
+    async def aclose(self) -> None:
+        if self.prefetcher is not None:
+            await self.prefetcher.aclose()
+        for coalescer in (self._concept_coalescer, self._alias_coalescer):
+            if coalescer is not None:
+                await coalescer.aclose()
+        await self.http.aclose()
+
+    async def __aenter__(self) -> "AsyncEntityDisambiguatorLambdaClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    @property
+    def walker(self) -> "AsyncGraphWalker":
+        if self._walker is None:
+            from entity_disambiguator_py.traversal import AsyncGraphWalker
+
+            self._walker = AsyncGraphWalker(self)
+        return self._walker
+
+    def batch(self, parallelism: Optional[int] = None) -> "AsyncRpcBatch":
+        from entity_disambiguator_py.rpc_batch import AsyncRpcBatch
+
+        return AsyncRpcBatch(self, parallelism=parallelism)
+
+    def coalescer_stats(self) -> dict[str, CoalescerStats]:
+        stats = {}
+        if self._concept_coalescer is not None:
+            stats["get_concept"] = self._concept_coalescer.stats()
+        if self._alias_coalescer is not None:
+            stats["get_alias_id"] = self._alias_coalescer.stats()
+        return stats
+
+    async def _cache_get(self, method: str, key: Hashable):
+        if self.cache is None:
+            return None
+        if self._cache_blocks:
+            cached = await asyncio.to_thread(self.cache.get, method, key)
+        else:
+            cached = self.cache.get(method, key)
+        if self.prefetcher is not None:
+            self.prefetcher.record_lookup(method, key, cached is not None)
+        return cached
+
+    async def _cache_put(self, method: str, key: Hashable, value: T) -> T:
+        if self.cache is None:
+            return value
+        if self._cache_blocks:
+            return await asyncio.to_thread(self.cache.put, method, key, value)
+        return self.cache.put(method, key, value)
+
+    def _prefetch_concepts(self, concept_ids: Iterable[str]) -> None:
+        if self.prefetcher is not None:
+            self.prefetcher.schedule(concept_ids)
+
+    def _known_absent(self, method: str, key: str) -> bool:
+        return self.negative_cache is not None and self.negative_cache.is_absent(method, key)
+
+    def _remember_absent(self, method: str, key: str) -> None:
+        if self.negative_cache is not None:
+            self.negative_cache.add(method, key)
+
+    async def _sign(
+        self,
+        method: str,
+        url: str,
+        body: Optional[bytes],
+        headers: Optional[dict[str, str]] = None,
+    ) -> dict[str, str]:
+        return await self.auth.aheaders_for(method, url, body, headers or self.headers)
+
+    async def _request(self, method: str, url: str, body: Optional[bytes] = None) -> httpx.Response:
+        async with self.semaphore:
+            headers = await self._sign(method, url, body)
+            return await self.http.request(method, url, headers=headers, content=body)
+
+    async def _get_request(self, url: str) -> httpx.Response:
+        return await self._request("GET", url)
+
+    async def _post_request(
+        self, url: str, payload: dict | list, stream: bool = False
+    ) -> httpx.Response:
+        body = json.dumps(payload).encode()
+        send = lambda: self._limited(payload, lambda: self._send_post(url, body, stream))
+        if self.instrumentation is None and self.resilience is None:
+            return await send()
+
+        start = perf_counter()
+        if self.resilience is None:
+            r, retries = await send(), 0
+        else:
+            r, retries = await self.resilience.acall(
+                payload, send, retry_on=(httpx.TransportError,)
+            )
+
+        if self.instrumentation is not None:
+            from entity_disambiguator_py.instrumentation import RpcEvent, rpc_method
+
+            event = RpcEvent(
+                method=rpc_method(payload),
+                status_code=r.status_code,
+                request_bytes=len(body),
+                # a streamed body is read later by the caller, its size is the announced one
+                response_bytes=int(r.headers.get("Content-Length", 0))
+                if stream
+                else len(r.content),
+                ttfb=r.extensions.get("ttfb"),
+                network_time=perf_counter() - start,
+                retries=retries,
+                wire=r.extensions.get("wire"),
+            )
+            self.instrumentation.record_response(event)
+            if stream:
+                self.instrumentation.flush()
+        return r
+
+    async def _limited(
+        self, payload: dict | list, send: Callable[[], Awaitable[httpx.Response]]
+    ) -> httpx.Response:
+        if self.limiter is None:
+            return await send()
+        from entity_disambiguator_py.concurrency import latency_class
+
+        return await self.limiter.acall(latency_class(payload), send)
+
+    async def _send_post(self, url: str, body: bytes, stream: bool = False) -> httpx.Response:
+        body, headers = self.compression.prepare(body, self.headers)
+        async with self.semaphore:
+            headers = await self._sign("POST", url, body, headers)
+            request = self.http.build_request("POST", url, headers=headers, content=body)
+            start = perf_counter()
+            r = await self.http.send(request, stream=True)
+            r.extensions["ttfb"] = perf_counter() - start
+            if stream:
+                # the slot is only held until the headers arrive, the caller reads the body
+                return r
+            try:
+                # read without httpx decoding it so the size on the wire is known
+                raw = b"".join([chunk async for chunk in r.aiter_raw()])
+            finally:
+                await r.aclose()
+
+        content, r.extensions["wire"] = decode_response(
+            r.headers.get("Content-Encoding"), raw, len(body)
+        )
+        # what Response.aread() would have stored
+        r._content = content
+        return r
+
+    def _decode(self, parse: Callable[[bytes], R], raw: bytes) -> R:
+        if self.instrumentation is None:
+            return parse(raw)
+        return self.instrumentation.decode(parse, raw)
+
+    async def say_hello(self) -> MessageResponse:
+        url = self.url + "/"
+        r = await self._get_request(url)
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in say_hello {r.content}")
+
+        return MessageResponse(message=r.content.decode())
+
+    async def rpc_call(self, payload: dict | list) -> httpx.Response:
+        r = await self._rpc(payload)
+        if self.instrumentation is not None:
+            # the caller decodes the response, if at all, outside the client
+            self.instrumentation.flush()
+        return r
+
+    async def _rpc(self, payload: dict | list) -> httpx.Response:
+        """An RPC whose response the client decodes with ``_decode``."""
+        return await self._post_request(self.rpc_url, payload)
+
+    async def get_alias_id(self, alias_id: str) -> GetAliasResponse:
+        cached = await self._cache_get("get_alias_id", alias_id)
+        if cached is not None:
+            return cached
+
+        if self._alias_coalescer is not None:
+            item = await self._alias_coalescer.get(alias_id)
+            resp = GetAliasResponse(id=self.call_id, result=item)
+        else:
+            resp = await self._get_alias_id(alias_id)
+        self._prefetch_concepts([resp.result.concept_id])
+        return await self._cache_put("get_alias_id", alias_id, resp)
+
+    async def _get_alias_id(self, alias_id: str) -> GetAliasResponse:
+        payload = {"id": self.call_id, "method": "get_alias_id", "params": {"id": alias_id}}
+        r = await self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in get_alias_id {r.content}")
+
+        return self._decode(GetAliasResponse.model_validate_json, r.content)
+
+    async def _get_alias_item(self, alias_id: str) -> UMLSAtom:
+        return (await self._get_alias_id(alias_id)).result
+
+    async def get_batch_alias_id(
+        self,
+        alias_ids: list[str],
+        chunk_size: Optional[int] = None,
+        parallelism: Optional[int] = None,
+    ) -> BatchGetAliasResponse:
+        ids = dedupe(alias_ids)
+        chunks = chunked(ids, chunk_size or self.batch_chunk_size)
+        parallelism = parallelism or self.batch_parallelism
+        results = await afan_out(self._get_batch_alias_id, chunks, parallelism)
+        result, missing = merge_in_order(chunks, results, lambda x: x.atom_id)
+
+        return BatchGetAliasResponse(id=self.call_id, result=result, missing=missing)
+
+    async def _get_batch_alias_id(self, ids: list[str]) -> list[UMLSAtom]:
+        payload = {"id": self.call_id, "method": "batch_get_alias_id", "params": {"ids": ids}}
+        r = await self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(
+                f"status: {r.status_code} error in batch_get_alias_id {r.content}", response=r
+            )
+
+        return self._decode(BatchGetAliasResponse.model_validate_json, r.content).result
+
+    async def get_alias_name(self, name: str) -> GetAliasNameResponse:
+        cached = await self._cache_get("get_alias_name", name)
+        if cached is not None:
+            return cached
+
+        payload = {"id": self.call_id, "method": "get_alias_name", "params": {"id": name}}
+        r = await self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in get_alias_name {r.content}")
+
+        resp = self._decode(GetAliasNameResponse.model_validate_json, r.content)
+        return await self._cache_put("get_alias_name", name, resp)
+
+    async def get_batch_alias_name(
+        self,
+        names: list[str],
+        chunk_size: Optional[int] = None,
+        parallelism: Optional[int] = None,
+    ) -> BatchGetAliasNameResponse:
+        ids = dedupe(names)
+        chunks = chunked(ids, chunk_size or self.batch_chunk_size)
+        parallelism = parallelism or self.batch_parallelism
+        results = await afan_out(self._get_batch_alias_name, chunks, parallelism)
+        result, missing = merge_in_order(chunks, results, lambda x: x.name, fold_name)
+        self._prefetch_concepts(c for n in result for c in n.concept_ids)
+
+        return BatchGetAliasNameResponse(id=self.call_id, result=result, missing=missing)
+
+    async def _get_batch_alias_name(self, ids: list[str]) -> list[UMLSAtomName]:
+        payload = {"id": self.call_id, "method": "batch_get_alias_name", "params": {"ids": ids}}
+        r = await self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in batch_get_alias_name {r.content}")
+
+        return self._decode(BatchGetAliasNameResponse.model_validate_json, r.content).result
+
+    async def get_type_definition(self, type_id: str) -> GetTypeDefinitionResponse:
+        cached = await self._cache_get("get_type_definition", type_id)
+        if cached is not None:
+            return cached
+
+        payload = {"id": self.call_id, "method": "get_type_definition", "params": {"id": type_id}}
+        r = await self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in get_type_definition {r.content}")
+        resp = self._decode(GetTypeDefinitionResponse.model_validate_json, r.content)
+        return await self._cache_put("get_type_definition", type_id, resp)
+
+    async def get_aliases(self, name: str) -> GetAliasesResponse:
+        cached = await self._cache_get("get_aliases", name)
+        if cached is not None:
+            return cached
+
+        if self._known_absent("get_aliases", name):
+            return GetAliasesResponse(id=self.call_id, result=[])
+
+        payload = {"id": self.call_id, "method": "get_aliases", "params": {"id": name}}
+        r = await self._rpc(payload)
+        if r.status_code == 404:
+            self._remember_absent("get_aliases", name)
+            resp = GetAliasesResponse(id=self.call_id, result=[])
+            return await self._cache_put("get_aliases", name, resp)
+
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in get_aliases {r.content}")
+
+        resp = self._decode(GetAliasesResponse.model_validate_json, r.content)
+        self._prefetch_concepts(a.concept_id for a in resp.result)
+        return await self._cache_put("get_aliases", name, resp)
+
+    async def list_concepts(self) -> ListConceptResponse:
+        payload = {"id": self.call_id, "method": "list_concepts"}
+        r = await self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in list_concepts {r.content}")
+        return self._decode(ListConceptResponse.model_validate_json, r.content)
+
+    def iter_concepts(
+        self, page_size: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None
+    ) -> AsyncConceptStream:
+        return AsyncConceptStream(lambda c: self._concept_page(page_size, c), cursor)
+
+    async def _concept_page(self, page_size: int, cursor: Optional[str]) -> AsyncIterator[bytes]:
+        payload = _page_payload(self.call_id, page_size, cursor)
+        # the slot is only held until the headers arrive, the body is read while
+        # iter_concepts_with_details needs slots of its own
+        r = await self._post_request(self.rpc_url, payload, stream=True)
+        try:
+            if r.status_code != 200:
+                content = await r.aread()
+                raise HTTPError(f"status: {r.status_code} error in list_concepts {content}")
+            async for chunk in r.aiter_bytes(STREAM_CHUNK_SIZE):
+                yield chunk
+        finally:
+            await r.aclose()
+
+    async def iter_concepts_with_details(
+        self,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        parallelism: Optional[int] = None,
+    ) -> AsyncIterator[UMLSConcept]:
+        ids = self.iter_concepts(page_size, cursor)
+        chunks = aichunked(ids, chunk_size or self.batch_chunk_size)
+        parallelism = parallelism or self.batch_parallelism
+        async for concepts in apipeline(self._get_batch_concept, chunks, parallelism):
+            for concept in concepts:
+                yield concept
+
+    async def get_concept(self, concept_id: str) -> GetConceptResponse:
+        cached = await self._cache_get("get_concept", concept_id)
+        if cached is not None:
+            return cached
+
+        if self._concept_coalescer is not None:
+            item = await self._concept_coalescer.get(concept_id)
+            resp = GetConceptResponse(id=self.call_id, result=item)
+        else:
+            resp = await self._get_concept(concept_id)
+        return await self._cache_put("get_concept", concept_id, resp)
+
+    async def _get_concept(self, concept_id: str) -> GetConceptResponse:
+        payload = {"id": self.call_id, "method": "get_concept", "params": {"id": concept_id}}
+        r = await self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in get_concept {r.content}")
+
+        return self._decode(GetConceptResponse.model_validate_json, r.content)
+
+    async def _get_concept_item(self, concept_id: str) -> UMLSConcept:
+        return (await self._get_concept(concept_id)).result
+
+    async def get_batch_concept(
+        self,
+        concept_ids: list[str],
+        chunk_size: Optional[int] = None,
+        parallelism: Optional[int] = None,
+    ) -> BatchGetConceptResponse:
+        ids = dedupe(concept_ids)
+        chunks = chunked(ids, chunk_size or self.batch_chunk_size)
+        parallelism = parallelism or self.batch_parallelism
+        results = await afan_out(self._get_batch_concept, chunks, parallelism)
+        result, missing = merge_in_order(chunks, results, lambda x: x.concept_id)
+
+        return BatchGetConceptResponse(id=self.call_id, result=result, missing=missing)
+
+    async def _get_batch_concept(self, ids: list[str]) -> list[UMLSConcept]:
+        payload = {
+            "id": self.call_id,
+            "method": "batch_get_concept",
+            "params": {"ids": ids},
+        }
+        r = await self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(
+                f"status: {r.status_code} error in batch_get_concept {r.content}", response=r
+            )
+        return self._decode(BatchGetConceptResponse.model_validate_json, r.content).result
+
+    async def get_concept_info(self, concept_id: str) -> GetConceptInfoResponse:
+        cached = await self._cache_get("get_concept_info", concept_id)
+        if cached is not None:
+            return cached
+
+        payload = {
+            "id": self.call_id,
+            "method": "get_concept_info",
+            "params": {"id": concept_id},
+        }
+        r = await self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in get_concept_info {r.content}")
+
+        resp = self._decode(GetConceptInfoResponse.model_validate_json, r.content)
+        return await self._cache_put("get_concept_info", concept_id, resp)
+
+    async def get_ancestors(
+        self, umls_id: str, sort_prefix: str, depth_limit: Optional[int] = None
+    ) -> GraphTraversalResponse:
+        _check_sort_prefix(sort_prefix)
+        if depth_limit is not None:
+            return await self.walker.get_ancestors(umls_id, sort_prefix, depth_limit)
+        payload = _graph_payload(self.call_id, "get_ancestors", umls_id, sort_prefix)
+        r = await self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in get_ancestors {r.content}")
+
+        return self._decode(traversal_response, r.content)
+
+    async def get_descendants(
+        self, umls_id: str, sort_prefix: str, depth_limit: Optional[int] = None
+    ) -> GraphTraversalResponse:
+        _check_sort_prefix(sort_prefix)
+        if depth_limit is not None:
+            return await self.walker.get_descendants(umls_id, sort_prefix, depth_limit)
+        payload = _graph_payload(self.call_id, "get_descendants", umls_id, sort_prefix)
+        r = await self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in get_descendants {r.content}")
+
+        return self._decode(traversal_response, r.content)
+
+    async def get_parents(self, umls_id: str, sort_prefix: str) -> GetNeighborsResponse:
+        cached = await self._cache_get("get_parents", (umls_id, sort_prefix))
+        if cached is not None:
+            return cached
+
+        _check_sort_prefix(sort_prefix)
+        payload = _graph_payload(self.call_id, "get_parents", umls_id, sort_prefix)
+        r = await self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in get_parents {r.content}")
+
+        resp = self._decode(neighbors_response, r.content)
+        return await self._cache_put("get_parents", (umls_id, sort_prefix), resp)
+
+    async def get_children(self, umls_id: str, sort_prefix: str) -> GetNeighborsResponse:
+        cached = await self._cache_get("get_children", (umls_id, sort_prefix))
+        if cached is not None:
+            return cached
+
+        _check_sort_prefix(sort_prefix)
+        payload = _graph_payload(self.call_id, "get_children", umls_id, sort_prefix)
+        r = await self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in get_children {r.content}")
+
+        resp = self._decode(neighbors_response, r.content)
+        return await self._cache_put("get_children", (umls_id, sort_prefix), resp)
+
+    async def get_neighbors(self, umls_id: str, sort_prefix: str) -> GetNeighborsResponse:
+        cached = await self._cache_get("get_neighbors", (umls_id, sort_prefix))
+        if cached is not None:
+            return cached
+
+        payload = _graph_payload(self.call_id, "get_neighbors", umls_id, sort_prefix)
+        r = await self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in get_neighbors {r.content}")
+
+        resp = self._decode(neighbors_response, r.content)
+        return await self._cache_put("get_neighbors", (umls_id, sort_prefix), resp)
+
+    async def get_subgraph(
+        self, umls_id: str, sort_prefix: str, depth_limit: Optional[int] = None
+    ) -> GraphTraversalResponse:
+        _check_sort_prefix(sort_prefix)
+        if depth_limit is not None:
+            return await self.walker.get_subgraph(umls_id, sort_prefix, depth_limit)
+        payload = _graph_payload(self.call_id, "get_subgraph", umls_id, sort_prefix)
+        r = await self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in get_subgraph {r.content}")
+
+        return self._decode(traversal_response, r.content)
+
+    async def get_edge_columns(self, method: str, umls_id: str, sort_prefix: str) -> EdgeColumns:
+        """Edges of any graph method as parent/child columns, skipping the models."""
+        check_edge_method(method)
+        if method != "get_neighbors":
+            _check_sort_prefix(sort_prefix)
+        payload = _graph_payload(self.call_id, method, umls_id, sort_prefix)
+        r = await self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in {method} {r.content}")
+
+        return self._decode(lambda raw: edge_columns(method, raw), r.content)
+
+    async def get_interned_edges(
+        self, method: str, umls_id: str, sort_prefix: str, interner: Optional[Interner] = None
+    ) -> InternedEdges:
+        """Like ``get_edge_columns`` with node ids interned to int32 codes, see ``Interner``."""
+        check_edge_method(method)
+        if method != "get_neighbors":
+            _check_sort_prefix(sort_prefix)
+        payload = _graph_payload(self.call_id, method, umls_id, sort_prefix)
+        r = await self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in {method} {r.content}")
+
+        interner = interner if interner is not None else self.interner
+        return self._decode(lambda raw: interned_edges(method, raw, interner), r.content)
+
+    async def get_canonical_synonym(self, cid: str) -> CanonicalSynonymsResponse:
+        cached = await self._cache_get("get_canonical_synonym", cid)
+        if cached is not None:
+            return cached
+
+        if self._known_absent("get_canonical_synonym", cid):
+            return CanonicalSynonymsResponse(id=self.call_id, result=_no_synonyms(cid))
+
+        payload = {
+            "id": self.call_id,
+            "method": "get_canonical_synonym",
+            "params": {"id": cid},
+        }
+        r = await self._rpc(payload)
+        if r.status_code == 404:
+            logger.debug(f"no synonyms found for {cid}")
+            self._remember_absent("get_canonical_synonym", cid)
+            resp = CanonicalSynonymsResponse(id=self.call_id, result=_no_synonyms(cid))
+            return await self._cache_put("get_canonical_synonym", cid, resp)
+
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in get_canonical_synonym {r.content}")
+
+        resp = self._decode(CanonicalSynonymsResponse.model_validate_json, r.content)
+        return await self._cache_put("get_canonical_synonym", cid, resp)
+
+    get_canonical_synonyms = get_canonical_synonym
+
+    async def get_synonym_set(self, ssid: str) -> SynonymSetResponse:
+        cached = await self._cache_get("get_synonym_set", ssid)
+        if cached is not None:
+            return cached
+
+        payload = {
+            "id": self.call_id,
+            "method": "get_synonym_subgraph",
+            "params": {"id": ssid},
+        }
+        r = await self._rpc(payload)
+        if r.status_code == 404:
+            logger.debug(f"no synonyms found for {ssid}")
+            raise NoSynonymsFound(ssid)
+
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in get_synonym_set {r.content}")
+
+        resp = self._decode(SynonymSetResponse.model_validate_json, r.content)
+        return await self._cache_put("get_synonym_set", ssid, resp)
+
+    async def canonicalize_many(
+        self,
+        cids: list[str],
+        chunk_size: Optional[int] = None,
+        parallelism: Optional[int] = None,
+    ) -> BatchCanonicalSynonymsResponse:
+        """Canonical synonyms of ``cids`` in order, CUIs without synonyms get synset "-1".
+
+        CUIs are looked up in ``synonym_cache`` first and the rest are sent as JSON-RPC
+        batches in waves of ``chunk_size * parallelism``. The members of every synset
+        found in a wave are fetched once, which resolves the other CUIs of that synset
+        still waiting for a later wave without asking for them. Which CUIs share a
+        synset is only known once one of them is resolved, so CUIs of one synset in the
+        same wave are each asked for. CUIs whose lookup failed are listed in ``missing``.
+        """
+        ids = dedupe(cids)
+        chunk_size = chunk_size or self.batch_chunk_size
+        parallelism = parallelism or self.batch_parallelism
+
+        known, pending = self.synonym_cache.lookup(ids)
+        if self.negative_cache is not None:
+            for cid in pending:
+                if self._known_absent("get_canonical_synonym", cid):
+                    known[cid] = _no_synonyms(cid)
+            pending = [cid for cid in pending if cid not in known]
+        wave_size = chunk_size * parallelism
+        while pending:
+            wave, pending = pending[:wave_size], pending[wave_size:]
+            results = await afan_out(self._canonical_chunk, chunked(wave, chunk_size), parallelism)
+            found = [synonym for chunk in results for synonym in chunk]
+            for cid, synonym in zip(wave, found):
+                if synonym is None:
+                    continue
+                self.synonym_cache.put_canonical(synonym)
+                if synonym.synset_id == NO_SYNSET:
+                    self._remember_absent("get_canonical_synonym", cid)
+                known[cid] = synonym
+
+            synsets = self.synonym_cache.unexpanded([s for s in found if s is not None])
+            if synsets and pending:
+                chunks = chunked(list(synsets.items()), chunk_size)
+                await afan_out(self._synonym_set_chunk, chunks, parallelism)
+                resolved, pending = self.synonym_cache.lookup(pending)
+                known.update(resolved)
+
+        result = [known[cid] for cid in ids if cid in known]
+        missing = [cid for cid in ids if cid not in known]
+        return BatchCanonicalSynonymsResponse(id=self.call_id, result=result, missing=missing)
+
+    async def _canonical_chunk(self, cids: list[str]) -> list[Optional[CanonicalSynonym]]:
+        async with self.batch(parallelism=1) as batch:
+            calls = [batch.get_canonical_synonym(cid) for cid in cids]
+        found = []
+        for cid, call in zip(cids, calls):
+            # one failed lookup leaves the others of the chunk
+            if call.error() is not None:
+                logger.debug(f"could not canonicalize {cid}: {call.error()}")
+                found.append(None)
+            else:
+                found.append(call.result().result)
+        return found
+
+    async def _synonym_set_chunk(self, synsets: list[tuple[str, str]]) -> None:
+        async with self.batch(parallelism=1) as batch:
+            calls = [(batch.get_synonym_set(ssid), canonical) for ssid, canonical in synsets]
+        for call, canonical in calls:
+            # the members only save later lookups, a synset that fails is fetched per CUI
+            if call.error() is not None:
+                logger.debug(f"could not expand synset: {call.error()}")
+                continue
+            self.synonym_cache.put_synset(call.result().result, canonical)
+
+    async def create_relationship(self, relationship: DocDBRelationship) -> None:
+        relationship_dict = relationship.model_dump()
+        payload = {
+            "id": self.call_id,
+            "method": "create_relationship",
+            "params": {"data": relationship_dict},
+        }
+        r = await self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in create relationship {r.content}")
+
+        content = self._decode(json.loads, r.content)
+        logger.debug(f"response {content}")
+
+    async def reset_cache(self) -> MessageResponse:
+        if self._cache_blocks:
+            await asyncio.to_thread(self.cache.clear)
+        elif self.cache is not None:
+            self.cache.clear()
+        self.synonym_cache.clear()
+        if self.negative_cache is not None:
+            self.negative_cache.clear()
+        if self._walker is not None:
+            self._walker.clear()
+
+        payload = {
+            "id": self.call_id,
+            "method": "reset_cache",
+        }
+        r = await self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in reset cache {r.content}")
+
+        return MessageResponse(message=self._decode(bytes.decode, r.content))
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from requests.auth import AuthBase
+from requests.models import PreparedRequest
+
+
+def get_current_credentials():
+    import boto3
+
+    sess = boto3.Session()
+    creds = sess.get_credentials()
+
+    if creds is None:
+        raise PermissionError("No credentials found, make sure you're logged in with AWS SSO")
+    return creds
+
+
+class UnsignedAuth(AuthBase):
+    """Sends requests without signing them, e.g. for a local stand-in server."""
+
+    def __call__(self, r: PreparedRequest) -> PreparedRequest:
+        return r
+
+    def headers_for(
+        self, method: str, url: str, body: Optional[bytes], headers: dict[str, str]
+    ) -> dict[str, str]:
+        return dict(headers)
+
+    async def aheaders_for(
+        self, method: str, url: str, body: Optional[bytes], headers: dict[str, str]
+    ) -> dict[str, str]:
+        return dict(headers)
+
+
+class LazySigV4Auth(AuthBase):
+    """SigV4 signing that resolves AWS credentials on the first signed request.
+
+    The boto3 credentials object is kept rather than a frozen copy, so expiring
+    session tokens are refreshed and the signer is rebuilt when they change. The
+    async client signs with a frozen copy for up to ``credentials_ttl`` seconds and
+    resolves or refreshes the credentials in a worker thread, since that may import
+    boto3 and call STS, SSO or the instance metadata service.
+    """
+
+    def __init__(
+        self,
+        region: str,
+        service: str = "lambda",
+        credentials_provider: Callable[[], Any] = get_current_credentials,
+        credentials_ttl: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.region = region
+        self.service = service
+        self.credentials_provider = credentials_provider
+        self.credentials_ttl = credentials_ttl
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._credentials: Any = None
+        self._frozen: Any = None
+        self._aws4auth: Optional[AuthBase] = None
+        self._latest: Any = None
+        self._latest_at: Optional[float] = None
+
+    def frozen_credentials(self):
+        with self._lock:
+            if self._credentials is None:
+                self._credentials = self.credentials_provider()
+            credentials = self._credentials
+
+        # refreshes the session token when it is close to expiring
+        frozen = credentials.get_frozen_credentials()
+        with self._lock:
+            self._latest, self._latest_at = frozen, self.clock()
+        return frozen
+
+    def recent_credentials(self):
+        """The frozen credentials if fetched within ``credentials_ttl`` seconds, else ``None``."""
+        with self._lock:
+            if self._latest_at is None or self.clock() - self._latest_at >= self.credentials_ttl:
+                return None
+            return self._latest
+
+    def _signer(self) -> AuthBase:
+        frozen = self.frozen_credentials()
+        with self._lock:
+            if self._aws4auth is None or frozen != self._frozen:
+                from requests_aws4auth import AWS4Auth
+
+                self._aws4auth = AWS4Auth(
+                    frozen.access_key,
+                    frozen.secret_key,
+                    self.region,
+                    self.service,
+                    session_token=frozen.token,
+                )
+                self._frozen = frozen
+            return self._aws4auth
+
+    def __call__(self, r: PreparedRequest) -> PreparedRequest:
+        return self._signer()(r)
+
+    def headers_for(
+        self, method: str, url: str, body: Optional[bytes], headers: dict[str, str]
+    ) -> dict[str, str]:
+        return self._signed(self.frozen_credentials(), method, url, body, headers)
+
+    async def aheaders_for(
+        self, method: str, url: str, body: Optional[bytes], headers: dict[str, str]
+    ) -> dict[str, str]:
+        credentials = self.recent_credentials()
+        if credentials is None:
+            credentials = await asyncio.to_thread(self.frozen_credentials)
+        return self._signed(credentials, method, url, body, headers)
+
+    def _signed(
+        self, credentials, method: str, url: str, body: Optional[bytes], headers: dict[str, str]
+    ) -> dict[str, str]:
+        from botocore.auth import SigV4Auth
+        from botocore.awsrequest import AWSRequest
+
+        request = AWSRequest(method=method, url=url, data=body, headers=dict(headers))
+        SigV4Auth(credentials, self.service, self.region).add_auth(request)
+        return dict(request.headers.items())
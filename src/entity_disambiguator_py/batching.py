@@ -0,0 +1,421 @@
+import asyncio
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Generic,
+    Iterable,
+    Iterator,
+    Optional,
+    TypeVar,
+)
+
+from requests.exceptions import HTTPError
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_BATCH_CHUNK_SIZE = 500
+DEFAULT_BATCH_PARALLELISM = 4
+DEFAULT_COALESCE_WINDOW = 0.002
+DEFAULT_COALESCE_MAX_BATCH_SIZE = 100
+
+
+def dedupe(ids: Iterable[str]) -> list[str]:
+    return list(dict.fromkeys(ids))
+
+
+def chunked(ids: list[T], size: int) -> list[list[T]]:
+    if size <= 0:
+        raise ValueError(f"chunk size must be positive, got {size}")
+    return [ids[i : i + size] for i in range(0, len(ids), size)]
+
+
+def ichunked(ids: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Lazy ``chunked`` for iterables that should not be materialised."""
+    if size <= 0:
+        raise ValueError(f"chunk size must be positive, got {size}")
+    chunk: list[T] = []
+    for item in ids:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def aichunked(ids: AsyncIterable[T], size: int) -> AsyncIterator[list[T]]:
+    if size <= 0:
+        raise ValueError(f"chunk size must be positive, got {size}")
+    chunk: list[T] = []
+    async for item in ids:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def fan_out(fn: Callable[[T], R], chunks: list[T], parallelism: int) -> list[R]:
+    if len(chunks) <= 1 or parallelism <= 1:
+        return [fn(c) for c in chunks]
+
+    with ThreadPoolExecutor(max_workers=min(parallelism, len(chunks))) as pool:
+        return list(pool.map(fn, chunks))
+
+
+async def afan_out(fn: Callable[[T], Awaitable[R]], chunks: list[T], parallelism: int) -> list[R]:
+    semaphore = asyncio.Semaphore(max(parallelism, 1))
+
+    async def run(chunk: T) -> R:
+        async with semaphore:
+            return await fn(chunk)
+
+    return list(await asyncio.gather(*(run(c) for c in chunks)))
+
+
+def pipeline(fn: Callable[[T], R], chunks: Iterable[T], parallelism: int) -> Iterator[R]:
+    """Ordered ``fan_out`` over a lazy iterable with at most ``parallelism`` calls in flight."""
+    with ThreadPoolExecutor(max_workers=max(parallelism, 1)) as pool:
+        in_flight: deque[Future[R]] = deque()
+        for chunk in chunks:
+            in_flight.append(pool.submit(fn, chunk))
+            if len(in_flight) >= parallelism:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+async def apipeline(
+    fn: Callable[[T], Awaitable[R]], chunks: AsyncIterable[T], parallelism: int
+) -> AsyncIterator[R]:
+    in_flight: deque[asyncio.Task[R]] = deque()
+    try:
+        async for chunk in chunks:
+            in_flight.append(asyncio.ensure_future(fn(chunk)))
+            if len(in_flight) >= parallelism:
+                yield await in_flight.popleft()
+        while in_flight:
+            yield await in_flight.popleft()
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+
+def merge_in_order(
+    chunks: list[list[str]],
+    chunk_results: Iterable[list[R]],
+    key: Callable[[R], str],
+    normalize: Optional[Callable[[str], str]] = None,
+) -> tuple[list[R], list[str]]:
+    """Order results like the ids sent in ``chunks`` and list the ids with no result.
+
+    A result is matched to the id it was asked for by ``key``, or when the server
+    echoes another form of the id, by ``normalize`` applied to both as the server
+    does. Results that match no id sent in their chunk are kept at the end rather
+    than dropped, and are never paired with an id by position. The results of ids
+    come first, so they line up with the ids that are not missing.
+    """
+    by_id: dict[str, R] = {}
+    extra: list[R] = []
+    for sent, results in zip(chunks, chunk_results):
+        requested = set(sent)
+        unmatched = []
+        for item in results:
+            k = key(item)
+            if k in requested:
+                by_id.setdefault(k, item)
+            else:
+                unmatched.append(item)
+        if unmatched and normalize is not None:
+            left: dict[str, list[str]] = {}
+            for i in sent:
+                if i not in by_id:
+                    left.setdefault(normalize(i), []).append(i)
+            for item in unmatched:
+                ids = left.pop(normalize(key(item)), None)
+                if ids is None:
+                    extra.append(item)
+                else:
+                    by_id.update((i, item) for i in ids)
+        else:
+            extra.extend(unmatched)
+
+    ids = [i for sent in chunks for i in sent]
+    ordered = [by_id[i] for i in ids if i in by_id]
+    missing = [i for i in ids if i not in by_id]
+    return ordered + extra, missing
+
+
+@dataclass(frozen=True)
+class CoalescerStats:
+    requests: int
+    batches: int
+    batched_ids: int
+    max_batch_size: int
+    batch_sizes: dict[int, int]
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.batched_ids / self.batches if self.batches else 0.0
+
+
+class _CoalescerBase(Generic[R]):
+    def __init__(
+        self,
+        method: str,
+        key: Callable[[R], str],
+        window: float,
+        max_batch_size: int,
+    ) -> None:
+        if max_batch_size <= 0:
+            raise ValueError(f"max_batch_size must be positive, got {max_batch_size}")
+
+        self.method = method
+        self.key = key
+        self.window = window
+        self.max_batch_size = max_batch_size
+
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._batches = 0
+        self._batched_ids = 0
+        self._max_batch = 0
+        self._batch_sizes: Counter[int] = Counter()
+
+    def _group(self, batch: list[tuple[str, Any]]) -> dict[str, list[Any]]:
+        waiters: dict[str, list[Any]] = {}
+        for item_id, fut in batch:
+            waiters.setdefault(item_id, []).append(fut)
+
+        with self._stats_lock:
+            self._requests += len(batch)
+            self._batches += 1
+            self._batched_ids += len(waiters)
+            self._max_batch = max(self._max_batch, len(waiters))
+            self._batch_sizes[len(waiters)] += 1
+
+        return waiters
+
+    def _resolve(self, waiters: dict[str, list[Any]], results: list[R]) -> None:
+        by_key = {self.key(r): r for r in results}
+        for item_id, futs in waiters.items():
+            if item_id in by_key:
+                _set_result(futs, by_key[item_id])
+            else:
+                _set_exception(futs, HTTPError(f"status: 404 {item_id} not found in {self.method}"))
+
+    def stats(self) -> CoalescerStats:
+        with self._stats_lock:
+            return CoalescerStats(
+                requests=self._requests,
+                batches=self._batches,
+                batched_ids=self._batched_ids,
+                max_batch_size=self._max_batch,
+                batch_sizes=dict(self._batch_sizes),
+            )
+
+
+def _batch_rejected(error: Exception) -> bool:
+    """Whether single calls may succeed where a batch failed with ``error``.
+
+    Only a 4xx other than a timeout or throttling says so; sending the ids one by
+    one after a 429 or 5xx would multiply the load on an overloaded service.
+    """
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return status is not None and 400 <= status < 500 and status not in (408, 429)
+
+
+def _set_result(futs: list[Any], value: Any) -> None:
+    for fut in futs:
+        if not fut.done():
+            fut.set_result(value)
+
+
+def _set_exception(futs: list[Any], exc: BaseException) -> None:
+    for fut in futs:
+        if not fut.done():
+            fut.set_exception(exc)
+
+
+class Coalescer(_CoalescerBase[R]):
+    """Merges single-id lookups from many threads into batch RPCs.
+
+    Ids arriving within ``window`` seconds of the first one, up to
+    ``max_batch_size``, are sent with ``fetch_batch``. If the service rejects the
+    batch with a 4xx, because it does not take batches or one id is bad, each id is
+    retried alone with ``fetch_one`` so one bad id only fails its own caller. Any
+    other failure, such as a 429, a 5xx or a timeout, fails every caller with it.
+    """
+
+    def __init__(
+        self,
+        method: str,
+        fetch_batch: Callable[[list[str]], list[R]],
+        key: Callable[[R], str],
+        fetch_one: Optional[Callable[[str], R]] = None,
+        window: float = DEFAULT_COALESCE_WINDOW,
+        max_batch_size: int = DEFAULT_COALESCE_MAX_BATCH_SIZE,
+        max_in_flight: int = DEFAULT_BATCH_PARALLELISM,
+    ) -> None:
+        super().__init__(method, key, window, max_batch_size)
+        self.fetch_batch = fetch_batch
+        self.fetch_one = fetch_one
+
+        self._queue: queue.SimpleQueue[Optional[tuple[str, Future]]] = queue.SimpleQueue()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def submit(self, item_id: str) -> "Future[R]":
+        fut: Future[R] = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"{self.method} coalescer is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._collect, daemon=True)
+                self._thread.start()
+            self._queue.put((item_id, fut))
+        return fut
+
+    def get(self, item_id: str, timeout: Optional[float] = None) -> R:
+        return self.submit(item_id).result(timeout)
+
+    def _collect(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+
+            batch = [first]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch: list[tuple[str, Future]]) -> None:
+        waiters = self._group(batch)
+        ids = list(waiters)
+        try:
+            results = self.fetch_batch(ids)
+        except Exception as e:
+            if self.fetch_one is None or len(ids) == 1 or not _batch_rejected(e):
+                for futs in waiters.values():
+                    _set_exception(futs, e)
+                return
+
+            for item_id, futs in waiters.items():
+                try:
+                    _set_result(futs, self.fetch_one(item_id))
+                except Exception as item_error:
+                    _set_exception(futs, item_error)
+            return
+
+        self._resolve(waiters, results)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+        self._executor.shutdown(wait=True)
+
+
+class AsyncCoalescer(_CoalescerBase[R]):
+    """asyncio variant of ``Coalescer`` for lookups issued from many tasks."""
+
+    def __init__(
+        self,
+        method: str,
+        fetch_batch: Callable[[list[str]], Awaitable[list[R]]],
+        key: Callable[[R], str],
+        fetch_one: Optional[Callable[[str], Awaitable[R]]] = None,
+        window: float = DEFAULT_COALESCE_WINDOW,
+        max_batch_size: int = DEFAULT_COALESCE_MAX_BATCH_SIZE,
+    ) -> None:
+        super().__init__(method, key, window, max_batch_size)
+        self.fetch_batch = fetch_batch
+        self.fetch_one = fetch_one
+
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def get(self, item_id: str) -> R:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((item_id, fut))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._dispatch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        waiters = self._group(batch)
+        ids = list(waiters)
+        try:
+            results = await self.fetch_batch(ids)
+        except Exception as e:
+            if self.fetch_one is None or len(ids) == 1 or not _batch_rejected(e):
+                for futs in waiters.values():
+                    _set_exception(futs, e)
+                return
+
+            singles = await asyncio.gather(
+                *(self.fetch_one(item_id) for item_id in ids), return_exceptions=True
+            )
+            for futs, single in zip(waiters.values(), singles):
+                if isinstance(single, BaseException):
+                    _set_exception(futs, single)
+                else:
+                    _set_result(futs, single)
+            return
+
+        self._resolve(waiters, results)
+
+    async def aclose(self) -> None:
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
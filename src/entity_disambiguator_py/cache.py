@@ -0,0 +1,572 @@
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Hashable, Optional, Protocol, TypeVar
+
+from pydantic import BaseModel
+
+from entity_disambiguator_py import model as _model_module
+from entity_disambiguator_py.model import CanonicalSynonym, SynonymSet
+
+if TYPE_CHECKING:
+    import sqlite3
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T", bound=BaseModel)
+
+# synset id of the fallback returned when a CUI has no synonyms
+NO_SYNSET = "-1"
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ResponseCache:
+    """Thread-safe LRU of validated response models keyed by RPC method and params.
+
+    ``ttl`` is the default lifetime in seconds for every method (``None`` never
+    expires) and ``method_ttls`` overrides it per RPC method name.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        ttl: Optional[float] = None,
+        method_ttls: Optional[dict[str, Optional[float]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.method_ttls = method_ttls or {}
+        self.clock = clock
+
+        self._entries: OrderedDict[tuple[str, Hashable], tuple[Optional[float], BaseModel]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def _ttl_for(self, method: str) -> Optional[float]:
+        return self.method_ttls.get(method, self.ttl)
+
+    def get(self, method: str, key: Hashable) -> Optional[BaseModel]:
+        k = (method, key)
+        with self._lock:
+            entry = self._entries.get(k)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            expires, value = entry
+            if expires is not None and expires <= self.clock():
+                del self._entries[k]
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(k)
+            self._hits += 1
+            return value
+
+    def put(self, method: str, key: Hashable, value: T) -> T:
+        ttl = self._ttl_for(method)
+        if ttl is not None and ttl <= 0:
+            return value
+
+        expires = None if ttl is None else self.clock() + ttl
+        k = (method, key)
+        with self._lock:
+            self._entries[k] = (expires, value)
+            self._entries.move_to_end(k)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+        return value
+
+    def invalidate(self, method: str, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop((method, key), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+                size=len(self._entries),
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SynonymCache:
+    """CUI to canonical synonym and synset to members, shared by bulk canonicalization.
+
+    A synonym set response fills the canonical synonym of every member at once.
+    CUIs without synonyms are cached as ``NO_SYNSET`` negatives, which expire after
+    ``negative_ttl`` seconds when it is set.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 100_000,
+        negative_ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+
+        self.maxsize = maxsize
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+
+        self._canonical: OrderedDict[str, tuple[Optional[float], CanonicalSynonym]] = OrderedDict()
+        self._synsets: OrderedDict[str, list[str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def canonical(self, cui: str) -> Optional[CanonicalSynonym]:
+        with self._lock:
+            entry = self._canonical.get(cui)
+            if entry is None:
+                return None
+
+            expires, synonym = entry
+            if expires is not None and expires <= self.clock():
+                del self._canonical[cui]
+                return None
+            self._canonical.move_to_end(cui)
+            return synonym
+
+    def put_canonical(self, synonym: CanonicalSynonym) -> None:
+        expires = None
+        if synonym.synset_id == NO_SYNSET and self.negative_ttl is not None:
+            expires = self.clock() + self.negative_ttl
+        with self._lock:
+            self._store(synonym.cui_id, expires, synonym)
+
+    def synset(self, ssid: str) -> Optional[list[str]]:
+        with self._lock:
+            members = self._synsets.get(ssid)
+            if members is not None:
+                self._synsets.move_to_end(ssid)
+            return members
+
+    def put_synset(self, synset: SynonymSet, canonical_cui: str) -> None:
+        with self._lock:
+            self._synsets[synset.synset_id] = synset.subgraph
+            self._synsets.move_to_end(synset.synset_id)
+            while len(self._synsets) > self.maxsize:
+                self._synsets.popitem(last=False)
+
+            for cui in synset.subgraph:
+                synonym = CanonicalSynonym(
+                    cui_id=cui, canonical_cui=canonical_cui, synset_id=synset.synset_id
+                )
+                self._store(cui, None, synonym)
+
+    def lookup(self, cids: list[str]) -> tuple[dict[str, CanonicalSynonym], list[str]]:
+        """Split ``cids`` into cached canonical synonyms and the CUIs still to fetch."""
+        known: dict[str, CanonicalSynonym] = {}
+        pending: list[str] = []
+        for cid in cids:
+            synonym = self.canonical(cid)
+            if synonym is None:
+                pending.append(cid)
+            else:
+                known[cid] = synonym
+        return known, pending
+
+    def unexpanded(self, synonyms: list[CanonicalSynonym]) -> dict[str, str]:
+        """Synset id to canonical CUI of the synsets whose members are not cached yet."""
+        return {
+            s.synset_id: s.canonical_cui
+            for s in synonyms
+            if s.synset_id != NO_SYNSET and self.synset(s.synset_id) is None
+        }
+
+    def _store(self, cui: str, expires: Optional[float], synonym: CanonicalSynonym) -> None:
+        self._canonical[cui] = (expires, synonym)
+        self._canonical.move_to_end(cui)
+        while len(self._canonical) > self.maxsize:
+            self._canonical.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._canonical.clear()
+            self._synsets.clear()
+
+    def __len__(self) -> int:
+        return len(self._canonical)
+
+
+# bump when the layout of the entries table or the value encoding changes
+DISK_SCHEMA_VERSION = "2"
+DEFAULT_DISK_MAX_BYTES = 1 << 30
+# read times are only written back this often, so hits rarely need the write lock
+_TOUCH_INTERVAL = 60.0
+
+_DISK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS entries (
+    method TEXT NOT NULL,
+    key TEXT NOT NULL,
+    model TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (method, key)
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+"""
+
+# the only classes a value in the file may be read back as; the file is shared,
+# so the name stored with a value must never pick arbitrary code to import
+_DISK_MODELS: dict[str, type[BaseModel]] = {
+    name: cls
+    for name, cls in vars(_model_module).items()
+    if isinstance(cls, type)
+    and issubclass(cls, BaseModel)
+    and cls.__module__ == _model_module.__name__
+}
+
+
+class Cache(Protocol):
+    """What the clients need from ``cache``."""
+
+    def get(self, method: str, key: Hashable) -> Optional[BaseModel]: ...
+
+    def put(self, method: str, key: Hashable, value: T) -> T: ...
+
+    def invalidate(self, method: str, key: Hashable) -> None: ...
+
+    def clear(self) -> None: ...
+
+    def stats(self) -> CacheStats: ...
+
+
+class DiskCache:
+    """Response cache in a SQLite file shared by every process on the host.
+
+    Values are stored as zlib compressed JSON and read back into their response
+    model, looked up by name among the classes of ``entity_disambiguator_py.model``;
+    an entry that cannot be read back is dropped and counts as a miss. The database
+    runs in WAL mode so readers never block the one writer, and each thread opens
+    its own connection. Once the file holds more than
+    ``max_bytes`` of values the least recently read entries are dropped. Opening
+    the file with a different ``dataset_version``, e.g. a new UMLS release, or a
+    different schema version empties it, and ``clear()`` empties it for every
+    process. ``ttl`` and ``method_ttls`` work as in ``ResponseCache`` but use wall
+    clock time, since it is shared between processes.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        max_bytes: int = DEFAULT_DISK_MAX_BYTES,
+        dataset_version: str = "",
+        ttl: Optional[float] = None,
+        method_ttls: Optional[dict[str, Optional[float]]] = None,
+        compress_level: int = 6,
+        busy_timeout: float = 30.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_bytes <= 0:
+            raise ValueError(f"max_bytes must be positive, got {max_bytes}")
+
+        self.path = os.fspath(path)
+        self.max_bytes = max_bytes
+        self.dataset_version = dataset_version
+        self.ttl = ttl
+        self.method_ttls = method_ttls or {}
+        self.compress_level = compress_level
+        self.busy_timeout = busy_timeout
+        self.clock = clock
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        # bytes written since the size was last checked
+        self._written = 0
+
+        self._open()
+
+    def _connection(self) -> "sqlite3.Connection":
+        # sqlite3 is only imported by clients that keep a disk cache
+        import sqlite3
+
+        conn = getattr(self._local, "conn", None)
+        # a connection must not be used across fork
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _open(self) -> None:
+        conn = self._connection()
+        conn.executescript(_DISK_SCHEMA)
+        expected = {"schema_version": DISK_SCHEMA_VERSION, "dataset_version": self.dataset_version}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            found = dict(conn.execute("SELECT name, value FROM meta"))
+            if any(found.get(name) != value for name, value in expected.items()):
+                if found:
+                    logger.info(f"emptying {self.path}, it was written for {found}")
+                conn.execute("DELETE FROM entries")
+                conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", expected.items())
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _ttl_for(self, method: str) -> Optional[float]:
+        return self.method_ttls.get(method, self.ttl)
+
+    def get(self, method: str, key: Hashable) -> Optional[BaseModel]:
+        import sqlite3
+
+        k = json.dumps(key)
+        now = self.clock()
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT model, value, expires, accessed FROM entries WHERE method = ? AND key = ?",
+                (method, k),
+            ).fetchone()
+            if row is not None and row[2] is not None and row[2] <= now:
+                conn.execute("DELETE FROM entries WHERE method = ? AND key = ?", (method, k))
+                with self._lock:
+                    self._expirations += 1
+                row = None
+            if row is not None and now - row[3] >= _TOUCH_INTERVAL:
+                conn.execute(
+                    "UPDATE entries SET accessed = ? WHERE method = ? AND key = ?", (now, method, k)
+                )
+        except sqlite3.Error as e:
+            # a busy or broken cache file only costs a request
+            logger.warning(f"disk cache read failed for {method}: {e}")
+            row = None
+
+        value = None
+        if row is not None:
+            try:
+                value = _DISK_MODELS[row[0]].model_validate_json(zlib.decompress(row[1]))
+            except (KeyError, ValueError, zlib.error) as e:
+                # written by another version of the models, or corrupt
+                logger.warning(f"dropping unreadable disk cache entry for {method}: {e}")
+                self._discard(method, k)
+
+        with self._lock:
+            if value is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+        return value
+
+    def _discard(self, method: str, k: str) -> None:
+        import sqlite3
+
+        try:
+            self._connection().execute(
+                "DELETE FROM entries WHERE method = ? AND key = ?", (method, k)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"disk cache delete failed for {method}: {e}")
+
+    def put(self, method: str, key: Hashable, value: T) -> T:
+        import sqlite3
+
+        ttl = self._ttl_for(method)
+        if ttl is not None and ttl <= 0:
+            return value
+
+        name = type(value).__name__
+        if _DISK_MODELS.get(name) is not type(value):
+            logger.debug(f"not caching {name} on disk, it is not a response model")
+            return value
+
+        now = self.clock()
+        blob = zlib.compress(value.model_dump_json().encode(), self.compress_level)
+        try:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    method,
+                    json.dumps(key),
+                    name,
+                    blob,
+                    len(blob),
+                    None if ttl is None else now + ttl,
+                    now,
+                ),
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"disk cache write failed for {method}: {e}")
+            return value
+
+        with self._lock:
+            self._written += len(blob)
+            check = self._written >= self.max_bytes // 100
+            if check:
+                self._written = 0
+        if check:
+            self._evict()
+        return value
+
+    def _evict(self) -> None:
+        import sqlite3
+
+        conn = self._connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+            excess = total - self.max_bytes
+            evicted = 0
+            if excess > 0:
+                # free a tenth more than needed so the next few writes do not evict again
+                excess += self.max_bytes // 10
+                cutoff = None
+                for accessed, size in conn.execute(
+                    "SELECT accessed, size FROM entries ORDER BY accessed"
+                ):
+                    cutoff = accessed
+                    excess -= size
+                    if excess <= 0:
+                        break
+                evicted = conn.execute(
+                    "DELETE FROM entries WHERE accessed <= ?", (cutoff,)
+                ).rowcount
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            logger.warning(f"disk cache eviction failed: {e}")
+            return
+        with self._lock:
+            self._evictions += evicted
+
+    def invalidate(self, method: str, key: Hashable) -> None:
+        self._connection().execute(
+            "DELETE FROM entries WHERE method = ? AND key = ?", (method, json.dumps(key))
+        )
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM entries")
+
+    def size_bytes(self) -> int:
+        return (
+            self._connection().execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        )
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+                size=len(self),
+            )
+
+    def close(self) -> None:
+        """Close this thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+class TieredCache:
+    """Several caches checked fastest first, e.g. a ``ResponseCache`` before a ``DiskCache``.
+
+    A hit in a slower tier is copied into the faster ones, writes go to every tier
+    and ``clear()`` clears them all. ``stats()`` counts a hit in any tier as a hit;
+    ``tier_stats()`` has the counters of each tier.
+    """
+
+    def __init__(self, *tiers: Cache) -> None:
+        if not tiers:
+            raise ValueError("TieredCache needs at least one tier")
+        self.tiers = tiers
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, method: str, key: Hashable) -> Optional[BaseModel]:
+        for i, tier in enumerate(self.tiers):
+            value = tier.get(method, key)
+            if value is not None:
+                for faster in self.tiers[:i]:
+                    faster.put(method, key, value)
+                with self._lock:
+                    self._hits += 1
+                return value
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(self, method: str, key: Hashable, value: T) -> T:
+        for tier in self.tiers:
+            tier.put(method, key, value)
+        return value
+
+    def invalidate(self, method: str, key: Hashable) -> None:
+        for tier in self.tiers:
+            tier.invalidate(method, key)
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
+
+    def tier_stats(self) -> list[CacheStats]:
+        return [tier.stats() for tier in self.tiers]
+
+    def stats(self) -> CacheStats:
+        tiers = self.tier_stats()
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=sum(s.evictions for s in tiers),
+                expirations=sum(s.expirations for s in tiers),
+                size=max(s.size for s in tiers),
+            )
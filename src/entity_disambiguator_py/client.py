@@ -1,14 +1,53 @@
 import json
 import logging
+import unicodedata
+from time import perf_counter
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Hashable,
+    Iterable,
+    Iterator,
+    Optional,
+    TypeVar,
+)
 from urllib.parse import urljoin
 
-import boto3
-import requests
+from requests.auth import AuthBase
 from requests.exceptions import HTTPError
 from requests.models import Response
-from requests_aws4auth import AWS4Auth
 
+from entity_disambiguator_py.auth import LazySigV4Auth, get_current_credentials  # noqa: F401
+from entity_disambiguator_py.batching import (
+    DEFAULT_BATCH_CHUNK_SIZE,
+    DEFAULT_BATCH_PARALLELISM,
+    DEFAULT_COALESCE_MAX_BATCH_SIZE,
+    Coalescer,
+    CoalescerStats,
+    chunked,
+    dedupe,
+    fan_out,
+    ichunked,
+    merge_in_order,
+    pipeline,
+)
+from entity_disambiguator_py.cache import NO_SYNSET, Cache, SynonymCache, T
+from entity_disambiguator_py.compression import CompressionPolicy
+from entity_disambiguator_py.decoding import (
+    EdgeColumns,
+    check_edge_method,
+    edge_columns,
+    neighbors_response,
+    traversal_response,
+)
+from entity_disambiguator_py.interning import (
+    INTERNER,
+    InternedEdges,
+    Interner,
+    interned_edges,
+)
 from entity_disambiguator_py.model import (
+    BatchCanonicalSynonymsResponse,
     BatchGetAliasNameResponse,
     BatchGetAliasResponse,
     BatchGetConceptResponse,
@@ -27,10 +66,38 @@ from entity_disambiguator_py.model import (
     MessageResponse,
     RelationshipType,
     SynonymSetResponse,
+    UMLSAtom,
+    UMLSAtomName,
+    UMLSConcept,
 )
+from entity_disambiguator_py.streaming import (
+    DEFAULT_PAGE_SIZE,
+    STREAM_CHUNK_SIZE,
+    ConceptStream,
+    _page_payload,
+)
+from entity_disambiguator_py.transport import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_POOL_CONNECTIONS,
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_READ_TIMEOUT,
+    LambdaTransport,
+)
+
+# opt-in features are imported when they are used, not with the client
+if TYPE_CHECKING:
+    from entity_disambiguator_py.concurrency import AdaptiveLimiter
+    from entity_disambiguator_py.instrumentation import Instrumentation
+    from entity_disambiguator_py.negative import NegativeCache
+    from entity_disambiguator_py.prefetch import Prefetcher, PrefetchPolicy
+    from entity_disambiguator_py.resilience import ResiliencePolicy
+    from entity_disambiguator_py.rpc_batch import RpcBatch
+    from entity_disambiguator_py.traversal import GraphWalker
 
 logger = logging.getLogger(__name__)
 
+R = TypeVar("R")
+
 
 class NoSynonymsFound(Exception):
     def __init__(self, cid: str):
@@ -38,46 +105,227 @@ class NoSynonymsFound(Exception):
         super().__init__(self.message)
 
 
-def get_current_credentials():
-    sess = boto3.Session()
-    creds = sess.get_credentials()
+def fold_name(name: str) -> str:
+    """An alias name as the service matches it: NFC, case folded, whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFC", name).casefold().split())
+
+
+def _check_sort_prefix(sort_prefix: str) -> None:
+    try:
+        _ = RelationshipType[sort_prefix]
+    except KeyError:
+        raise HTTPError(f"Invalid sort prefix {sort_prefix}")
+
+
+def _graph_payload(call_id: int, method: str, umls_id: str, sort_prefix: str) -> dict:
+    return {
+        "id": call_id,
+        "method": method,
+        "params": {"query": {"start_node": umls_id, "sort_prefix": sort_prefix}},
+    }
+
 
-    if creds is None:
-        raise PermissionError("No credentials found, make sure you're logged in with AWS SSO")
-    return creds
+def _no_synonyms(cid: str) -> CanonicalSynonym:
+    return CanonicalSynonym(cui_id=cid, canonical_cui=cid, synset_id=NO_SYNSET)
 
 
 class EntityDisambiguatorLambdaClient:
-    def __init__(self, lambda_url: str, region: str, call_id: int = 1) -> None:
-        self.headers = {"Accept": "application/xml", "Content-Type": "application/json"}
+    def __init__(
+        self,
+        lambda_url: str,
+        region: str,
+        call_id: int = 1,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        cache: Optional[Cache] = None,
+        batch_chunk_size: int = DEFAULT_BATCH_CHUNK_SIZE,
+        batch_parallelism: int = DEFAULT_BATCH_PARALLELISM,
+        coalesce_window: Optional[float] = None,
+        coalesce_max_batch_size: int = DEFAULT_COALESCE_MAX_BATCH_SIZE,
+        instrumentation: Optional["Instrumentation"] = None,
+        resilience: Optional["ResiliencePolicy"] = None,
+        synonym_cache: Optional[SynonymCache] = None,
+        negative_cache: Optional["NegativeCache"] = None,
+        limiter: Optional["AdaptiveLimiter"] = None,
+        prefetch: Optional["PrefetchPolicy"] = None,
+        compression: Optional[CompressionPolicy] = None,
+        auth: Optional[AuthBase] = None,
+        interner: Optional[Interner] = None,
+    ) -> None:
+        self.headers = {"Accept": "application/json", "Content-Type": "application/json"}
         self.url = lambda_url
         self.rpc_url = urljoin(self.url, "/api/rpc")
         self.region = region
         self.call_id = call_id
+        self.cache = cache
+        self.batch_chunk_size = batch_chunk_size
+        self.batch_parallelism = batch_parallelism
+        self.instrumentation = instrumentation
+        self.resilience = resilience
+        self.synonym_cache = synonym_cache if synonym_cache is not None else SynonymCache()
+        self.negative_cache = negative_cache
+        self.limiter = limiter
+        self.compression = compression if compression is not None else CompressionPolicy()
+        self.interner = interner if interner is not None else INTERNER
+        self._walker: Optional["GraphWalker"] = None
+
+        self._concept_coalescer: Optional[Coalescer[UMLSConcept]] = None
+        self._alias_coalescer: Optional[Coalescer[UMLSAtom]] = None
+        if coalesce_window is not None:
+            self._concept_coalescer = Coalescer(
+                "batch_get_concept",
+                self._get_batch_concept,
+                key=lambda c: c.concept_id,
+                fetch_one=lambda cid: self._get_concept(cid).result,
+                window=coalesce_window,
+                max_batch_size=coalesce_max_batch_size,
+                max_in_flight=batch_parallelism,
+            )
+            self._alias_coalescer = Coalescer(
+                "batch_get_alias_id",
+                self._get_batch_alias_id,
+                key=lambda a: a.atom_id,
+                fetch_one=lambda aid: self._get_alias_id(aid).result,
+                window=coalesce_window,
+                max_batch_size=coalesce_max_batch_size,
+                max_in_flight=batch_parallelism,
+            )
 
-        creds = get_current_credentials()
-        self.auth = AWS4Auth(
-            creds.access_key,
-            creds.secret_key,
-            region,
-            "lambda",
-            session_token=creds.token,
+        # credentials are resolved on the first signed request, not here
+        self.auth = auth if auth is not None else LazySigV4Auth(region)
+        self.transport = LambdaTransport(
+            self.auth,
+            self.headers,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            compression=self.compression,
         )
 
+        self.prefetcher: Optional["Prefetcher"] = None
+        if prefetch is not None:
+            from entity_disambiguator_py.prefetch import Prefetcher
+
+            self.prefetcher = Prefetcher(self, prefetch)
+
+    def close(self) -> None:
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+        for coalescer in (self._concept_coalescer, self._alias_coalescer):
+            if coalescer is not None:
+                coalescer.close()
+        self.transport.close()
+
+    def __enter__(self) -> "EntityDisambiguatorLambdaClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def walker(self) -> "GraphWalker":
+        if self._walker is None:
+            from entity_disambiguator_py.traversal import GraphWalker
+
+            self._walker = GraphWalker(self)
+        return self._walker
+
+    def batch(self, parallelism: Optional[int] = None) -> "RpcBatch":
+        from entity_disambiguator_py.rpc_batch import RpcBatch
+
+        return RpcBatch(self, parallelism=parallelism)
+
+    def coalescer_stats(self) -> dict[str, CoalescerStats]:
+        stats = {}
+        if self._concept_coalescer is not None:
+            stats["get_concept"] = self._concept_coalescer.stats()
+        if self._alias_coalescer is not None:
+            stats["get_alias_id"] = self._alias_coalescer.stats()
+        return stats
+
+    def _cache_get(self, method: str, key: Hashable):
+        if self.cache is None:
+            return None
+        cached = self.cache.get(method, key)
+        if self.prefetcher is not None:
+            self.prefetcher.record_lookup(method, key, cached is not None)
+        return cached
+
+    def _cache_put(self, method: str, key: Hashable, value: T) -> T:
+        if self.cache is None:
+            return value
+        return self.cache.put(method, key, value)
+
+    def _prefetch_concepts(self, concept_ids: Iterable[str]) -> None:
+        if self.prefetcher is not None:
+            self.prefetcher.schedule(concept_ids)
+
+    def _known_absent(self, method: str, key: str) -> bool:
+        return self.negative_cache is not None and self.negative_cache.is_absent(method, key)
+
+    def _remember_absent(self, method: str, key: str) -> None:
+        if self.negative_cache is not None:
+            self.negative_cache.add(method, key)
+
     def _get_request(self, url: str) -> Response:
-        return requests.get(
-            url,
-            auth=self.auth,
-            headers=self.headers,
-        )
+        return self.transport.get(url)
+
+    def _post_request(self, url: str, payload: dict | list, stream: bool = False) -> Response:
+        body = json.dumps(payload)
+        if self.instrumentation is None and self.resilience is None:
+            return self._send_post(url, body, payload, stream)
+
+        start = perf_counter()
+        if self.resilience is None:
+            r, retries = self._send_post(url, body, payload, stream), 0
+        else:
+            r, retries = self.resilience.call(
+                payload, lambda: self._send_post(url, body, payload, stream)
+            )
 
-    def _post_request(self, url: str, payload: dict) -> Response:
-        return requests.post(
-            url,
-            auth=self.auth,
-            headers=self.headers,
-            data=json.dumps(payload),
-        )
+        if self.instrumentation is not None:
+            from entity_disambiguator_py.instrumentation import RpcEvent, rpc_method
+
+            # requests measures elapsed until the response headers were parsed
+            elapsed = getattr(r, "elapsed", None)
+            event = RpcEvent(
+                method=rpc_method(payload),
+                status_code=r.status_code,
+                request_bytes=len(body),
+                # a streamed body is read later by the caller, its size is the announced one
+                response_bytes=int(r.headers.get("Content-Length", 0))
+                if stream
+                else len(r.content),
+                ttfb=elapsed.total_seconds() if elapsed is not None else None,
+                network_time=perf_counter() - start,
+                retries=retries,
+                wire=getattr(r, "wire", None),
+            )
+            self.instrumentation.record_response(event)
+            if stream:
+                self.instrumentation.flush()
+        return r
+
+    def _send_post(
+        self, url: str, body: str, payload: dict | list, stream: bool = False
+    ) -> Response:
+        if stream:
+            send = lambda: self.transport.post(url, body, stream=True)
+        else:
+            send = lambda: self.transport.post(url, body)
+        if self.limiter is None:
+            return send()
+        from entity_disambiguator_py.concurrency import latency_class
+
+        return self.limiter.call(latency_class(payload), send)
+
+    def _decode(self, parse: Callable[[bytes], R], raw: bytes) -> R:
+        if self.instrumentation is None:
+            return parse(raw)
+        return self.instrumentation.decode(parse, raw)
 
     def say_hello(self) -> MessageResponse:
         url = self.url + "/"
@@ -87,246 +335,463 @@ class EntityDisambiguatorLambdaClient:
 
         return MessageResponse(message=r.content.decode())
 
-    def rpc_call(self, payload: dict) -> Response:
+    def rpc_call(self, payload: dict | list) -> Response:
+        r = self._rpc(payload)
+        if self.instrumentation is not None:
+            # the caller decodes the response, if at all, outside the client
+            self.instrumentation.flush()
+        return r
+
+    def _rpc(self, payload: dict | list) -> Response:
+        """An RPC whose response the client decodes with ``_decode``."""
         return self._post_request(self.rpc_url, payload)
 
     def get_alias_id(self, alias_id: str) -> GetAliasResponse:
+        cached = self._cache_get("get_alias_id", alias_id)
+        if cached is not None:
+            return cached
+
+        if self._alias_coalescer is not None:
+            item = self._alias_coalescer.get(alias_id)
+            resp = GetAliasResponse(id=self.call_id, result=item)
+        else:
+            resp = self._get_alias_id(alias_id)
+        self._prefetch_concepts([resp.result.concept_id])
+        return self._cache_put("get_alias_id", alias_id, resp)
+
+    def _get_alias_id(self, alias_id: str) -> GetAliasResponse:
         payload = {"id": self.call_id, "method": "get_alias_id", "params": {"id": alias_id}}
-        r = self.rpc_call(payload)
+        r = self._rpc(payload)
         if r.status_code != 200:
             raise HTTPError(f"status: {r.status_code} error in get_alias_id {r.content}")
 
-        return GetAliasResponse.model_validate_json(r.content)
-
-    def get_batch_alias_id(self, alias_ids: list[str]) -> BatchGetAliasResponse:
-        payload = {"id": self.call_id, "method": "batch_get_alias_id", "params": {"ids": alias_ids}}
-        r = self.rpc_call(payload)
+        return self._decode(GetAliasResponse.model_validate_json, r.content)
+
+    def get_batch_alias_id(
+        self,
+        alias_ids: list[str],
+        chunk_size: Optional[int] = None,
+        parallelism: Optional[int] = None,
+    ) -> BatchGetAliasResponse:
+        ids = dedupe(alias_ids)
+        chunks = chunked(ids, chunk_size or self.batch_chunk_size)
+        parallelism = parallelism or self.batch_parallelism
+        results = fan_out(self._get_batch_alias_id, chunks, parallelism)
+        result, missing = merge_in_order(chunks, results, lambda x: x.atom_id)
+
+        return BatchGetAliasResponse(id=self.call_id, result=result, missing=missing)
+
+    def _get_batch_alias_id(self, ids: list[str]) -> list[UMLSAtom]:
+        payload = {"id": self.call_id, "method": "batch_get_alias_id", "params": {"ids": ids}}
+        r = self._rpc(payload)
         if r.status_code != 200:
-            raise HTTPError(f"status: {r.status_code} error in batch_get_alias_id {r.content}")
+            raise HTTPError(
+                f"status: {r.status_code} error in batch_get_alias_id {r.content}", response=r
+            )
 
-        return BatchGetAliasResponse.model_validate_json(r.content)
+        return self._decode(BatchGetAliasResponse.model_validate_json, r.content).result
 
     def get_alias_name(self, name: str) -> GetAliasNameResponse:
+        cached = self._cache_get("get_alias_name", name)
+        if cached is not None:
+            return cached
+
         payload = {"id": self.call_id, "method": "get_alias_name", "params": {"id": name}}
-        r = self.rpc_call(payload)
+        r = self._rpc(payload)
         if r.status_code != 200:
             raise HTTPError(f"status: {r.status_code} error in get_alias_name {r.content}")
 
-        return GetAliasNameResponse.model_validate_json(r.content)
-
-    def get_batch_alias_name(self, names: list[str]) -> BatchGetAliasNameResponse:
-        payload = {"id": self.call_id, "method": "batch_get_alias_name", "params": {"ids": names}}
-        r = self.rpc_call(payload)
+        resp = self._decode(GetAliasNameResponse.model_validate_json, r.content)
+        return self._cache_put("get_alias_name", name, resp)
+
+    def get_batch_alias_name(
+        self,
+        names: list[str],
+        chunk_size: Optional[int] = None,
+        parallelism: Optional[int] = None,
+    ) -> BatchGetAliasNameResponse:
+        ids = dedupe(names)
+        chunks = chunked(ids, chunk_size or self.batch_chunk_size)
+        parallelism = parallelism or self.batch_parallelism
+        results = fan_out(self._get_batch_alias_name, chunks, parallelism)
+        result, missing = merge_in_order(chunks, results, lambda x: x.name, fold_name)
+        self._prefetch_concepts(c for n in result for c in n.concept_ids)
+
+        return BatchGetAliasNameResponse(id=self.call_id, result=result, missing=missing)
+
+    def _get_batch_alias_name(self, ids: list[str]) -> list[UMLSAtomName]:
+        payload = {"id": self.call_id, "method": "batch_get_alias_name", "params": {"ids": ids}}
+        r = self._rpc(payload)
         if r.status_code != 200:
             raise HTTPError(f"status: {r.status_code} error in batch_get_alias_name {r.content}")
 
-        return BatchGetAliasNameResponse.model_validate_json(r.content)
+        return self._decode(BatchGetAliasNameResponse.model_validate_json, r.content).result
 
     def get_type_definition(self, type_id: str) -> GetTypeDefinitionResponse:
+        cached = self._cache_get("get_type_definition", type_id)
+        if cached is not None:
+            return cached
+
         payload = {"id": self.call_id, "method": "get_type_definition", "params": {"id": type_id}}
-        r = self.rpc_call(payload)
+        r = self._rpc(payload)
         if r.status_code != 200:
             raise HTTPError(f"status: {r.status_code} error in get_type_definition {r.content}")
-        return GetTypeDefinitionResponse.model_validate_json(r.content)
+        resp = self._decode(GetTypeDefinitionResponse.model_validate_json, r.content)
+        return self._cache_put("get_type_definition", type_id, resp)
 
     def get_aliases(self, name: str) -> GetAliasesResponse:
+        cached = self._cache_get("get_aliases", name)
+        if cached is not None:
+            return cached
+
+        if self._known_absent("get_aliases", name):
+            return GetAliasesResponse(id=self.call_id, result=[])
+
         payload = {"id": self.call_id, "method": "get_aliases", "params": {"id": name}}
-        r = self.rpc_call(payload)
+        r = self._rpc(payload)
         if r.status_code == 404:
-            return GetAliasesResponse(id=self.call_id, result=[])
+            self._remember_absent("get_aliases", name)
+            resp = GetAliasesResponse(id=self.call_id, result=[])
+            return self._cache_put("get_aliases", name, resp)
 
         if r.status_code != 200:
             raise HTTPError(f"status: {r.status_code} error in get_aliases {r.content}")
 
-        return GetAliasesResponse.model_validate_json(r.content)
+        resp = self._decode(GetAliasesResponse.model_validate_json, r.content)
+        self._prefetch_concepts(a.concept_id for a in resp.result)
+        return self._cache_put("get_aliases", name, resp)
 
     def list_concepts(self) -> ListConceptResponse:
         payload = {"id": self.call_id, "method": "list_concepts"}
-        r = self.rpc_call(payload)
+        r = self._rpc(payload)
         if r.status_code != 200:
-            raise HTTPError(f"status: {r.status_code} error in list_concept {r.content}")
-        return ListConceptResponse.model_validate_json(r.content)
+            raise HTTPError(f"status: {r.status_code} error in list_concepts {r.content}")
+        return self._decode(ListConceptResponse.model_validate_json, r.content)
+
+    def iter_concepts(
+        self, page_size: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None
+    ) -> ConceptStream:
+        """Stream concept ids page by page without holding a whole page in memory.
+
+        Keep the returned stream's ``cursor`` to resume an interrupted listing.
+        """
+        return ConceptStream(lambda c: self._concept_page(page_size, c), cursor)
+
+    def _concept_page(self, page_size: int, cursor: Optional[str]) -> Iterator[bytes]:
+        payload = _page_payload(self.call_id, page_size, cursor)
+        r = self._post_request(self.rpc_url, payload, stream=True)
+        try:
+            if r.status_code != 200:
+                raise HTTPError(f"status: {r.status_code} error in list_concepts {r.content}")
+            yield from r.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+        finally:
+            r.close()
+
+    def iter_concepts_with_details(
+        self,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        parallelism: Optional[int] = None,
+    ) -> Iterator[UMLSConcept]:
+        """Stream concepts, fetching details with ``batch_get_concept`` while listing."""
+        ids = self.iter_concepts(page_size, cursor)
+        chunks = ichunked(ids, chunk_size or self.batch_chunk_size)
+        parallelism = parallelism or self.batch_parallelism
+        for concepts in pipeline(self._get_batch_concept, chunks, parallelism):
+            yield from concepts
 
     def get_concept(self, concept_id: str) -> GetConceptResponse:
+        cached = self._cache_get("get_concept", concept_id)
+        if cached is not None:
+            return cached
+
+        if self._concept_coalescer is not None:
+            item = self._concept_coalescer.get(concept_id)
+            resp = GetConceptResponse(id=self.call_id, result=item)
+        else:
+            resp = self._get_concept(concept_id)
+        return self._cache_put("get_concept", concept_id, resp)
+
+    def _get_concept(self, concept_id: str) -> GetConceptResponse:
         payload = {"id": self.call_id, "method": "get_concept", "params": {"id": concept_id}}
-        r = self.rpc_call(payload)
+        r = self._rpc(payload)
         if r.status_code != 200:
             raise HTTPError(f"status: {r.status_code} error in get_concept {r.content}")
 
-        return GetConceptResponse.model_validate_json(r.content)
+        return self._decode(GetConceptResponse.model_validate_json, r.content)
+
+    def get_batch_concept(
+        self,
+        concept_ids: list[str],
+        chunk_size: Optional[int] = None,
+        parallelism: Optional[int] = None,
+    ) -> BatchGetConceptResponse:
+        ids = dedupe(concept_ids)
+        chunks = chunked(ids, chunk_size or self.batch_chunk_size)
+        parallelism = parallelism or self.batch_parallelism
+        results = fan_out(self._get_batch_concept, chunks, parallelism)
+        result, missing = merge_in_order(chunks, results, lambda x: x.concept_id)
 
-    def get_batch_concept(self, concept_ids: list[str]) -> BatchGetConceptResponse:
+        return BatchGetConceptResponse(id=self.call_id, result=result, missing=missing)
+
+    def _get_batch_concept(self, ids: list[str]) -> list[UMLSConcept]:
         payload = {
             "id": self.call_id,
             "method": "batch_get_concept",
-            "params": {"ids": concept_ids},
+            "params": {"ids": ids},
         }
-        r = self.rpc_call(payload)
+        r = self._rpc(payload)
         if r.status_code != 200:
-            raise HTTPError(f"status: {r.status_code} error in batch_get_concept {r.content}")
-        return BatchGetConceptResponse.model_validate_json(r.content)
+            raise HTTPError(
+                f"status: {r.status_code} error in batch_get_concept {r.content}", response=r
+            )
+        return self._decode(BatchGetConceptResponse.model_validate_json, r.content).result
 
     def get_concept_info(self, concept_id: str) -> GetConceptInfoResponse:
+        cached = self._cache_get("get_concept_info", concept_id)
+        if cached is not None:
+            return cached
+
         payload = {
             "id": self.call_id,
             "method": "get_concept_info",
             "params": {"id": concept_id},
         }
-        r = self.rpc_call(payload)
+        r = self._rpc(payload)
         if r.status_code != 200:
-            raise HTTPError(f"status: {r.status_code} error in get_concept {r.content}")
-
-        return GetConceptInfoResponse.model_validate_json(r.content)
-
-    def get_ancestors(self, umls_id: str, sort_prefix: str) -> GraphTraversalResponse:
-        try:
-            _ = RelationshipType[sort_prefix]
-        except KeyError:
-            raise HTTPError(f"Invalid sort prefix {sort_prefix}")
-
-        payload = {
-            "id": self.call_id,
-            "method": "get_ancestors",
-            "params": {"query": {"start_node": umls_id, "sort_prefix": sort_prefix}},
-        }
-        r = self.rpc_call(payload)
+            raise HTTPError(f"status: {r.status_code} error in get_concept_info {r.content}")
+
+        resp = self._decode(GetConceptInfoResponse.model_validate_json, r.content)
+        return self._cache_put("get_concept_info", concept_id, resp)
+
+    def get_ancestors(
+        self, umls_id: str, sort_prefix: str, depth_limit: Optional[int] = None
+    ) -> GraphTraversalResponse:
+        _check_sort_prefix(sort_prefix)
+        if depth_limit is not None:
+            return self.walker.get_ancestors(umls_id, sort_prefix, depth_limit)
+        payload = _graph_payload(self.call_id, "get_ancestors", umls_id, sort_prefix)
+        r = self._rpc(payload)
         if r.status_code != 200:
-            raise HTTPError(f"status: {r.status_code} error in get_children {r.content}")
-
-        content = json.loads(r.content)
-        content = {"id": content["id"], "edges": content["result"]["edges"]}
-
-        return GraphTraversalResponse.model_validate(content)
-
-    def get_descendants(self, umls_id: str, sort_prefix: str) -> GraphTraversalResponse:
-        try:
-            _ = RelationshipType[sort_prefix]
-        except KeyError:
-            raise HTTPError(f"Invalid sort prefix {sort_prefix}")
-
-        payload = {
-            "id": self.call_id,
-            "method": "get_descendants",
-            "params": {"query": {"start_node": umls_id, "sort_prefix": sort_prefix}},
-        }
-        r = self.rpc_call(payload)
+            raise HTTPError(f"status: {r.status_code} error in get_ancestors {r.content}")
+
+        return self._decode(traversal_response, r.content)
+
+    def get_descendants(
+        self, umls_id: str, sort_prefix: str, depth_limit: Optional[int] = None
+    ) -> GraphTraversalResponse:
+        _check_sort_prefix(sort_prefix)
+        if depth_limit is not None:
+            return self.walker.get_descendants(umls_id, sort_prefix, depth_limit)
+        payload = _graph_payload(self.call_id, "get_descendants", umls_id, sort_prefix)
+        r = self._rpc(payload)
         if r.status_code != 200:
-            raise HTTPError(f"status: {r.status_code} error in get_children {r.content}")
-
-        content = json.loads(r.content)
-        content = {"id": content["id"], "edges": content["result"]["edges"]}
+            raise HTTPError(f"status: {r.status_code} error in get_descendants {r.content}")
 
-        return GraphTraversalResponse.model_validate(content)
+        return self._decode(traversal_response, r.content)
 
     def get_parents(self, umls_id: str, sort_prefix: str) -> GetNeighborsResponse:
-        try:
-            _ = RelationshipType[sort_prefix]
-        except KeyError:
-            raise HTTPError(f"Invalid sort prefix {sort_prefix}")
+        cached = self._cache_get("get_parents", (umls_id, sort_prefix))
+        if cached is not None:
+            return cached
 
-        payload = {
-            "id": self.call_id,
-            "method": "get_parents",
-            "params": {"query": {"start_node": umls_id, "sort_prefix": sort_prefix}},
-        }
-        r = self.rpc_call(payload)
+        _check_sort_prefix(sort_prefix)
+        payload = _graph_payload(self.call_id, "get_parents", umls_id, sort_prefix)
+        r = self._rpc(payload)
         if r.status_code != 200:
-            raise HTTPError(f"status: {r.status_code} error in get_parent {r.content}")
+            raise HTTPError(f"status: {r.status_code} error in get_parents {r.content}")
 
-        content = json.loads(r.content)
-        content = {"id": content["id"], "edges": content["result"]}
-
-        return GetNeighborsResponse.model_validate(content)
+        resp = self._decode(neighbors_response, r.content)
+        return self._cache_put("get_parents", (umls_id, sort_prefix), resp)
 
     def get_children(self, umls_id: str, sort_prefix: str) -> GetNeighborsResponse:
-        try:
-            _ = RelationshipType[sort_prefix]
-        except KeyError:
-            raise HTTPError(f"Invalid sort prefix {sort_prefix}")
+        cached = self._cache_get("get_children", (umls_id, sort_prefix))
+        if cached is not None:
+            return cached
 
-        payload = {
-            "id": self.call_id,
-            "method": "get_children",
-            "params": {"query": {"start_node": umls_id, "sort_prefix": sort_prefix}},
-        }
-        r = self.rpc_call(payload)
+        _check_sort_prefix(sort_prefix)
+        payload = _graph_payload(self.call_id, "get_children", umls_id, sort_prefix)
+        r = self._rpc(payload)
         if r.status_code != 200:
             raise HTTPError(f"status: {r.status_code} error in get_children {r.content}")
 
-        content = json.loads(r.content)
-        content = {"id": content["id"], "edges": content["result"]}
-
-        return GetNeighborsResponse.model_validate(content)
+        resp = self._decode(neighbors_response, r.content)
+        return self._cache_put("get_children", (umls_id, sort_prefix), resp)
 
     def get_neighbors(self, umls_id: str, sort_prefix: str) -> GetNeighborsResponse:
-        payload = {
-            "id": self.call_id,
-            "method": "get_neighbors",
-            "params": {"query": {"start_node": umls_id, "sort_prefix": sort_prefix}},
-        }
-        r = self.rpc_call(payload)
-        if r.status_code != 200:
-            raise HTTPError(f"status: {r.status_code} error in get_children {r.content}")
-
-        content = json.loads(r.content)
-        return GetNeighborsResponse.model_validate(content)
-
-    def get_subgraph(self, umls_id: str, sort_prefix: str) -> GraphTraversalResponse:
-        try:
-            _ = RelationshipType[sort_prefix]
-        except KeyError:
-            raise HTTPError(f"Invalid sort prefix {sort_prefix}")
+        cached = self._cache_get("get_neighbors", (umls_id, sort_prefix))
+        if cached is not None:
+            return cached
 
-        payload = {
-            "id": self.call_id,
-            "method": "get_subgraph",
-            "params": {"query": {"start_node": umls_id, "sort_prefix": sort_prefix}},
-        }
-        r = self.rpc_call(payload)
+        payload = _graph_payload(self.call_id, "get_neighbors", umls_id, sort_prefix)
+        r = self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in get_neighbors {r.content}")
+
+        resp = self._decode(neighbors_response, r.content)
+        return self._cache_put("get_neighbors", (umls_id, sort_prefix), resp)
+
+    def get_subgraph(
+        self, umls_id: str, sort_prefix: str, depth_limit: Optional[int] = None
+    ) -> GraphTraversalResponse:
+        _check_sort_prefix(sort_prefix)
+        if depth_limit is not None:
+            return self.walker.get_subgraph(umls_id, sort_prefix, depth_limit)
+        payload = _graph_payload(self.call_id, "get_subgraph", umls_id, sort_prefix)
+        r = self._rpc(payload)
         if r.status_code != 200:
             raise HTTPError(f"status: {r.status_code} error in get_subgraph {r.content}")
 
-        content = json.loads(r.content)
-        content = {"id": content["id"], "edges": content["result"]["edges"]}
+        return self._decode(traversal_response, r.content)
 
-        return GraphTraversalResponse.model_validate(content)
+    def get_edge_columns(self, method: str, umls_id: str, sort_prefix: str) -> EdgeColumns:
+        """Edges of any graph method as parent/child columns, skipping the models."""
+        check_edge_method(method)
+        if method != "get_neighbors":
+            _check_sort_prefix(sort_prefix)
+        payload = _graph_payload(self.call_id, method, umls_id, sort_prefix)
+        r = self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in {method} {r.content}")
+
+        return self._decode(lambda raw: edge_columns(method, raw), r.content)
+
+    def get_interned_edges(
+        self, method: str, umls_id: str, sort_prefix: str, interner: Optional[Interner] = None
+    ) -> InternedEdges:
+        """Like ``get_edge_columns`` with node ids interned to int32 codes, see ``Interner``."""
+        check_edge_method(method)
+        if method != "get_neighbors":
+            _check_sort_prefix(sort_prefix)
+        payload = _graph_payload(self.call_id, method, umls_id, sort_prefix)
+        r = self._rpc(payload)
+        if r.status_code != 200:
+            raise HTTPError(f"status: {r.status_code} error in {method} {r.content}")
+
+        interner = interner if interner is not None else self.interner
+        return self._decode(lambda raw: interned_edges(method, raw, interner), r.content)
 
     def get_canonical_synonym(self, cid: str) -> CanonicalSynonymsResponse:
+        cached = self._cache_get("get_canonical_synonym", cid)
+        if cached is not None:
+            return cached
+
+        if self._known_absent("get_canonical_synonym", cid):
+            return CanonicalSynonymsResponse(id=self.call_id, result=_no_synonyms(cid))
+
         payload = {
             "id": self.call_id,
             "method": "get_canonical_synonym",
             "params": {"id": cid},
         }
-        r = self.rpc_call(payload)
+        r = self._rpc(payload)
         if r.status_code == 404:
             logger.debug(f"no synonyms found for {cid}")
-            return CanonicalSynonymsResponse(
-                id=self.call_id,
-                result=CanonicalSynonym(cui_id=cid, canonical_cui=cid, synset_id="-1"),
-            )
+            self._remember_absent("get_canonical_synonym", cid)
+            resp = CanonicalSynonymsResponse(id=self.call_id, result=_no_synonyms(cid))
+            return self._cache_put("get_canonical_synonym", cid, resp)
 
         if r.status_code != 200:
-            raise HTTPError(f"status: {r.status_code} error in get_synonyms {r.content}")
+            raise HTTPError(f"status: {r.status_code} error in get_canonical_synonym {r.content}")
+
+        resp = self._decode(CanonicalSynonymsResponse.model_validate_json, r.content)
+        return self._cache_put("get_canonical_synonym", cid, resp)
 
-        content = json.loads(r.content)
-        return CanonicalSynonymsResponse.model_validate(content)
+    get_canonical_synonyms = get_canonical_synonym
 
     def get_synonym_set(self, ssid: str) -> SynonymSetResponse:
+        cached = self._cache_get("get_synonym_set", ssid)
+        if cached is not None:
+            return cached
+
         payload = {
             "id": self.call_id,
             "method": "get_synonym_subgraph",
             "params": {"id": ssid},
         }
-        r = self.rpc_call(payload)
+        r = self._rpc(payload)
         if r.status_code == 404:
             logger.debug(f"no synonyms found for {ssid}")
             raise NoSynonymsFound(ssid)
 
         if r.status_code != 200:
-            raise HTTPError(f"status: {r.status_code} error in get_synonyms {r.content}")
-
-        content = json.loads(r.content)
-        return SynonymSetResponse.model_validate(content)
+            raise HTTPError(f"status: {r.status_code} error in get_synonym_set {r.content}")
+
+        resp = self._decode(SynonymSetResponse.model_validate_json, r.content)
+        return self._cache_put("get_synonym_set", ssid, resp)
+
+    def canonicalize_many(
+        self,
+        cids: list[str],
+        chunk_size: Optional[int] = None,
+        parallelism: Optional[int] = None,
+    ) -> BatchCanonicalSynonymsResponse:
+        """Canonical synonyms of ``cids`` in order, CUIs without synonyms get synset "-1".
+
+        CUIs are looked up in ``synonym_cache`` first and the rest are sent as JSON-RPC
+        batches in waves of ``chunk_size * parallelism``. The members of every synset
+        found in a wave are fetched once, which resolves the other CUIs of that synset
+        still waiting for a later wave without asking for them. Which CUIs share a
+        synset is only known once one of them is resolved, so CUIs of one synset in the
+        same wave are each asked for. CUIs whose lookup failed are listed in ``missing``.
+        """
+        ids = dedupe(cids)
+        chunk_size = chunk_size or self.batch_chunk_size
+        parallelism = parallelism or self.batch_parallelism
+
+        known, pending = self.synonym_cache.lookup(ids)
+        if self.negative_cache is not None:
+            for cid in pending:
+                if self._known_absent("get_canonical_synonym", cid):
+                    known[cid] = _no_synonyms(cid)
+            pending = [cid for cid in pending if cid not in known]
+        wave_size = chunk_size * parallelism
+        while pending:
+            wave, pending = pending[:wave_size], pending[wave_size:]
+            results = fan_out(self._canonical_chunk, chunked(wave, chunk_size), parallelism)
+            found = [synonym for chunk in results for synonym in chunk]
+            for cid, synonym in zip(wave, found):
+                if synonym is None:
+                    continue
+                self.synonym_cache.put_canonical(synonym)
+                if synonym.synset_id == NO_SYNSET:
+                    self._remember_absent("get_canonical_synonym", cid)
+                known[cid] = synonym
+
+            synsets = self.synonym_cache.unexpanded([s for s in found if s is not None])
+            if synsets and pending:
+                chunks = chunked(list(synsets.items()), chunk_size)
+                fan_out(self._synonym_set_chunk, chunks, parallelism)
+                resolved, pending = self.synonym_cache.lookup(pending)
+                known.update(resolved)
+
+        result = [known[cid] for cid in ids if cid in known]
+        missing = [cid for cid in ids if cid not in known]
+        return BatchCanonicalSynonymsResponse(id=self.call_id, result=result, missing=missing)
+
+    def _canonical_chunk(self, cids: list[str]) -> list[Optional[CanonicalSynonym]]:
+        with self.batch(parallelism=1) as batch:
+            calls = [batch.get_canonical_synonym(cid) for cid in cids]
+        found = []
+        for cid, call in zip(cids, calls):
+            # one failed lookup leaves the others of the chunk
+            if call.error() is not None:
+                logger.debug(f"could not canonicalize {cid}: {call.error()}")
+                found.append(None)
+            else:
+                found.append(call.result().result)
+        return found
+
+    def _synonym_set_chunk(self, synsets: list[tuple[str, str]]) -> None:
+        with self.batch(parallelism=1) as batch:
+            calls = [(batch.get_synonym_set(ssid), canonical) for ssid, canonical in synsets]
+        for call, canonical in calls:
+            # the members only save later lookups, a synset that fails is fetched per CUI
+            if call.error() is not None:
+                logger.debug(f"could not expand synset: {call.error()}")
+                continue
+            self.synonym_cache.put_synset(call.result().result, canonical)
 
     def create_relationship(self, relationship: DocDBRelationship) -> None:
         relationship_dict = relationship.model_dump()
@@ -335,20 +800,28 @@ class EntityDisambiguatorLambdaClient:
             "method": "create_relationship",
             "params": {"data": relationship_dict},
         }
-        r = self.rpc_call(payload)
+        r = self._rpc(payload)
         if r.status_code != 200:
             raise HTTPError(f"status: {r.status_code} error in create relationship {r.content}")
 
-        content = json.loads(r.content)
-        logger.info(f"response {content}")
+        content = self._decode(json.loads, r.content)
+        logger.debug(f"response {content}")
 
     def reset_cache(self) -> MessageResponse:
+        if self.cache is not None:
+            self.cache.clear()
+        self.synonym_cache.clear()
+        if self.negative_cache is not None:
+            self.negative_cache.clear()
+        if self._walker is not None:
+            self._walker.clear()
+
         payload = {
             "id": self.call_id,
             "method": "reset_cache",
         }
-        r = self.rpc_call(payload)
+        r = self._rpc(payload)
         if r.status_code != 200:
             raise HTTPError(f"status: {r.status_code} error in reset cache {r.content}")
 
-        return MessageResponse(message=r.content.decode())
+        return MessageResponse(message=self._decode(bytes.decode, r.content))
@@ -0,0 +1,144 @@
+import zlib
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Callable, Optional
+
+DEFAULT_MIN_REQUEST_BYTES = 8192
+
+
+class UnsupportedEncoding(Exception):
+    def __init__(self, encoding: str):
+        self.message = f"cannot decode content encoding {encoding}"
+        super().__init__(self.message)
+
+
+@dataclass(frozen=True)
+class Codec:
+    name: str
+    compress: Callable[[bytes, int], bytes]
+    decompress: Callable[[bytes], bytes]
+    level: int
+
+
+def _gzip_compress(data: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _gzip_decompress(data: bytes) -> bytes:
+    # wbits 47 reads both gzip and zlib headers
+    return zlib.decompress(data, 47)
+
+
+def _available_codecs() -> dict[str, Codec]:
+    codecs: dict[str, Codec] = {}
+    try:
+        from compression import zstd  # Python 3.14
+
+        codecs["zstd"] = Codec("zstd", lambda d, lv: zstd.compress(d, lv), zstd.decompress, 3)
+    except ImportError:
+        try:
+            import zstandard
+
+            def zstd_decompress(data: bytes) -> bytes:
+                # streamed responses carry no content size, which decompress() needs
+                return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+            def zstd_compress(data: bytes, level: int) -> bytes:
+                return zstandard.ZstdCompressor(level=level).compress(data)
+
+            codecs["zstd"] = Codec("zstd", zstd_compress, zstd_decompress, 3)
+        except ImportError:
+            pass
+
+    try:
+        import brotli
+
+        codecs["br"] = Codec(
+            "br", lambda d, lv: brotli.compress(d, quality=lv), brotli.decompress, 4
+        )
+    except ImportError:
+        pass
+
+    codecs["gzip"] = Codec("gzip", _gzip_compress, _gzip_decompress, 6)
+    return codecs
+
+
+# in order of preference: zstd and brotli only when their packages are installed
+CODECS = _available_codecs()
+DEFAULT_ACCEPT = tuple(CODECS)
+
+
+def compress(encoding: str, data: bytes, level: Optional[int] = None) -> bytes:
+    codec = CODECS.get(encoding)
+    if codec is None:
+        raise UnsupportedEncoding(encoding)
+    return codec.compress(data, codec.level if level is None else level)
+
+
+def decompress(content_encoding: Optional[str], data: bytes) -> bytes:
+    """Undo the codings listed in a ``Content-Encoding`` header, last applied first."""
+    if not content_encoding:
+        return data
+    for coding in reversed(content_encoding.split(",")):
+        coding = coding.strip().lower()
+        if coding in ("", "identity"):
+            continue
+        codec = CODECS.get(coding)
+        if codec is None:
+            raise UnsupportedEncoding(coding)
+        data = codec.decompress(data)
+    return data
+
+
+@dataclass(frozen=True)
+class WireStats:
+    """Body sizes of one exchange as sent and received, before decompression."""
+
+    request_bytes: int
+    response_bytes: int
+    encoding: Optional[str]
+    decompress_time: float
+
+
+@dataclass(frozen=True)
+class CompressionPolicy:
+    """Content codings the client accepts and how it sends request bodies.
+
+    ``accept`` is advertised in ``Accept-Encoding`` in order of preference and the
+    response is decoded by the client. With ``request_encoding`` set, request
+    bodies of at least ``min_request_bytes`` are compressed at ``level``; only use
+    it with a server that reads ``Content-Encoding``. ``accept=()`` asks for
+    uncompressed responses.
+    """
+
+    accept: tuple[str, ...] = DEFAULT_ACCEPT
+    request_encoding: Optional[str] = None
+    min_request_bytes: int = DEFAULT_MIN_REQUEST_BYTES
+    level: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        unknown = [e for e in (*self.accept, self.request_encoding) if e and e not in CODECS]
+        if unknown:
+            raise ValueError(f"unsupported encodings {unknown}, available {list(CODECS)}")
+
+    @property
+    def accept_encoding(self) -> str:
+        return ", ".join(self.accept) if self.accept else "identity"
+
+    def prepare(self, body: bytes, headers: dict[str, str]) -> tuple[bytes, dict[str, str]]:
+        """The body to send and the headers to send it with."""
+        headers = {**headers, "Accept-Encoding": self.accept_encoding}
+        if self.request_encoding is not None and len(body) >= self.min_request_bytes:
+            body = compress(self.request_encoding, body, self.level)
+            headers["Content-Encoding"] = self.request_encoding
+        return body, headers
+
+
+def decode_response(
+    content_encoding: Optional[str], raw: bytes, request_bytes: int
+) -> tuple[bytes, WireStats]:
+    start = perf_counter()
+    content = decompress(content_encoding, raw)
+    stats = WireStats(request_bytes, len(raw), content_encoding or None, perf_counter() - start)
+    return content, stats
@@ -0,0 +1,256 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from entity_disambiguator_py.instrumentation import rpc_method
+from entity_disambiguator_py.resilience import RETRY_STATUSES
+
+
+class TokenBucket:
+    """Rate cap of ``rate`` requests per second with bursts of up to ``burst``."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self.clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token, returning how many seconds to wait before it may be used."""
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+@dataclass(frozen=True)
+class LimiterStats:
+    limit: int
+    in_flight: int
+    queued: int
+    successes: int
+    overloads: int
+    decreases: int
+    min_latencies: dict[str, float]
+
+
+class AdaptiveLimiter:
+    """Adaptive cap on in-flight requests, shared by every call of a client.
+
+    The limit grows by one for every ``limit`` successes and shrinks by ``backoff``
+    when a response is a throttle or server error (``overload_statuses``), the
+    request fails, or latency rises above ``tolerance`` times the lowest latency of
+    the same ``latency_class`` in its last ``window`` responses, at most once per
+    round trip; the clients pass the RPC method with the batch size bucket. A ``TokenBucket`` additionally caps the request rate. The sync and
+    asyncio clients use ``call`` and ``acall``; both share the same state.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        backoff: float = 0.7,
+        tolerance: float = 2.0,
+        window: int = 100,
+        overload_statuses: frozenset[int] = RETRY_STATUSES,
+        rate: Optional[TokenBucket] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if not 0 < backoff < 1:
+            raise ValueError(f"backoff must be between 0 and 1, got {backoff}")
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("limits must satisfy 1 <= min_limit <= initial_limit <= max_limit")
+
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.overload_statuses = overload_statuses
+        self.rate = rate
+        self.clock = clock
+
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._queued = 0
+        self.window = window
+        self._latencies: dict[str, deque[float]] = {}
+        self._last_decrease = -float("inf")
+        self._rtt = 0.0
+        self._successes = 0
+        self._overloads = 0
+        self._decreases = 0
+
+        self._lock = threading.Condition()
+        self._async_waiters: deque[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def stats(self) -> LimiterStats:
+        with self._lock:
+            return LimiterStats(
+                limit=int(self._limit),
+                in_flight=self._in_flight,
+                queued=self._queued,
+                successes=self._successes,
+                overloads=self._overloads,
+                decreases=self._decreases,
+                min_latencies={m: min(w) for m, w in self._latencies.items() if w},
+            )
+
+    def _has_slot(self) -> bool:
+        return self._in_flight < int(self._limit)
+
+    def acquire(self) -> None:
+        with self._lock:
+            self._queued += 1
+            while not self._has_slot():
+                self._lock.wait()
+            self._queued -= 1
+            self._in_flight += 1
+        if self.rate is not None:
+            delay = self.rate.reserve()
+            if delay > 0:
+                time.sleep(delay)
+
+    async def aacquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._has_slot() and not self._async_waiters:
+                    self._in_flight += 1
+                    break
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+                self._queued += 1
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._lock:
+                    # pass on a wake up this waiter may have taken
+                    self._wake()
+                raise
+            finally:
+                with self._lock:
+                    self._queued -= 1
+                    try:
+                        self._async_waiters.remove((loop, waiter))
+                    except ValueError:
+                        pass
+            with self._lock:
+                if self._has_slot():
+                    self._in_flight += 1
+                    break
+        if self.rate is not None:
+            delay = self.rate.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    def release(
+        self, method: str, latency: Optional[float], status_code: Optional[int] = None
+    ) -> None:
+        """Record one finished request; a ``None`` latency means it failed without a response."""
+        with self._lock:
+            self._in_flight -= 1
+            now = self.clock()
+            overloaded = latency is None or status_code in self.overload_statuses
+            if latency is not None and not overloaded:
+                window = self._latencies.get(method)
+                if window is None:
+                    window = self._latencies[method] = deque(maxlen=self.window)
+                window.append(latency)
+                self._rtt = latency if not self._rtt else 0.9 * self._rtt + 0.1 * latency
+                self._successes += 1
+                if len(window) > 1 and latency > self.tolerance * min(window):
+                    self._decrease(now, latency)
+                elif self._in_flight + 1 >= int(self._limit):
+                    # only grow while the limit is what holds requests back
+                    self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+            else:
+                self._overloads += 1
+                self._decrease(now, latency)
+            self._wake()
+
+    def abandon(self) -> None:
+        """Free the slot of a request that was cancelled; says nothing about load."""
+        with self._lock:
+            self._in_flight -= 1
+            self._wake()
+
+    def _decrease(self, now: float, latency: Optional[float]) -> None:
+        # one decrease per round trip, the responses already in flight saw the old limit
+        if now - self._last_decrease < (latency if latency is not None else self._rtt):
+            return
+        self._last_decrease = now
+        self._decreases += 1
+        self._limit = max(self.min_limit, self._limit * self.backoff)
+
+    def _wake(self) -> None:
+        free = int(self._limit) - self._in_flight
+        self._lock.notify(max(free, 0))
+        for loop, waiter in list(self._async_waiters)[: max(free, 0)]:
+            loop.call_soon_threadsafe(_resolve, waiter)
+
+    def call(self, method: str, send: Callable[[], Any]) -> Any:
+        self.acquire()
+        start = time.perf_counter()
+        try:
+            r = send()
+        except Exception:
+            self.release(method, None)
+            raise
+        self.release(method, time.perf_counter() - start, r.status_code)
+        return r
+
+    async def acall(self, method: str, send: Callable[[], Awaitable[Any]]) -> Any:
+        await self.aacquire()
+        start = time.perf_counter()
+        try:
+            r = await send()
+        except asyncio.CancelledError:
+            self.abandon()
+            raise
+        except Exception:
+            self.release(method, None)
+            raise
+        self.release(method, time.perf_counter() - start, r.status_code)
+        return r
+
+
+def latency_class(payload: dict | list) -> str:
+    """The method of ``payload`` and, for batches, its size rounded up to a power of two.
+
+    A batch takes longer the more ids or calls it holds, so the limiter only
+    compares its latency with batches of about the same size. JSON-RPC batches
+    are also told apart by the methods they mix.
+    """
+    if isinstance(payload, list):
+        methods = ",".join(sorted({str(e.get("method")) for e in payload}))
+        method, size = f"batch({methods})", len(payload)
+    else:
+        ids = (payload.get("params") or {}).get("ids")
+        if not isinstance(ids, list):
+            return rpc_method(payload)
+        method, size = rpc_method(payload), len(ids)
+    return f"{method}[{1 << max(size - 1, 0).bit_length()}]"
+
+
+def _resolve(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
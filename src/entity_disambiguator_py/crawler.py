@@ -0,0 +1,391 @@
+"""Crawl the service into a local vocabulary snapshot and graph.
+
+The output directory ends up with ``vocabulary.snap`` for ``SnapshotVocabulary``
+and ``graph.bin`` for ``LocalUMLSGraph.load``. Progress is kept next to them, so
+running the same command again resumes where it stopped and fetches again the
+chunks that had failed lookups, and ``--refresh`` lists the concepts again and
+fetches those in a CUI range again:
+
+entity-disambiguator-crawl --url $URL --region ca-central-1 -o umls/
+entity-disambiguator-crawl --url $URL --region ca-central-1 -o umls/ --refresh C0000000:C0099999
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from entity_disambiguator_py.auth import UnsignedAuth
+from entity_disambiguator_py.batching import chunked, dedupe, fan_out
+from entity_disambiguator_py.client import EntityDisambiguatorLambdaClient
+from entity_disambiguator_py.graph import LocalUMLSGraph
+from entity_disambiguator_py.model import (
+    RelationshipType,
+    UMLSAtom,
+    UMLSAtomName,
+    UMLSConcept,
+    UMLSRelationship,
+    UMLSTypeDefinition,
+)
+from entity_disambiguator_py.snapshot import SnapshotBuilder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CRAWL_CHUNK_SIZE = 100
+DEFAULT_PAGE_SIZE = 10_000
+SORT_PREFIXES = [t.name for t in RelationshipType]
+
+VOCABULARY_FILE = "vocabulary.snap"
+GRAPH_FILE = "graph.bin"
+STATE_FILE = "state.json"
+CONCEPTS_FILE = "concepts.txt"
+# the listing the shards were fetched for, while a refresh lists the concepts again
+PREVIOUS_CONCEPTS_FILE = "concepts.previous.txt"
+TYPES_FILE = "types.jsonl.gz"
+SHARD_DIR = "shards"
+
+
+@dataclass
+class CrawlStats:
+    concepts: int = 0
+    atoms: int = 0
+    edges: int = 0
+    chunks_fetched: int = 0
+    chunks_skipped: int = 0
+    # (concept, sort prefix) lookups that failed; their chunks are fetched again next run
+    failures: int = 0
+    seconds: float = 0.0
+
+
+def parse_range(text: str) -> tuple[str, str]:
+    """``C0000000:C0099999`` to an inclusive (first, last) CUI range."""
+    first, sep, last = text.partition(":")
+    if not sep or not first or not last or first > last:
+        raise ValueError(f"expected FIRST:LAST with FIRST <= LAST, got {text!r}")
+    return first, last
+
+
+def chunk_key(concept_id: str, chunk_size: int) -> int:
+    """The chunk of a CUI: its number divided by ``chunk_size``.
+
+    Chunks are fixed CUI ranges, so concepts added or removed only change the
+    chunk of their own range.
+    """
+    match = re.match(r"\D*(\d+)", concept_id)
+    if match is None:
+        raise ValueError(f"{concept_id} is not a CUI")
+    return int(match.group(1)) // chunk_size
+
+
+def _chunks(concept_ids: list[str], chunk_size: int) -> dict[int, list[str]]:
+    chunks: dict[int, list[str]] = {}
+    for concept_id in concept_ids:
+        chunks.setdefault(chunk_key(concept_id, chunk_size), []).append(concept_id)
+    return chunks
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _jsonl(records: Iterable[tuple[str, dict]]) -> bytes:
+    lines = (json.dumps({kind: record}, separators=(",", ":")) for kind, record in records)
+    return gzip.compress("".join(f"{line}\n" for line in lines).encode())
+
+
+def _read_jsonl(path: Path) -> Iterator[tuple[str, dict]]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            ((kind, record),) = json.loads(line).items()
+            yield kind, record
+
+
+class Crawler:
+    """Pulls every concept with its atoms and relationships into ``directory``.
+
+    Concept ids are listed page by page, then split into chunks by CUI range, up
+    to ``chunk_size`` CUI numbers each. Each chunk is fetched with the batch RPCs,
+    up to ``parallelism`` chunks at a time, and written to its own shard file,
+    which is the checkpoint: a chunk whose shard exists is not fetched again,
+    unless some of its lookups failed. ``build()`` merges the shards into the
+    vocabulary snapshot and graph files.
+
+    A refresh lists the concepts again, and the chunks whose ranges gained or lost
+    concepts are fetched again too.
+    """
+
+    def __init__(
+        self,
+        client: EntityDisambiguatorLambdaClient,
+        directory: str | os.PathLike,
+        chunk_size: int = DEFAULT_CRAWL_CHUNK_SIZE,
+        parallelism: Optional[int] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        sort_prefixes: Optional[list[str]] = None,
+        type_ids: Iterable[str] = (),
+    ) -> None:
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+
+        self.client = client
+        self.directory = Path(directory)
+        self.chunk_size = chunk_size
+        self.parallelism = parallelism or client.batch_parallelism
+        self.page_size = page_size
+        self.sort_prefixes = sort_prefixes or SORT_PREFIXES
+        self.type_ids = list(type_ids)
+        self.stats = CrawlStats()
+        self._lock = threading.Lock()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / SHARD_DIR).mkdir(exist_ok=True)
+        self.state = self._read_state()
+        if self.state.setdefault("chunk_size", chunk_size) != chunk_size:
+            raise ValueError(
+                f"{self.directory} was crawled with chunk_size {self.state['chunk_size']}"
+            )
+
+    def _read_state(self) -> dict:
+        try:
+            with open(self.directory / STATE_FILE) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"listed": False, "cursor": None, "listed_bytes": 0}
+
+    def _write_state(self) -> None:
+        _write_atomic(self.directory / STATE_FILE, json.dumps(self.state).encode())
+
+    def _shard(self, index: int) -> Path:
+        return self.directory / SHARD_DIR / f"{index:06d}.jsonl.gz"
+
+    def run(self, refresh: Iterable[tuple[str, str]] = ()) -> CrawlStats:
+        """List, fetch every chunk without a complete shard, then build the output files."""
+        start = time.perf_counter()
+        refresh = list(refresh)
+        if refresh and self.state["listed"]:
+            self._relist()
+        chunks = _chunks(self.list_concepts(), self.chunk_size)
+        self._drop_changed_chunks(chunks)
+        for first, last in refresh:
+            for key, chunk in chunks.items():
+                if chunk[0] <= last and chunk[-1] >= first:
+                    self._shard(key).unlink(missing_ok=True)
+
+        incomplete = set(self.state.get("incomplete", []))
+        todo = [
+            (key, chunk)
+            for key, chunk in chunks.items()
+            if key in incomplete or not self._shard(key).exists()
+        ]
+        self.stats.chunks_skipped += len(chunks) - len(todo)
+        fan_out(self._fetch_chunk, todo, self.parallelism)
+        if self.type_ids and (refresh or not (self.directory / TYPES_FILE).exists()):
+            self._fetch_types()
+
+        self.build(chunks)
+        self.stats.seconds += time.perf_counter() - start
+        return self.stats
+
+    def list_concepts(self) -> list[str]:
+        """Sorted concept ids, resuming an interrupted listing from its last full page."""
+        path = self.directory / CONCEPTS_FILE
+        if not self.state["listed"]:
+            with open(path, "a+", encoding="utf-8") as f:
+                # drop ids of a page that was cut short
+                f.truncate(self.state["listed_bytes"])
+                cursor = self.state["cursor"]
+                stream = self.client.iter_concepts(self.page_size, cursor)
+                page: list[str] = []
+                for concept_id in stream:
+                    if stream.cursor != cursor:
+                        self._listed_page(f, page, stream.cursor)
+                        page, cursor = [], stream.cursor
+                    page.append(concept_id)
+                self._listed_page(f, page, None)
+
+        with open(path, encoding="utf-8") as f:
+            return sorted(dedupe(line.rstrip("\n") for line in f))
+
+    def _relist(self) -> None:
+        # an interrupted refresh has moved the listing the shards belong to already
+        previous = self.directory / PREVIOUS_CONCEPTS_FILE
+        if not previous.exists():
+            os.replace(self.directory / CONCEPTS_FILE, previous)
+        self.state.update(listed=False, cursor=None, listed_bytes=0)
+        self._write_state()
+
+    def _drop_changed_chunks(self, chunks: dict[int, list[str]]) -> None:
+        path = self.directory / PREVIOUS_CONCEPTS_FILE
+        if not path.exists():
+            return
+        with open(path, encoding="utf-8") as f:
+            previous = _chunks(sorted(dedupe(line.rstrip("\n") for line in f)), self.chunk_size)
+        for key in chunks.keys() | previous.keys():
+            if previous.get(key) != chunks.get(key):
+                self._shard(key).unlink(missing_ok=True)
+        path.unlink()
+
+    def _listed_page(self, f, page: list[str], cursor: Optional[str]) -> None:
+        f.writelines(f"{concept_id}\n" for concept_id in page)
+        f.flush()
+        os.fsync(f.fileno())
+        self.state.update(listed=cursor is None, cursor=cursor, listed_bytes=f.tell())
+        self._write_state()
+
+    def _fetch_chunk(self, item: tuple[int, list[str]]) -> None:
+        index, concept_ids = item
+        client = self.client
+        concepts = client.get_batch_concept(concept_ids, parallelism=1).result
+        names = dedupe(name for c in concepts for name in c.alias_list)
+        atom_names = client.get_batch_alias_name(names, parallelism=1).result
+        atom_ids = dedupe(a for n in atom_names for a in n.atom_ids)
+        # names are shared, each atom is kept only in the shard of its own concept
+        chunk = set(concept_ids)
+        atoms = [
+            a
+            for a in client.get_batch_alias_id(atom_ids, parallelism=1).result
+            if a.concept_id in chunk
+        ]
+
+        # each edge is listed once, under its parent
+        queries = [(c.concept_id, p) for c in concepts for p in self.sort_prefixes]
+        edges: list[UMLSRelationship] = []
+        failed = []
+        for group in chunked(queries, self.chunk_size):
+            with client.batch(parallelism=1) as rpc:
+                calls = [rpc.get_children(cid, prefix) for cid, prefix in group]
+            for (cid, prefix), call in zip(group, calls):
+                if call.error() is None:
+                    edges.extend(call.result().result)
+                else:
+                    logger.warning(f"no {prefix} children for {cid}: {call.error()}")
+                    failed.append({"concept_id": cid, "sort_prefix": prefix})
+
+        records = (
+            [("concept", c.model_dump()) for c in concepts]
+            + [("name", n.model_dump()) for n in atom_names]
+            + [("atom", a.model_dump()) for a in atoms]
+            + [("edge", e.model_dump()) for e in edges]
+            + [("failed", f) for f in failed]
+        )
+        _write_atomic(self._shard(index), _jsonl(records))
+        with self._lock:
+            self.stats.chunks_fetched += 1
+            self.stats.concepts += len(concepts)
+            self.stats.atoms += len(atoms)
+            self.stats.edges += len(edges)
+            self.stats.failures += len(failed)
+            incomplete = set(self.state.get("incomplete", []))
+            if failed:
+                incomplete.add(index)
+            else:
+                incomplete.discard(index)
+            self.state["incomplete"] = sorted(incomplete)
+            self._write_state()
+        logger.debug(f"crawled chunk {index}: {len(concepts)} concepts, {len(edges)} edges")
+
+    def _fetch_types(self) -> None:
+        with self.client.batch(parallelism=1) as rpc:
+            calls = [rpc.get_type_definition(tui) for tui in self.type_ids]
+        records = []
+        for tui, call in zip(self.type_ids, calls):
+            if call.error() is None:
+                records.append(("type", call.result().result.model_dump()))
+            else:
+                logger.warning(f"no type definition for {tui}: {call.error()}")
+        _write_atomic(self.directory / TYPES_FILE, _jsonl(records))
+
+    def build(self, chunks: Iterable[int]) -> tuple[Path, Path]:
+        """Merge the shards of ``chunks`` into the vocabulary snapshot and graph files."""
+        builder = SnapshotBuilder()
+        shards = [self._shard(key) for key in sorted(chunks)]
+        types = self.directory / TYPES_FILE
+
+        for shard in shards + ([types] if types.exists() else []):
+            for kind, record in _read_jsonl(shard):
+                if kind == "concept":
+                    builder.add_concept(UMLSConcept.model_validate(record))
+                elif kind == "atom":
+                    builder.add_atom(UMLSAtom.model_validate(record))
+                elif kind == "name":
+                    builder.add_atom_name(UMLSAtomName.model_validate(record))
+                elif kind == "type":
+                    builder.add_type_definition(UMLSTypeDefinition.model_validate(record))
+        vocabulary = builder.write(self.directory / VOCABULARY_FILE)
+
+        # a second pass streams the edges, only the graph's index arrays are kept
+        edges = (
+            UMLSRelationship.model_validate(record)
+            for shard in shards
+            for kind, record in _read_jsonl(shard)
+            if kind == "edge"
+        )
+        graph = LocalUMLSGraph.from_relationships(edges).save(self.directory / GRAPH_FILE)
+        return vocabulary, graph
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-o", "--output", required=True, help="directory for the crawl")
+    parser.add_argument("--url", default=os.environ.get("URL"))
+    parser.add_argument("--region", default=os.environ.get("REGION"))
+    parser.add_argument("--unsigned", action="store_true", help="skip SigV4, e.g. stand-in")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CRAWL_CHUNK_SIZE)
+    parser.add_argument("--parallelism", type=int, default=None)
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument(
+        "--sort-prefix", action="append", dest="sort_prefixes", help="default: all of them"
+    )
+    parser.add_argument("--types", help="type ids to fetch definitions for, one per line")
+    parser.add_argument(
+        "--refresh", action="append", type=parse_range, default=[], metavar="FIRST:LAST"
+    )
+    args = parser.parse_args(argv)
+
+    if args.url is None or args.region is None:
+        parser.error("--url and --region (or URL and REGION) are required")
+
+    type_ids: list[str] = []
+    if args.types:
+        with open(args.types) as f:
+            type_ids = [line.strip() for line in f if line.strip()]
+
+    auth = UnsignedAuth() if args.unsigned else None
+    with EntityDisambiguatorLambdaClient(args.url, args.region, auth=auth) as client:
+        crawler = Crawler(
+            client,
+            args.output,
+            chunk_size=args.chunk_size,
+            parallelism=args.parallelism,
+            page_size=args.page_size,
+            sort_prefixes=args.sort_prefixes,
+            type_ids=type_ids,
+        )
+        stats = crawler.run(refresh=args.refresh)
+
+    print(
+        f"{stats.chunks_fetched} chunks fetched, {stats.chunks_skipped} already done: "
+        f"{stats.concepts} concepts, {stats.atoms} atoms and {stats.edges} edges "
+        f"in {stats.seconds:.1f}s",
+        file=sys.stderr,
+    )
+    if stats.failures:
+        print(
+            f"{stats.failures} relationship lookups failed, run again to fetch their chunks",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import json
+from typing import Iterator, NamedTuple
+
+from pydantic import BaseModel
+
+from entity_disambiguator_py.model import (
+    GetNeighborsResponse,
+    GraphTraversalResponse,
+    Relationship,
+)
+
+TRAVERSAL_METHODS = frozenset({"get_ancestors", "get_descendants", "get_subgraph"})
+NEIGHBOR_METHODS = frozenset({"get_parents", "get_children", "get_neighbors"})
+EDGE_METHODS = TRAVERSAL_METHODS | NEIGHBOR_METHODS
+
+
+class _TraversalResult(BaseModel):
+    edges: list[Relationship]
+
+
+class _TraversalEnvelope(BaseModel):
+    """Wire shape of a traversal response, ``{"id", "result": {"edges"}}``."""
+
+    id: int
+    result: _TraversalResult
+
+
+def traversal_response(raw: bytes) -> GraphTraversalResponse:
+    # validated once from bytes; the already validated edges are moved, not re-checked
+    envelope = _TraversalEnvelope.model_validate_json(raw)
+    return GraphTraversalResponse.model_construct(id=envelope.id, edges=envelope.result.edges)
+
+
+def traversal_entry(entry: dict) -> GraphTraversalResponse:
+    """``traversal_response`` for an entry of an already parsed batch response."""
+    envelope = _TraversalEnvelope.model_validate(entry)
+    return GraphTraversalResponse.model_construct(id=envelope.id, edges=envelope.result.edges)
+
+
+def neighbors_response(raw: bytes) -> GetNeighborsResponse:
+    return GetNeighborsResponse.model_validate_json(raw)
+
+
+class Edge(NamedTuple):
+    parent: str
+    child: str
+
+
+class EdgeColumns:
+    """Edges of a graph response as two parallel columns instead of models."""
+
+    __slots__ = ("id", "parents", "children")
+
+    def __init__(self, id: int, parents: list[str], children: list[str]) -> None:
+        self.id = id
+        self.parents = parents
+        self.children = children
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def __iter__(self) -> Iterator[Edge]:
+        return map(Edge, self.parents, self.children)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, EdgeColumns):
+            return NotImplemented
+        return (self.id, self.parents, self.children) == (other.id, other.parents, other.children)
+
+    def __repr__(self) -> str:
+        return f"EdgeColumns(id={self.id}, edges={len(self)})"
+
+    def to_traversal_response(self) -> GraphTraversalResponse:
+        edges = [Relationship(parent=p, child=c) for p, c in zip(self.parents, self.children)]
+        return GraphTraversalResponse(id=self.id, edges=edges)
+
+
+def edge_columns(method: str, raw: bytes) -> EdgeColumns:
+    content = json.loads(raw)
+    result = content["result"]
+    edges = result["edges"] if method in TRAVERSAL_METHODS else result
+    return EdgeColumns(
+        content["id"],
+        [e["parent"] for e in edges],
+        [e["child"] for e in edges],
+    )
+
+
+def check_edge_method(method: str) -> None:
+    if method not in EDGE_METHODS:
+        raise ValueError(f"{method} does not return edges, expected one of {sorted(EDGE_METHODS)}")
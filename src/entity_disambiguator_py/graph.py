@@ -0,0 +1,295 @@
+import json
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterable, Optional
+
+from entity_disambiguator_py.client import _check_sort_prefix
+from entity_disambiguator_py.model import (
+    DocDBRelationship,
+    GetNeighborsResponse,
+    GraphTraversalResponse,
+    Relationship,
+    UMLSRelationship,
+)
+
+# File layout (little endian):
+#   header  MAGIC, u32 version, u32 padding, u64 index length
+#   index   JSON {"nodes": [...], "attrs": [...], "edges": {rel_type: count}}
+#   edges   per rel type in index order, i32 parents[count], children[count], attrs[count]
+MAGIC = b"EDGRAPH\x01"
+VERSION = 1
+_HEADER = struct.Struct("<8sIIQ")
+
+
+class _CSR:
+    """Adjacency of one direction of one relationship type as offset/target arrays.
+
+    ``targets[offsets[n]:offsets[n + 1]]`` are the neighbours of node ``n`` and
+    ``attrs`` holds the index of each edge's (umls_primary, umls_secondary) pair.
+    """
+
+    __slots__ = ("offsets", "targets", "attrs")
+
+    def __init__(self, num_nodes: int, edges: list[tuple[int, int, int]]) -> None:
+        counts = array("q", [0]) * (num_nodes + 1)
+        for src, _, _ in edges:
+            counts[src + 1] += 1
+        for i in range(num_nodes):
+            counts[i + 1] += counts[i]
+
+        self.offsets = counts
+        self.targets = array("i", [0]) * len(edges)
+        self.attrs = array("i", [0]) * len(edges)
+        fill = counts[:-1]
+        for src, dst, attr in edges:
+            pos = fill[src]
+            self.targets[pos] = dst
+            self.attrs[pos] = attr
+            fill[src] = pos + 1
+
+    def neighbors(self, node: int) -> range:
+        if node + 1 >= len(self.offsets):
+            return range(0)
+        return range(self.offsets[node], self.offsets[node + 1])
+
+
+class LocalUMLSGraph:
+    """In-process ``UMLSGraphInterface`` over relationship rows.
+
+    Nodes are numbered once and edges are stored per ``RelationshipType`` as CSR
+    arrays in both directions, so traversals never leave the process.
+    """
+
+    def __init__(
+        self,
+        node_ids: list[str],
+        edges: dict[str, list[tuple[int, int, int]]],
+        attrs: list[tuple[Optional[str], Optional[str]]],
+        call_id: int = 1,
+    ) -> None:
+        self.call_id = call_id
+        self.node_ids = node_ids
+        self.node_index = {n: i for i, n in enumerate(node_ids)}
+        self.attrs = attrs
+
+        num_nodes = len(node_ids)
+        self.children: dict[str, _CSR] = {}
+        self.parents: dict[str, _CSR] = {}
+        for rel_type, rel_edges in edges.items():
+            # a repeated parent/child edge keeps the attributes of its first row
+            first: dict[tuple[int, int], int] = {}
+            for p, c, a in rel_edges:
+                first.setdefault((p, c), a)
+            unique = sorted((p, c, a) for (p, c), a in first.items())
+            self.children[rel_type] = _CSR(num_nodes, unique)
+            self.parents[rel_type] = _CSR(num_nodes, [(c, p, a) for p, c, a in unique])
+
+    @classmethod
+    def from_relationships(
+        cls, rows: Iterable[UMLSRelationship | DocDBRelationship], call_id: int = 1
+    ) -> "LocalUMLSGraph":
+        node_index: dict[str, int] = {}
+        attr_index: dict[tuple[Optional[str], Optional[str]], int] = {}
+        edges: dict[str, list[tuple[int, int, int]]] = defaultdict(list)
+
+        for row in rows:
+            p = node_index.setdefault(row.parent, len(node_index))
+            c = node_index.setdefault(row.child, len(node_index))
+            a = attr_index.setdefault((row.umls_primary, row.umls_secondary), len(attr_index))
+            edges[row.rel_type].append((p, c, a))
+
+        node_ids = list(node_index)
+        attrs = list(attr_index)
+        return cls(node_ids, dict(edges), attrs, call_id=call_id)
+
+    def save(self, path: str | os.PathLike) -> Path:
+        """Write the graph so ``load`` can rebuild it without the relationship rows."""
+        path = Path(path)
+        columns: dict[str, tuple[array, array, array]] = {}
+        for rel_type, csr in self.children.items():
+            parents = array("i", [0]) * len(csr.targets)
+            for node in range(self.num_nodes):
+                for pos in csr.neighbors(node):
+                    parents[pos] = node
+            columns[rel_type] = (parents, csr.targets, csr.attrs)
+
+        index = {
+            "nodes": self.node_ids,
+            "attrs": self.attrs,
+            "edges": {rel_type: len(cols[0]) for rel_type, cols in columns.items()},
+        }
+        encoded = json.dumps(index, separators=(",", ":")).encode()
+
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(MAGIC, VERSION, 0, len(encoded)))
+                f.write(encoded)
+                for cols in columns.values():
+                    for col in cols:
+                        if sys.byteorder == "big":
+                            col = array("i", col)
+                            col.byteswap()
+                        f.write(col.tobytes())
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path: str | os.PathLike, call_id: int = 1) -> "LocalUMLSGraph":
+        with open(path, "rb") as f:
+            magic, version, _, length = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} graph")
+            index = json.loads(f.read(length))
+
+            edges: dict[str, list[tuple[int, int, int]]] = {}
+            for rel_type, count in index["edges"].items():
+                cols = []
+                for _ in range(3):
+                    col = array("i")
+                    col.frombytes(f.read(4 * count))
+                    if sys.byteorder == "big":
+                        col.byteswap()
+                    cols.append(col)
+                edges[rel_type] = list(zip(*cols))
+
+        attrs = [tuple(a) for a in index["attrs"]]
+        return cls(index["nodes"], edges, attrs, call_id=call_id)
+
+    def __contains__(self, umls_id: str) -> bool:
+        return umls_id in self.node_index
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_ids)
+
+    def num_edges(self, sort_prefix: Optional[str] = None) -> int:
+        if sort_prefix is not None:
+            csr = self.children.get(sort_prefix)
+            return len(csr.targets) if csr is not None else 0
+        return sum(len(csr.targets) for csr in self.children.values())
+
+    def _adjacency(self, direction: dict[str, _CSR], sort_prefix: str) -> Optional[_CSR]:
+        _check_sort_prefix(sort_prefix)
+        return direction.get(sort_prefix)
+
+    def _relationships(
+        self, csr: Optional[_CSR], node: int, sort_prefix: str, reverse: bool
+    ) -> list[UMLSRelationship]:
+        if csr is None:
+            return []
+
+        name = self.node_ids[node]
+        rows = []
+        for pos in csr.neighbors(node):
+            other = self.node_ids[csr.targets[pos]]
+            primary, secondary = self.attrs[csr.attrs[pos]]
+            parent, child = (other, name) if reverse else (name, other)
+            rows.append(
+                UMLSRelationship(
+                    parent=parent,
+                    child=child,
+                    rel_type=sort_prefix,
+                    umls_primary=primary,
+                    umls_secondary=secondary,
+                )
+            )
+        return rows
+
+    def get_parents(self, umls_id: str, sort_prefix: str) -> GetNeighborsResponse:
+        csr = self._adjacency(self.parents, sort_prefix)
+        node = self.node_index.get(umls_id)
+        if node is None:
+            return GetNeighborsResponse(id=self.call_id, result=[])
+        return GetNeighborsResponse(
+            id=self.call_id, result=self._relationships(csr, node, sort_prefix, reverse=True)
+        )
+
+    def get_children(self, umls_id: str, sort_prefix: str) -> GetNeighborsResponse:
+        csr = self._adjacency(self.children, sort_prefix)
+        node = self.node_index.get(umls_id)
+        if node is None:
+            return GetNeighborsResponse(id=self.call_id, result=[])
+        return GetNeighborsResponse(
+            id=self.call_id, result=self._relationships(csr, node, sort_prefix, reverse=False)
+        )
+
+    def get_neighbors(self, umls_id: str, sort_prefix: str) -> GetNeighborsResponse:
+        parents = self.get_parents(umls_id, sort_prefix).result
+        children = self.get_children(umls_id, sort_prefix).result
+        return GetNeighborsResponse(id=self.call_id, result=parents + children)
+
+    def traverse(
+        self,
+        start_nodes: list[int],
+        sort_prefix: str,
+        up: bool,
+        down: bool,
+        depth_limit: Optional[int] = None,
+    ) -> list[tuple[int, int]]:
+        """Breadth-first walk returning each traversed edge once as (parent, child)."""
+        parents = self._adjacency(self.parents, sort_prefix) if up else None
+        children = self._adjacency(self.children, sort_prefix) if down else None
+
+        seen = set(start_nodes)
+        frontier = list(dict.fromkeys(start_nodes))
+        edges: list[tuple[int, int]] = []
+        seen_edges: set[tuple[int, int]] = set()
+        depth = 0
+        while frontier and (depth_limit is None or depth_limit < 0 or depth < depth_limit):
+            next_frontier = []
+            for node in frontier:
+                for csr, reverse in ((parents, True), (children, False)):
+                    if csr is None:
+                        continue
+                    for pos in csr.neighbors(node):
+                        other = csr.targets[pos]
+                        edge = (other, node) if reverse else (node, other)
+                        if edge not in seen_edges:
+                            seen_edges.add(edge)
+                            edges.append(edge)
+                        if other not in seen:
+                            seen.add(other)
+                            next_frontier.append(other)
+            frontier = next_frontier
+            depth += 1
+
+        return edges
+
+    def _traversal(
+        self, umls_id: str, sort_prefix: str, up: bool, down: bool, depth_limit: Optional[int]
+    ) -> GraphTraversalResponse:
+        _check_sort_prefix(sort_prefix)
+        node = self.node_index.get(umls_id)
+        if node is None:
+            return GraphTraversalResponse(id=self.call_id, edges=[])
+
+        names = self.node_ids
+        edges = [
+            Relationship(parent=names[p], child=names[c])
+            for p, c in self.traverse([node], sort_prefix, up, down, depth_limit)
+        ]
+        return GraphTraversalResponse(id=self.call_id, edges=edges)
+
+    def get_ancestors(
+        self, umls_id: str, sort_prefix: str, depth_limit: Optional[int] = None
+    ) -> GraphTraversalResponse:
+        return self._traversal(umls_id, sort_prefix, True, False, depth_limit)
+
+    def get_descendants(
+        self, umls_id: str, sort_prefix: str, depth_limit: Optional[int] = None
+    ) -> GraphTraversalResponse:
+        return self._traversal(umls_id, sort_prefix, False, True, depth_limit)
+
+    def get_subgraph(
+        self, umls_id: str, sort_prefix: str, depth_limit: Optional[int] = None
+    ) -> GraphTraversalResponse:
+        return self._traversal(umls_id, sort_prefix, True, True, depth_limit)
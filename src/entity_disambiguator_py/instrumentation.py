@@ -0,0 +1,275 @@
+import logging
+import math
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
+from time import perf_counter
+from typing import Any, Callable, Optional
+
+from entity_disambiguator_py.compression import WireStats
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RpcEvent:
+    """One RPC as seen by the client; times are in seconds.
+
+    ``ttfb`` is the time until the response headers arrived, ``network_time`` until
+    the whole body was read and ``decode_time`` the time spent turning the body
+    into a response model, ``None`` when it was never decoded. ``request_bytes`` and
+    ``response_bytes`` are uncompressed sizes, ``wire`` has the sizes as sent and
+    the time spent decompressing when the client encoded the bodies itself.
+    """
+
+    method: str
+    status_code: int
+    request_bytes: int
+    response_bytes: int
+    ttfb: Optional[float]
+    network_time: float
+    decode_time: Optional[float] = None
+    retries: int = 0
+    error: Optional[str] = None
+    wire: Optional[WireStats] = None
+
+
+@dataclass(frozen=True)
+class HistogramSnapshot:
+    count: int
+    sum: float
+    min: float
+    max: float
+    p50: float
+    p90: float
+    p99: float
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class Histogram:
+    """Log bucketed histogram; percentiles are accurate to one ``growth`` factor."""
+
+    def __init__(self, lowest: float, highest: float, growth: float = 1.1) -> None:
+        n = math.ceil(math.log(highest / lowest, growth)) + 1
+        self.bounds = [lowest * growth**i for i in range(n)]
+        self.counts = [0] * (n + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(max(upper, self.min), self.max)
+        return self.max
+
+    def snapshot(self) -> HistogramSnapshot:
+        if self.count == 0:
+            return HistogramSnapshot(0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        return HistogramSnapshot(
+            count=self.count,
+            sum=self.sum,
+            min=self.min,
+            max=self.max,
+            p50=self.percentile(0.5),
+            p90=self.percentile(0.9),
+            p99=self.percentile(0.99),
+        )
+
+
+def _seconds() -> Histogram:
+    return Histogram(1e-6, 600.0)
+
+
+def _bytes() -> Histogram:
+    return Histogram(1.0, 2.0**32)
+
+
+@dataclass
+class _MethodMetrics:
+    calls: int = 0
+    errors: int = 0
+    retries: int = 0
+    status_codes: dict[int, int] = field(default_factory=dict)
+    request_bytes: Histogram = field(default_factory=_bytes)
+    response_bytes: Histogram = field(default_factory=_bytes)
+    ttfb: Histogram = field(default_factory=_seconds)
+    network_time: Histogram = field(default_factory=_seconds)
+    decode_time: Histogram = field(default_factory=_seconds)
+    request_wire_bytes: Histogram = field(default_factory=_bytes)
+    response_wire_bytes: Histogram = field(default_factory=_bytes)
+    decompress_time: Histogram = field(default_factory=_seconds)
+    encodings: dict[str, int] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class MethodSnapshot:
+    calls: int
+    errors: int
+    retries: int
+    status_codes: dict[int, int]
+    request_bytes: HistogramSnapshot
+    response_bytes: HistogramSnapshot
+    ttfb: HistogramSnapshot
+    network_time: HistogramSnapshot
+    decode_time: HistogramSnapshot
+    # sizes as sent, equal to the uncompressed sizes when nothing was compressed
+    request_wire_bytes: HistogramSnapshot
+    response_wire_bytes: HistogramSnapshot
+    decompress_time: HistogramSnapshot
+    # responses per content encoding, "identity" when uncompressed
+    encodings: dict[str, int]
+
+    @property
+    def bytes_saved(self) -> int:
+        plain = self.request_bytes.sum + self.response_bytes.sum
+        return int(plain - self.request_wire_bytes.sum - self.response_wire_bytes.sum)
+
+    @property
+    def compression_ratio(self) -> float:
+        """Uncompressed over wire size of the responses, 1.0 without compression."""
+        wire = self.response_wire_bytes.sum
+        return self.response_bytes.sum / wire if wire else 1.0
+
+
+# the last RPC made in this thread or task and who recorded it, completed once decoded
+_pending: ContextVar[Optional[tuple["Instrumentation", RpcEvent]]] = ContextVar(
+    "pending_rpc_event", default=None
+)
+
+
+class Instrumentation:
+    """Per RPC method histograms of sizes and timings, plus export hooks.
+
+    Pass one to a client as ``instrumentation``. Every hook is called with each
+    completed ``RpcEvent``; a failing hook is logged and does not fail the call.
+    """
+
+    def __init__(self, hooks: Optional[list[Callable[[RpcEvent], Any]]] = None) -> None:
+        self.hooks = list(hooks or [])
+        self._lock = threading.Lock()
+        self._methods: dict[str, _MethodMetrics] = {}
+
+    def add_hook(self, hook: Callable[[RpcEvent], Any]) -> None:
+        self.hooks.append(hook)
+
+    def snapshot(self) -> dict[str, MethodSnapshot]:
+        with self._lock:
+            return {
+                method: MethodSnapshot(
+                    calls=m.calls,
+                    errors=m.errors,
+                    retries=m.retries,
+                    status_codes=dict(m.status_codes),
+                    request_bytes=m.request_bytes.snapshot(),
+                    response_bytes=m.response_bytes.snapshot(),
+                    ttfb=m.ttfb.snapshot(),
+                    network_time=m.network_time.snapshot(),
+                    decode_time=m.decode_time.snapshot(),
+                    request_wire_bytes=m.request_wire_bytes.snapshot(),
+                    response_wire_bytes=m.response_wire_bytes.snapshot(),
+                    decompress_time=m.decompress_time.snapshot(),
+                    encodings=dict(m.encodings),
+                )
+                for method, m in self._methods.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._methods.clear()
+
+    def record_response(self, event: RpcEvent) -> None:
+        """Record the network side of an RPC; a 200 is completed by ``decode``."""
+        self.flush()
+        with self._lock:
+            m = self._methods.setdefault(event.method, _MethodMetrics())
+            m.calls += 1
+            m.retries += event.retries
+            m.status_codes[event.status_code] = m.status_codes.get(event.status_code, 0) + 1
+            if event.status_code != 200:
+                m.errors += 1
+            m.request_bytes.add(event.request_bytes)
+            m.response_bytes.add(event.response_bytes)
+            wire = event.wire
+            if wire is None:
+                m.request_wire_bytes.add(event.request_bytes)
+                m.response_wire_bytes.add(event.response_bytes)
+                encoding = "identity"
+            else:
+                m.request_wire_bytes.add(wire.request_bytes)
+                m.response_wire_bytes.add(wire.response_bytes)
+                m.decompress_time.add(wire.decompress_time)
+                encoding = wire.encoding or "identity"
+            m.encodings[encoding] = m.encodings.get(encoding, 0) + 1
+            if event.ttfb is not None:
+                m.ttfb.add(event.ttfb)
+            m.network_time.add(event.network_time)
+
+        if event.status_code == 200:
+            _pending.set((self, event))
+        else:
+            self._emit(event)
+
+    def decode(self, parse: Callable[[Any], Any], raw: Any) -> Any:
+        pending = _pending.get()
+        if pending is None or pending[0] is not self:
+            return parse(raw)
+        _pending.set(None)
+        event = pending[1]
+
+        start = perf_counter()
+        try:
+            result = parse(raw)
+        except Exception as e:
+            self._record_decode(replace(event, decode_time=perf_counter() - start, error=str(e)))
+            raise
+        self._record_decode(replace(event, decode_time=perf_counter() - start))
+        return result
+
+    def _record_decode(self, event: RpcEvent) -> None:
+        with self._lock:
+            m = self._methods.setdefault(event.method, _MethodMetrics())
+            m.decode_time.add(event.decode_time)
+            if event.error is not None:
+                m.errors += 1
+        self._emit(event)
+
+    def flush(self) -> None:
+        """Emit the event of the last RPC in this thread or task without waiting for its decode."""
+        pending = _pending.get()
+        if pending is not None:
+            _pending.set(None)
+            owner, event = pending
+            owner._emit(event)
+
+    def _emit(self, event: RpcEvent) -> None:
+        for hook in self.hooks:
+            try:
+                hook(event)
+            except Exception as e:
+                logger.warning(f"instrumentation hook {hook} failed: {e}")
+
+
+def rpc_method(payload: dict | list) -> str:
+    if isinstance(payload, list):
+        return "batch"
+    return payload.get("method", "unknown")
@@ -0,0 +1,151 @@
+import json
+import threading
+from array import array
+from typing import Iterable, Iterator, Optional
+
+from entity_disambiguator_py.decoding import (
+    TRAVERSAL_METHODS,
+    Edge,
+    EdgeColumns,
+)
+from entity_disambiguator_py.model import GraphTraversalResponse, Relationship
+
+_MAX_CODE = 2**31 - 1
+
+
+class Interner:
+    """Maps CUIs, AUIs and other ids to dense int32 codes, in the order first seen.
+
+    Each id string is kept once, so columns of codes can be turned back into the
+    very same ``str`` objects without copying them. Codes are never reused, so an
+    interner only grows: give a job its own interner and drop it with the results.
+    """
+
+    def __init__(self) -> None:
+        self._codes: dict[str, int] = {}
+        self._strings: list[str] = []
+        self._lock = threading.Lock()
+
+    def intern(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is not None:
+            return code
+        with self._lock:
+            code = self._codes.get(value)
+            if code is None:
+                code = len(self._strings)
+                if code > _MAX_CODE:
+                    raise OverflowError("interner is full, int32 codes are exhausted")
+                # the string is stored before its code is published to other threads
+                self._strings.append(value)
+                self._codes[value] = code
+            return code
+
+    def intern_many(self, values: Iterable[str]) -> array:
+        return array("i", map(self.intern, values))
+
+    def code(self, value: str) -> Optional[int]:
+        """The code of ``value`` if it has been interned, without interning it."""
+        return self._codes.get(value)
+
+    def string(self, code: int) -> str:
+        return self._strings[code]
+
+    def strings(self, codes: Iterable[int]) -> list[str]:
+        strings = self._strings
+        return [strings[c] for c in codes]
+
+    def __contains__(self, value: str) -> bool:
+        return value in self._codes
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+
+# shared by every result that is not given its own interner; it is unbounded and
+# keeps every id it has seen for the life of the process
+INTERNER = Interner()
+
+
+class InternedEdges:
+    """Edges of a graph response as two parallel int32 columns of interned codes.
+
+    ``parents`` and ``children`` are ``array('i')`` and support the buffer
+    protocol, e.g. ``numpy.frombuffer(edges.parents, dtype=numpy.int32)``.
+    Results decoded with the same ``interner`` can be compared and joined by code.
+    Without one they use the process-wide ``INTERNER``.
+    """
+
+    __slots__ = ("id", "parents", "children", "interner")
+
+    def __init__(
+        self, id: int, parents: array, children: array, interner: Optional[Interner] = None
+    ) -> None:
+        self.id = id
+        self.parents = parents
+        self.children = children
+        self.interner = interner if interner is not None else INTERNER
+
+    @classmethod
+    def from_edge_columns(
+        cls, columns: EdgeColumns, interner: Optional[Interner] = None
+    ) -> "InternedEdges":
+        interner = interner if interner is not None else INTERNER
+        return cls(
+            columns.id,
+            interner.intern_many(columns.parents),
+            interner.intern_many(columns.children),
+            interner,
+        )
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def __iter__(self) -> Iterator[Edge]:
+        string = self.interner.string
+        return (Edge(string(p), string(c)) for p, c in zip(self.parents, self.children))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, InternedEdges):
+            return NotImplemented
+        if self.interner is not other.interner:
+            return self.to_edge_columns() == other.to_edge_columns()
+        return (self.id, self.parents, self.children) == (other.id, other.parents, other.children)
+
+    def __repr__(self) -> str:
+        return f"InternedEdges(id={self.id}, edges={len(self)})"
+
+    @property
+    def nbytes(self) -> int:
+        return (len(self.parents) + len(self.children)) * self.parents.itemsize
+
+    def nodes(self) -> array:
+        """Distinct codes of every node on an edge, in the order first seen."""
+        return array("i", dict.fromkeys(self.parents + self.children))
+
+    def to_edge_columns(self) -> EdgeColumns:
+        strings = self.interner.strings
+        return EdgeColumns(self.id, strings(self.parents), strings(self.children))
+
+    def to_traversal_response(self) -> GraphTraversalResponse:
+        # every code maps back to a str, so the models need no validation
+        string = self.interner.string
+        edges = [
+            Relationship.model_construct(parent=string(p), child=string(c))
+            for p, c in zip(self.parents, self.children)
+        ]
+        return GraphTraversalResponse.model_construct(id=self.id, edges=edges)
+
+
+def interned_edges(method: str, raw: bytes, interner: Optional[Interner] = None) -> InternedEdges:
+    interner = interner if interner is not None else INTERNER
+    content = json.loads(raw)
+    result = content["result"]
+    edges = result["edges"] if method in TRAVERSAL_METHODS else result
+    intern = interner.intern
+    return InternedEdges(
+        content["id"],
+        array("i", [intern(e["parent"]) for e in edges]),
+        array("i", [intern(e["child"]) for e in edges]),
+        interner,
+    )
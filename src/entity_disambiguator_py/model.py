@@ -62,6 +62,7 @@ class GetAliasResponse(BaseModel):
 class BatchGetAliasResponse(BaseModel):
     id: int
     result: list[UMLSAtom]
+    missing: list[str] = []
 
 
 class GetAliasNameResponse(BaseModel):
@@ -72,6 +73,7 @@ class GetAliasNameResponse(BaseModel):
 class BatchGetAliasNameResponse(BaseModel):
     id: int
     result: list[UMLSAtomName]
+    missing: list[str] = []
 
 
 class GetAliasesResponse(BaseModel):
@@ -87,6 +89,7 @@ class GetConceptResponse(BaseModel):
 class BatchGetConceptResponse(BaseModel):
     id: int
     result: list[UMLSConcept]
+    missing: list[str] = []
 
 
 class ListConceptResponse(BaseModel):
@@ -143,6 +146,12 @@ class CanonicalSynonymsResponse(BaseModel):
     result: CanonicalSynonym
 
 
+class BatchCanonicalSynonymsResponse(BaseModel):
+    id: int
+    result: list[CanonicalSynonym]
+    missing: list[str] = []
+
+
 class SynonymSet(BaseModel):
     synset_id: str
     subgraph: list[str]
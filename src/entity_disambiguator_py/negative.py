@@ -0,0 +1,247 @@
+"""Known-absent names and CUIs, so lookups that would 404 skip the round trip.
+
+A prebuilt file holds one Bloom filter per exact-id RPC method over every key that
+exists, e.g. all CUIs in a synonym set for ``get_canonical_synonym``:
+
+python -m entity_disambiguator_py.negative --synonym-cuis cuis.txt -o neg.bin
+
+Names are not filtered: the service normalizes them, so a name spelled unlike any
+stored key can still exist. Name misses the service returned are remembered.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+# File layout (little endian):
+#   header   MAGIC, u32 version, u32 filter count
+#   filter   32 byte method, u64 bits, u32 hashes, u32 padding, u64 keys, bit array
+#   misses   u64 length, JSON list of [method, key]
+MAGIC = b"EDNEG\x00\x00\x01"
+VERSION = 1
+_HEADER = struct.Struct("<8sII")
+_FILTER = struct.Struct("<32sQIIQ")
+_LENGTH = struct.Struct("<Q")
+_METHOD_BYTES = 32
+
+# methods whose keys the service looks up as given, so a filter of the keys is exact
+FILTER_METHODS = frozenset({"get_canonical_synonym"})
+
+
+class BloomFilter:
+    """Set membership with no false negatives and about ``error_rate`` false positives."""
+
+    def __init__(self, num_bits: int, num_hashes: int, bits: Optional[bytearray] = None):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bits if bits is not None else bytearray((num_bits + 7) // 8)
+        self.count = 0
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float = 0.01) -> "BloomFilter":
+        if not 0 < error_rate < 1:
+            raise ValueError(f"error_rate must be between 0 and 1, got {error_rate}")
+        capacity = max(capacity, 1)
+        num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        num_hashes = max(round(num_bits / capacity * math.log(2)), 1)
+        return cls(num_bits, num_hashes)
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[str], error_rate: float = 0.01) -> "BloomFilter":
+        keys = list(keys)
+        bloom = cls.for_capacity(len(keys), error_rate)
+        for key in keys:
+            bloom.add(key)
+        return bloom
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+@dataclass(frozen=True)
+class NegativeCacheStats:
+    checks: int
+    filter_hits: int
+    miss_hits: int
+    misses: int
+
+    @property
+    def hit_rate(self) -> float:
+        return (self.filter_hits + self.miss_hits) / self.checks if self.checks else 0.0
+
+
+class NegativeCache:
+    """Short-circuits lookups of keys known not to exist.
+
+    A key is absent when the method's Bloom filter does not contain it, which is
+    never wrong as long as the filter was built from the current data, or when it
+    is among the last ``maxsize`` misses the service returned. Misses expire after
+    ``ttl`` seconds when it is set. Only the methods in ``FILTER_METHODS`` take a
+    filter; the others, such as name lookups, only use the misses.
+    """
+
+    def __init__(
+        self,
+        filters: Optional[dict[str, BloomFilter]] = None,
+        maxsize: int = 10_000,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+        unfiltered = set(filters or {}) - FILTER_METHODS
+        if unfiltered:
+            raise ValueError(
+                f"cannot filter {sorted(unfiltered)}, only exact-id methods "
+                f"{sorted(FILTER_METHODS)}"
+            )
+
+        self.filters = dict(filters or {})
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+
+        self._misses: OrderedDict[tuple[str, str], Optional[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._checks = 0
+        self._filter_hits = 0
+        self._miss_hits = 0
+
+    @classmethod
+    def from_keys(
+        cls, keys: dict[str, Iterable[str]], error_rate: float = 0.01, **kwargs
+    ) -> "NegativeCache":
+        filters = {method: BloomFilter.from_keys(k, error_rate) for method, k in keys.items()}
+        return cls(filters, **kwargs)
+
+    def is_absent(self, method: str, key: str) -> bool:
+        bloom = self.filters.get(method)
+        with self._lock:
+            self._checks += 1
+            if bloom is not None and key not in bloom:
+                self._filter_hits += 1
+                return True
+
+            expires = self._misses.get((method, key), False)
+            if expires is False:
+                return False
+            if expires is not None and expires <= self.clock():
+                del self._misses[(method, key)]
+                return False
+            self._misses.move_to_end((method, key))
+            self._miss_hits += 1
+            return True
+
+    def add(self, method: str, key: str) -> None:
+        """Remember a miss returned by the service."""
+        expires = self.clock() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._misses[(method, key)] = expires
+            self._misses.move_to_end((method, key))
+            while len(self._misses) > self.maxsize:
+                self._misses.popitem(last=False)
+
+    def stats(self) -> NegativeCacheStats:
+        with self._lock:
+            return NegativeCacheStats(
+                self._checks, self._filter_hits, self._miss_hits, len(self._misses)
+            )
+
+    def clear(self) -> None:
+        """Forget the misses; the filters stay until the file is rebuilt."""
+        with self._lock:
+            self._misses.clear()
+
+    def save(self, path: str | os.PathLike) -> Path:
+        path = Path(path)
+        with self._lock:
+            misses = [list(k) for k in self._misses]
+
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(MAGIC, VERSION, len(self.filters)))
+                for method, bloom in self.filters.items():
+                    encoded = method.encode()
+                    if len(encoded) > _METHOD_BYTES:
+                        raise ValueError(f"method name {method} is over {_METHOD_BYTES} bytes")
+                    f.write(_FILTER.pack(encoded, bloom.num_bits, bloom.num_hashes, 0, bloom.count))
+                    f.write(bloom.bits)
+                encoded = json.dumps(misses, separators=(",", ":")).encode()
+                f.write(_LENGTH.pack(len(encoded)))
+                f.write(encoded)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path: str | os.PathLike, **kwargs) -> "NegativeCache":
+        """Filters and misses saved by ``save``; saved misses get a fresh ``ttl``."""
+        with open(path, "rb") as f:
+            magic, version, count = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} negative cache")
+
+            filters = {}
+            for _ in range(count):
+                raw_method, num_bits, num_hashes, _, keys = _FILTER.unpack(f.read(_FILTER.size))
+                bloom = BloomFilter(num_bits, num_hashes, bytearray(f.read((num_bits + 7) // 8)))
+                bloom.count = keys
+                filters[raw_method.rstrip(b"\0").decode()] = bloom
+
+            (length,) = _LENGTH.unpack(f.read(_LENGTH.size))
+            misses = json.loads(f.read(length))
+
+        cache = cls(filters, **kwargs)
+        for method, key in misses:
+            cache.add(method, key)
+        return cache
+
+
+def _lines(path: str) -> Iterable[str]:
+    with open(path) as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line:
+                yield line
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--synonym-cuis", required=True, help="CUIs in a synonym set")
+    parser.add_argument("--error-rate", type=float, default=0.01)
+    parser.add_argument("-o", "--output", required=True)
+    args = parser.parse_args()
+
+    keys = {"get_canonical_synonym": _lines(args.synonym_cuis)}
+    cache = NegativeCache.from_keys(keys, args.error_rate)
+    cache.save(args.output)
+    for method, bloom in cache.filters.items():
+        print(f"{method}: {bloom.count} keys in {len(bloom.bits)} bytes, {bloom.num_hashes} hashes")
+
+
+if __name__ == "__main__":
+    main()
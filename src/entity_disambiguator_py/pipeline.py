@@ -0,0 +1,397 @@
+"""Streaming bulk disambiguation of text mentions in JSONL.
+
+Each input line is a JSON object with the mention under ``--field`` (or a bare JSON
+string). Every line is written back in input order with the normalized name and the
+matching concepts, their canonical synonyms and optionally their parents:
+
+entity-disambiguator-pipeline --url $URL --region ca-central-1 mentions.jsonl -o out.jsonl
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator, Optional, TextIO
+
+from entity_disambiguator_py.auth import UnsignedAuth
+from entity_disambiguator_py.batching import chunked, dedupe, fan_out, ichunked
+from entity_disambiguator_py.cache import ResponseCache
+from entity_disambiguator_py.client import EntityDisambiguatorLambdaClient, fold_name
+from entity_disambiguator_py.model import (
+    CanonicalSynonym,
+    GetNeighborsResponse,
+    UMLSAtomName,
+    UMLSConcept,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCK_SIZE = 1_000
+DEFAULT_QUEUE_SIZE = 4
+DEFAULT_MEMO_SIZE = 100_000
+
+_DONE = object()
+
+
+def normalize_name(name: str, lowercase: bool = False) -> str:
+    """NFC, trimmed, with runs of whitespace collapsed to one space."""
+    name = " ".join(unicodedata.normalize("NFC", name).split())
+    return name.lower() if lowercase else name
+
+
+@dataclass
+class PipelineStats:
+    records: int = 0
+    matched: int = 0
+    names_looked_up: int = 0
+    concepts_looked_up: int = 0
+    seconds: float = 0.0
+
+    @property
+    def records_per_s(self) -> float:
+        return self.records / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class _Block:
+    """A run of consecutive input lines; ``end`` is the number of lines read so far."""
+
+    end: int
+    records: list[dict]
+    names: list[str]
+    matches: dict[str, list[str]] = field(default_factory=dict)
+    concepts: dict[str, UMLSConcept] = field(default_factory=dict)
+    canonical: dict[str, CanonicalSynonym] = field(default_factory=dict)
+    parents: dict[str, list[str]] = field(default_factory=dict)
+
+
+class _Failed:
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+def _put(q: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+class DisambiguationPipeline:
+    """Alias, concept, canonical synonym and parent lookups as concurrent stages.
+
+    Records move through the stages in blocks of ``block_size`` over queues holding
+    at most ``queue_size`` blocks, so memory stays bounded however long the input is
+    and a slow stage holds back the reader. Every stage deduplicates the names or
+    CUIs of a block, skips those remembered from earlier blocks and sends the rest
+    as batch calls.
+    """
+
+    def __init__(
+        self,
+        client: EntityDisambiguatorLambdaClient,
+        field: str = "text",
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        parents: Optional[str] = None,
+        lowercase: bool = False,
+        memo_size: int = DEFAULT_MEMO_SIZE,
+    ) -> None:
+        self.client = client
+        self.field = field
+        self.block_size = block_size
+        self.queue_size = queue_size
+        self.parents = parents
+        self.lowercase = lowercase
+        self.memo = ResponseCache(maxsize=memo_size)
+        self.stats = PipelineStats()
+
+        self.stages: list[Callable[[_Block], _Block]] = [
+            self._aliases,
+            self._concepts,
+            self._canonical,
+        ]
+        if parents is not None:
+            self.stages.append(self._parents)
+
+    def annotate(self, records: Iterable[dict | str]) -> Iterator[dict]:
+        """Enriched copies of ``records`` in order; bare strings become ``{field: name}``."""
+        for block in self._run(enumerate(records, start=1)):
+            yield from self._output(block)
+
+    def run(
+        self,
+        source: TextIO,
+        sink: TextIO,
+        skip: int = 0,
+        on_block: Optional[Callable[[int], None]] = None,
+    ) -> PipelineStats:
+        """Annotate JSONL from ``source`` into ``sink`` after skipping ``skip`` lines.
+
+        ``on_block`` is called with the number of input lines done after each block
+        has been written, which is where a checkpoint can be taken.
+        """
+        lines = (
+            (n, json.loads(line))
+            for n, line in enumerate(source, start=1)
+            if n > skip and line.strip()
+        )
+        for block in self._run(lines):
+            sink.writelines(json.dumps(record) + "\n" for record in self._output(block))
+            if on_block is not None:
+                sink.flush()
+                on_block(block.end)
+        return self.stats
+
+    def _run(self, lines: Iterable[tuple[int, dict | str]]) -> Iterator[_Block]:
+        stop = threading.Event()
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+
+        def read() -> None:
+            try:
+                for chunk in ichunked(lines, self.block_size):
+                    if not _put(queues[0], self._block(chunk), stop):
+                        return
+                _put(queues[0], _DONE, stop)
+            except Exception as e:
+                _put(queues[0], _Failed(e), stop)
+
+        def stage(fn: Callable[[_Block], _Block], inbox: queue.Queue, outbox: queue.Queue):
+            while not stop.is_set():
+                try:
+                    item = inbox.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if not isinstance(item, _Block):
+                    _put(outbox, item, stop)
+                    return
+                try:
+                    item = fn(item)
+                except Exception as e:
+                    item = _Failed(e)
+                if not _put(outbox, item, stop) or isinstance(item, _Failed):
+                    return
+
+        threads = [threading.Thread(target=read, name="pipeline-read", daemon=True)]
+        for i, fn in enumerate(self.stages):
+            threads.append(
+                threading.Thread(
+                    target=stage,
+                    args=(fn, queues[i], queues[i + 1]),
+                    name=f"pipeline-{fn.__name__.lstrip('_')}",
+                    daemon=True,
+                )
+            )
+        for t in threads:
+            t.start()
+
+        start = time.perf_counter() - self.stats.seconds
+        try:
+            while True:
+                item = queues[-1].get()
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failed):
+                    raise item.error
+                self.stats.records += len(item.records)
+                self.stats.matched += sum(1 for n in item.names if item.matches.get(n))
+                self.stats.seconds = time.perf_counter() - start
+                yield item
+        finally:
+            stop.set()
+
+    def _block(self, chunk: list[tuple[int, dict | str]]) -> _Block:
+        records = []
+        names = []
+        for _, record in chunk:
+            if not isinstance(record, dict):
+                record = {self.field: record}
+            records.append(record)
+            names.append(normalize_name(str(record.get(self.field) or ""), self.lowercase))
+        return _Block(end=chunk[-1][0], records=records, names=names)
+
+    def _aliases(self, block: _Block) -> _Block:
+        missing = []
+        for name in dedupe([n for n in block.names if n]):
+            hit = self.memo.get("batch_get_alias_name", name)
+            if hit is None:
+                missing.append(name)
+            else:
+                block.matches[name] = hit.concept_ids
+
+        if missing:
+            self.stats.names_looked_up += len(missing)
+            resp = self.client.get_batch_alias_name(missing)
+            # the service may echo back another spelling of the name asked for
+            found = {fold_name(atom.name): atom for atom in resp.result}
+            for name in missing:
+                atom = found.get(fold_name(name))
+                if atom is None:
+                    atom = UMLSAtomName(name=name, atom_ids=[], concept_ids=[])
+                block.matches[name] = self.memo.put("batch_get_alias_name", name, atom).concept_ids
+        return block
+
+    def _concept_ids(self, block: _Block) -> list[str]:
+        return dedupe([cid for cids in block.matches.values() for cid in cids])
+
+    def _concepts(self, block: _Block) -> _Block:
+        missing = []
+        for cid in self._concept_ids(block):
+            hit = self.memo.get("batch_get_concept", cid)
+            if hit is None:
+                missing.append(cid)
+            else:
+                block.concepts[cid] = hit
+
+        if missing:
+            self.stats.concepts_looked_up += len(missing)
+            for concept in self.client.get_batch_concept(missing).result:
+                block.concepts[concept.concept_id] = concept
+                self.memo.put("batch_get_concept", concept.concept_id, concept)
+        return block
+
+    def _canonical(self, block: _Block) -> _Block:
+        cids = self._concept_ids(block)
+        if cids:
+            for synonym in self.client.canonicalize_many(cids).result:
+                block.canonical[synonym.cui_id] = synonym
+        return block
+
+    def _parents(self, block: _Block) -> _Block:
+        missing = []
+        for cid in self._concept_ids(block):
+            hit = self.memo.get("get_parents", (cid, self.parents))
+            if hit is None:
+                missing.append(cid)
+            else:
+                block.parents[cid] = [r.parent for r in hit.result]
+
+        def fetch(cids: list[str]) -> list[GetNeighborsResponse]:
+            with self.client.batch(parallelism=1) as batch:
+                calls = [batch.get_parents(cid, self.parents) for cid in cids]
+            return [call.result() for call in calls]
+
+        chunks = chunked(missing, self.client.batch_chunk_size)
+        for cids, responses in zip(chunks, fan_out(fetch, chunks, self.client.batch_parallelism)):
+            for cid, resp in zip(cids, responses):
+                self.memo.put("get_parents", (cid, self.parents), resp)
+                block.parents[cid] = [r.parent for r in resp.result]
+        return block
+
+    def _output(self, block: _Block) -> Iterator[dict]:
+        for record, name in zip(block.records, block.names):
+            concepts = []
+            for cid in block.matches.get(name, []):
+                concept = block.concepts.get(cid)
+                synonym = block.canonical.get(cid)
+                entry = {
+                    "concept_id": cid,
+                    "definition": concept.definition if concept is not None else None,
+                    "canonical_cui": synonym.canonical_cui if synonym is not None else cid,
+                    "synset_id": synonym.synset_id if synonym is not None else None,
+                }
+                if self.parents is not None:
+                    entry["parents"] = block.parents.get(cid, [])
+                concepts.append(entry)
+            yield {**record, "normalized": name, "concepts": concepts}
+
+
+def _read_checkpoint(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"lines": 0, "output_bytes": 0}
+
+
+def _write_checkpoint(path: str, lines: int, output_bytes: int) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"lines": lines, "output_bytes": output_bytes}, f)
+    os.replace(tmp, path)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("input", nargs="?", default="-", help="JSONL file, - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file, - for stdout")
+    parser.add_argument("--url", default=os.environ.get("URL"))
+    parser.add_argument("--region", default=os.environ.get("REGION"))
+    parser.add_argument("--unsigned", action="store_true", help="skip SigV4, e.g. stand-in")
+    parser.add_argument("--field", default="text")
+    parser.add_argument("--lowercase", action="store_true")
+    parser.add_argument("--parents", metavar="SORT_PREFIX", default=None)
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE)
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE)
+    parser.add_argument("--checkpoint", help="resume from and record progress in this file")
+    parser.add_argument("--report-every", type=float, default=10.0, help="seconds")
+    args = parser.parse_args(argv)
+
+    if args.url is None or args.region is None:
+        parser.error("--url and --region (or URL and REGION) are required")
+    if args.checkpoint and args.output == "-":
+        parser.error("--checkpoint needs --output")
+
+    state = {"lines": 0, "output_bytes": 0}
+    if args.checkpoint:
+        state = _read_checkpoint(args.checkpoint)
+
+    auth = UnsignedAuth() if args.unsigned else None
+    source = sys.stdin if args.input == "-" else open(args.input)
+    if args.output == "-":
+        sink = sys.stdout
+    else:
+        # drop whatever was written after the last checkpoint
+        sink = open(args.output, "a+" if state["output_bytes"] else "w")
+        sink.truncate(state["output_bytes"])
+
+    with EntityDisambiguatorLambdaClient(args.url, args.region, auth=auth) as client:
+        pipeline = DisambiguationPipeline(
+            client,
+            field=args.field,
+            block_size=args.block_size,
+            queue_size=args.queue_size,
+            parents=args.parents,
+            lowercase=args.lowercase,
+        )
+        last_report = time.perf_counter()
+
+        def on_block(lines: int) -> None:
+            nonlocal last_report
+            if args.checkpoint:
+                _write_checkpoint(args.checkpoint, lines, sink.tell())
+            if time.perf_counter() - last_report >= args.report_every:
+                last_report = time.perf_counter()
+                _report(pipeline.stats, lines)
+
+        try:
+            stats = pipeline.run(source, sink, skip=state["lines"], on_block=on_block)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if sink is not sys.stdout:
+                sink.close()
+
+    _report(stats, None)
+
+
+def _report(stats: PipelineStats, lines: Optional[int]) -> None:
+    at = f" at line {lines}" if lines is not None else ""
+    print(
+        f"{stats.records} records{at}, {stats.records_per_s:.0f}/s, {stats.matched} matched, "
+        f"{stats.names_looked_up} names and {stats.concepts_looked_up} concepts looked up",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Hashable, Iterable, Optional
+
+from entity_disambiguator_py.client import _check_sort_prefix
+from entity_disambiguator_py.concurrency import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+GRAPH_METHODS = frozenset({"get_parents", "get_children", "get_neighbors"})
+PREFETCH_METHODS = frozenset({"get_concept", "get_concept_info", "get_canonical_synonym"})
+PREFETCH_METHODS |= GRAPH_METHODS
+DEFAULT_PREFETCH_METHODS = (
+    "get_concept_info",
+    "get_parents",
+    "get_children",
+    "get_canonical_synonym",
+)
+
+
+@dataclass(frozen=True)
+class PrefetchPolicy:
+    """Which follow-up lookups to prefetch for a resolved concept, and how much.
+
+    Up to ``batch_size`` concepts go into one JSON-RPC batch and at most
+    ``max_in_flight`` batches run at once, no more than ``rate`` batches per
+    second when it is set. The most recently resolved concepts are fetched
+    first. Beyond ``max_queued`` waiting concepts the oldest are dropped, as are
+    concepts that waited longer than ``max_age`` seconds.
+    """
+
+    methods: tuple[str, ...] = DEFAULT_PREFETCH_METHODS
+    sort_prefix: str = "PRED"
+    batch_size: int = 16
+    max_in_flight: int = 2
+    max_queued: int = 256
+    max_age: Optional[float] = 5.0
+    rate: Optional[float] = None
+
+    def __post_init__(self) -> None:
+        unknown = set(self.methods) - PREFETCH_METHODS
+        if unknown:
+            raise ValueError(f"cannot prefetch {sorted(unknown)}, use {sorted(PREFETCH_METHODS)}")
+        _check_sort_prefix(self.sort_prefix)
+        if self.batch_size <= 0 or self.max_in_flight <= 0 or self.max_queued <= 0:
+            raise ValueError("batch_size, max_in_flight and max_queued must be positive")
+
+
+@dataclass(frozen=True)
+class PrefetchStats:
+    scheduled: int
+    dropped: int
+    batches: int
+    prefetched: int
+    failed: int
+    # prefetched entries a caller read from the cache afterwards
+    used: int
+    # cache misses a queued or running prefetch was about to fill
+    late: int
+
+    @property
+    def hit_rate(self) -> float:
+        return self.used / self.prefetched if self.prefetched else 0.0
+
+
+class _PrefetcherBase:
+    """Queue and counters shared by the thread and the asyncio prefetcher.
+
+    Subclasses guard the helpers with their own lock, if they need one.
+    """
+
+    def __init__(self, client, policy: PrefetchPolicy) -> None:
+        if client.cache is None:
+            raise ValueError("prefetching needs a client with a cache")
+
+        self.client = client
+        self.policy = policy
+        self._bucket = TokenBucket(policy.rate) if policy.rate is not None else None
+
+        # concept id to the time it was last scheduled, oldest first
+        self._pending: OrderedDict[str, float] = OrderedDict()
+        self._in_flight: set[str] = set()
+        self._unused: OrderedDict[tuple[str, Hashable], None] = OrderedDict()
+        self._max_unused = policy.max_queued * len(policy.methods) * 4
+        self._closed = False
+
+        self._scheduled = 0
+        self._dropped = 0
+        self._batches = 0
+        self._prefetched = 0
+        self._failed = 0
+        self._used = 0
+        self._late = 0
+
+    def _queue(self, concept_ids: Iterable[str]) -> None:
+        now = time.monotonic()
+        for concept_id in concept_ids:
+            if concept_id in self._in_flight:
+                continue
+            self._pending[concept_id] = now
+            self._pending.move_to_end(concept_id)
+            self._scheduled += 1
+        while len(self._pending) > self.policy.max_queued:
+            self._pending.popitem(last=False)
+            self._dropped += 1
+
+    def _count_lookup(self, method: str, key: Hashable, hit: bool) -> None:
+        concept_id = key[0] if isinstance(key, tuple) else key
+        if hit:
+            if (method, key) in self._unused:
+                del self._unused[(method, key)]
+                self._used += 1
+        elif concept_id in self._pending or concept_id in self._in_flight:
+            self._late += 1
+
+    def _stats(self) -> PrefetchStats:
+        return PrefetchStats(
+            scheduled=self._scheduled,
+            dropped=self._dropped,
+            batches=self._batches,
+            prefetched=self._prefetched,
+            failed=self._failed,
+            used=self._used,
+            late=self._late,
+        )
+
+    def _drop_pending(self) -> None:
+        self._dropped += len(self._pending)
+        self._pending.clear()
+
+    def _drop_stale(self) -> None:
+        if self.policy.max_age is None:
+            return
+        stale = time.monotonic() - self.policy.max_age
+        while self._pending and next(iter(self._pending.values())) < stale:
+            self._pending.popitem(last=False)
+            self._dropped += 1
+
+    def _pop_batch(self) -> list[str]:
+        batch = []
+        while self._pending and len(batch) < self.policy.batch_size:
+            concept_id, _ = self._pending.popitem(last=True)
+            batch.append(concept_id)
+        self._in_flight.update(batch)
+        return batch
+
+    def _entries(self, concept_ids: list[str]) -> list[tuple[str, Hashable]]:
+        prefix = self.policy.sort_prefix
+        return [
+            (method, (concept_id, prefix) if method in GRAPH_METHODS else concept_id)
+            for concept_id in concept_ids
+            for method in self.policy.methods
+        ]
+
+    def _count_batch(self, fetched: list[tuple[str, Hashable]], failed: int) -> None:
+        self._batches += 1
+        self._prefetched += len(fetched)
+        self._failed += failed
+        for entry in fetched:
+            self._unused[entry] = None
+        while len(self._unused) > self._max_unused:
+            self._unused.popitem(last=False)
+
+
+class Prefetcher(_PrefetcherBase):
+    """Background threads that fill the client's cache with ``policy.methods``.
+
+    ``schedule`` is called with the concept ids of alias lookups. Entries that
+    are already cached are not fetched again.
+    """
+
+    def __init__(self, client, policy: PrefetchPolicy) -> None:
+        super().__init__(client, policy)
+
+        self._lock = threading.Lock()
+        # workers wait for ``_work``, ``join`` waits for ``_idle``
+        self._work = threading.Condition(self._lock)
+        self._idle = threading.Condition(self._lock)
+        self._local = threading.local()
+
+        self._workers = [
+            threading.Thread(target=self._run, name=f"prefetch-{i}", daemon=True)
+            for i in range(policy.max_in_flight)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def schedule(self, concept_ids: Iterable[str]) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._queue(concept_ids)
+            self._work.notify_all()
+
+    def record_lookup(self, method: str, key: Hashable, hit: bool) -> None:
+        """Count a cache lookup made by a caller, for the hit rate."""
+        if method not in self.policy.methods or getattr(self._local, "worker", False):
+            return
+        with self._lock:
+            self._count_lookup(method, key, hit)
+
+    def stats(self) -> PrefetchStats:
+        with self._lock:
+            return self._stats()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until nothing is queued or running; ``False`` on timeout."""
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._pending and not self._in_flight, timeout)
+
+    def close(self) -> None:
+        """Drop what is still queued and wait for the running batches."""
+        with self._lock:
+            self._closed = True
+            self._drop_pending()
+            self._work.notify_all()
+            self._idle.notify_all()
+        for worker in self._workers:
+            worker.join()
+
+    def _take(self) -> list[str]:
+        with self._lock:
+            while True:
+                if self._closed:
+                    return []
+                self._drop_stale()
+                if self._pending:
+                    return self._pop_batch()
+                self._idle.notify_all()
+                self._work.wait()
+
+    def _run(self) -> None:
+        # the cache lookups of prefetches are not caller lookups
+        self._local.worker = True
+        while True:
+            batch = self._take()
+            if not batch:
+                return
+            if self._bucket is not None:
+                delay = self._bucket.reserve()
+                if delay > 0:
+                    time.sleep(delay)
+            try:
+                self._fetch(batch)
+            except Exception as e:
+                logger.debug(f"prefetch of {len(batch)} concepts failed: {e}")
+            finally:
+                with self._lock:
+                    self._in_flight.difference_update(batch)
+                    self._idle.notify_all()
+
+    def _fetch(self, concept_ids: list[str]) -> None:
+        wanted = [
+            (method, key)
+            for method, key in self._entries(concept_ids)
+            if self.client._cache_get(method, key) is None
+        ]
+        if not wanted:
+            return
+
+        fetched, failed = [], 0
+        try:
+            with self.client.batch(parallelism=1) as rpc:
+                calls = [getattr(rpc, method)(*_args(key)) for method, key in wanted]
+            for entry, call in zip(wanted, calls):
+                if call.error() is None:
+                    fetched.append(entry)
+                else:
+                    failed += 1
+        except Exception:
+            failed = len(wanted)
+            raise
+        finally:
+            with self._lock:
+                self._count_batch(fetched, failed)
+
+
+# set in the prefetch tasks and inherited by the tasks they start
+_in_prefetch: ContextVar[bool] = ContextVar("in_prefetch", default=False)
+
+
+class AsyncPrefetcher(_PrefetcherBase):
+    """asyncio variant of ``Prefetcher``.
+
+    Up to ``policy.max_in_flight`` tasks on the client's event loop take batches
+    from the queue and stop once it is empty. ``schedule`` starts them again.
+    """
+
+    def __init__(self, client, policy: PrefetchPolicy) -> None:
+        super().__init__(client, policy)
+        self._tasks: set[asyncio.Task] = set()
+
+    def schedule(self, concept_ids: Iterable[str]) -> None:
+        """Queue concepts; called from a coroutine on the client's loop."""
+        if self._closed:
+            return
+        self._queue(concept_ids)
+        while self._pending and len(self._tasks) < self.policy.max_in_flight:
+            task = asyncio.ensure_future(self._run())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def record_lookup(self, method: str, key: Hashable, hit: bool) -> None:
+        """Count a cache lookup made by a caller, for the hit rate."""
+        if method not in self.policy.methods or _in_prefetch.get():
+            return
+        self._count_lookup(method, key, hit)
+
+    def stats(self) -> PrefetchStats:
+        return self._stats()
+
+    async def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until nothing is queued or running; ``False`` on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._tasks:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            await asyncio.wait(set(self._tasks), timeout=remaining)
+        return True
+
+    async def aclose(self) -> None:
+        """Drop what is still queued and wait for the running batches."""
+        self._closed = True
+        self._drop_pending()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(self) -> None:
+        # the cache lookups of prefetches are not caller lookups
+        _in_prefetch.set(True)
+        while not self._closed:
+            self._drop_stale()
+            batch = self._pop_batch()
+            if not batch:
+                return
+            if self._bucket is not None:
+                delay = self._bucket.reserve()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            try:
+                await self._fetch(batch)
+            except Exception as e:
+                logger.debug(f"prefetch of {len(batch)} concepts failed: {e}")
+            finally:
+                self._in_flight.difference_update(batch)
+
+    async def _fetch(self, concept_ids: list[str]) -> None:
+        wanted = [
+            (method, key)
+            for method, key in self._entries(concept_ids)
+            if await self.client._cache_get(method, key) is None
+        ]
+        if not wanted:
+            return
+
+        fetched, failed = [], 0
+        try:
+            async with self.client.batch(parallelism=1) as rpc:
+                calls = [getattr(rpc, method)(*_args(key)) for method, key in wanted]
+            for entry, call in zip(wanted, calls):
+                if call.error() is None:
+                    fetched.append(entry)
+                else:
+                    failed += 1
+        except Exception:
+            failed = len(wanted)
+            raise
+        finally:
+            self._count_batch(fetched, failed)
+
+
+def _args(key: Hashable) -> tuple:
+    return key if isinstance(key, tuple) else (key,)
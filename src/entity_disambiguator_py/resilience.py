@@ -0,0 +1,489 @@
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional
+
+from requests.exceptions import ConnectionError, Timeout
+
+from entity_disambiguator_py.instrumentation import rpc_method
+
+# methods that only read, so repeating or duplicating them is harmless
+IDEMPOTENT_METHODS = frozenset(
+    {
+        "get_alias_id",
+        "batch_get_alias_id",
+        "get_alias_name",
+        "batch_get_alias_name",
+        "get_type_definition",
+        "get_aliases",
+        "list_concepts",
+        "get_concept",
+        "batch_get_concept",
+        "get_concept_info",
+        "get_ancestors",
+        "get_descendants",
+        "get_parents",
+        "get_children",
+        "get_neighbors",
+        "get_subgraph",
+        "get_canonical_synonym",
+        "get_synonym_subgraph",
+    }
+)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter: attempt ``n`` waits up to ``base_delay * 2**n``."""
+
+    max_attempts: int = 3
+    base_delay: float = 0.05
+    max_delay: float = 2.0
+    retry_statuses: frozenset[int] = RETRY_STATUSES
+    respect_retry_after: bool = True
+    max_retry_after: float = 30.0
+
+    def backoff(self, attempt: int, rng: Callable[[], float] = random.random) -> float:
+        return rng() * min(self.max_delay, self.base_delay * 2**attempt)
+
+
+class RetryBudget:
+    """Caps retries and hedges at ``ratio`` of calls, plus a reserve of ``min_tokens``.
+
+    Every call deposits ``ratio`` of a token and every extra attempt takes one, so
+    when the service is overloaded retries stop instead of multiplying the load.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_tokens: float = 10.0, max_tokens: float = 100.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = min_tokens
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """Send a second copy of a slow idempotent call and keep the first answer.
+
+    The hedge fires after ``delay`` seconds, or when unset after the ``quantile``
+    of that method's recent latencies once ``min_samples`` have been seen, counted
+    from when the first attempt was sent. The sync client sends the first attempt
+    on the caller's thread, so it waits for it and takes the hedge's answer when
+    that came earlier or the first attempt failed.
+    """
+
+    delay: Optional[float] = None
+    quantile: float = 0.95
+    min_samples: int = 50
+    window: int = 1000
+
+
+class _LatencyWindow:
+    def __init__(self, size: int) -> None:
+        self.samples: deque[float] = deque(maxlen=size)
+        self._sorted: list[float] = []
+        self._stale = 0
+
+    def observe(self, latency: float) -> None:
+        self.samples.append(latency)
+        self._stale += 1
+
+    def quantile(self, q: float) -> float:
+        # re-sorting on every call would cost more than the requests it hedges
+        if self._stale >= 16 or not self._sorted:
+            self._sorted = sorted(self.samples)
+            self._stale = 0
+        return self._sorted[min(int(q * len(self._sorted)), len(self._sorted) - 1)]
+
+
+@dataclass(frozen=True)
+class ResilienceStats:
+    calls: int
+    retries: int
+    hedges: int
+    hedge_wins: int
+    budget_exhausted: int
+
+
+def retry_after(headers: Any) -> Optional[float]:
+    """Seconds to wait from a Retry-After header given as seconds or an HTTP date."""
+    value = headers.get("Retry-After") if headers is not None else None
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _close(response: Any) -> None:
+    close = getattr(response, "close", None)
+    if close is not None:
+        close()
+
+
+def _close_result(future: Future) -> None:
+    if future.exception() is None:
+        _close(future.result())
+
+
+async def _aclose(response: Any) -> None:
+    aclose = getattr(response, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+class _Hedge:
+    """The hedge of one sync call, started by the timer unless the call finished first."""
+
+    def __init__(self, send: Callable[[], Any]) -> None:
+        self.send = send
+        self.future: Optional[Future] = None
+        self._finished = False
+        self._lock = threading.Lock()
+
+    def start(self, submit: Callable[[], Optional[Future]]) -> None:
+        with self._lock:
+            if not self._finished:
+                self.future = submit()
+
+    def finish(self) -> Optional[Future]:
+        """Stop the hedge from starting; the hedge's future if it already has."""
+        with self._lock:
+            self._finished = True
+            return self.future
+
+
+class _HedgeTimer:
+    """One thread that starts the hedges whose delay has passed.
+
+    Hedges of calls that finished in time stay queued until their deadline and
+    are then skipped, which is cheaper than removing them.
+    """
+
+    def __init__(self, start: Callable[[_Hedge], None]) -> None:
+        self._start = start
+        self._queue: list[tuple[float, int, _Hedge]] = []
+        self._seq = itertools.count()
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="hedge-timer", daemon=True)
+        self._thread.start()
+
+    def schedule(self, deadline: float, hedge: _Hedge) -> None:
+        with self._cond:
+            heapq.heappush(self._queue, (deadline, next(self._seq), hedge))
+            if self._queue[0][2] is hedge:
+                self._cond.notify()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed:
+                    timeout = self._queue[0][0] - time.perf_counter() if self._queue else None
+                    if timeout is not None and timeout <= 0:
+                        break
+                    self._cond.wait(timeout)
+                if self._closed:
+                    return
+                _, _, hedge = heapq.heappop(self._queue)
+            self._start(hedge)
+
+
+class ResiliencePolicy:
+    """Retries, retry budget and hedging applied to every RPC of a client.
+
+    Only calls whose method is in ``idempotent_methods`` (a batch only when all of
+    its calls are) are ever retried or hedged; ``create_relationship`` and
+    ``reset_cache`` are always sent exactly once. ``sleep`` is used between sync
+    attempts; the async client waits with ``asyncio.sleep``.
+    """
+
+    def __init__(
+        self,
+        retry: Optional[RetryPolicy] = RetryPolicy(),
+        budget: Optional[RetryBudget] = None,
+        hedge: Optional[HedgePolicy] = None,
+        idempotent_methods: frozenset[str] = IDEMPOTENT_METHODS,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self.retry = retry
+        self.budget = budget if budget is not None else RetryBudget()
+        self.hedge = hedge
+        self.idempotent_methods = idempotent_methods
+        self.sleep = sleep
+        self.rng = rng
+
+        self._lock = threading.Lock()
+        self._latencies: dict[str, _LatencyWindow] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._timer: Optional[_HedgeTimer] = None
+        self._calls = 0
+        self._retries = 0
+        self._hedges = 0
+        self._hedge_wins = 0
+        self._budget_exhausted = 0
+
+    def stats(self) -> ResilienceStats:
+        with self._lock:
+            return ResilienceStats(
+                self._calls, self._retries, self._hedges, self._hedge_wins, self._budget_exhausted
+            )
+
+    def close(self) -> None:
+        if self._timer is not None:
+            self._timer.close()
+            self._timer = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def is_idempotent(self, payload: dict | list) -> bool:
+        if isinstance(payload, list):
+            return all(e.get("method") in self.idempotent_methods for e in payload)
+        return payload.get("method") in self.idempotent_methods
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _may_retry(self, idempotent: bool, attempt: int) -> bool:
+        if self.retry is None or not idempotent or attempt + 1 >= self.retry.max_attempts:
+            return False
+        if not self.budget.withdraw():
+            self._count("_budget_exhausted")
+            return False
+        self._count("_retries")
+        return True
+
+    def _retryable(self, response: Any) -> bool:
+        return self.retry is not None and response.status_code in self.retry.retry_statuses
+
+    def _delay(self, response: Any, attempt: int) -> float:
+        delay = self.retry.backoff(attempt, self.rng)
+        if response is not None and self.retry.respect_retry_after:
+            wait_for = retry_after(getattr(response, "headers", None))
+            if wait_for is not None:
+                delay = max(delay, min(wait_for, self.retry.max_retry_after))
+        return delay
+
+    def _hedge_delay(self, method: str, idempotent: bool) -> Optional[float]:
+        if self.hedge is None or not idempotent:
+            return None
+        if self.hedge.delay is not None:
+            return self.hedge.delay
+        with self._lock:
+            window = self._latencies.get(method)
+            if window is None or len(window.samples) < self.hedge.min_samples:
+                return None
+            return window.quantile(self.hedge.quantile)
+
+    def _observe(self, method: str, latency: float) -> None:
+        if self.hedge is None or self.hedge.delay is not None:
+            return
+        with self._lock:
+            window = self._latencies.get(method)
+            if window is None:
+                window = self._latencies[method] = _LatencyWindow(self.hedge.window)
+            window.observe(latency)
+
+    def _hedge_allowed(self) -> bool:
+        if not self.budget.withdraw():
+            self._count("_budget_exhausted")
+            return False
+        self._count("_hedges")
+        return True
+
+    def call(
+        self,
+        payload: dict | list,
+        send: Callable[[], Any],
+        retry_on: tuple[type[BaseException], ...] = (ConnectionError, Timeout),
+    ) -> tuple[Any, int]:
+        """Send with retries and hedging, returning the response and the retry count."""
+        method = rpc_method(payload)
+        idempotent = self.is_idempotent(payload)
+        self.budget.deposit()
+        self._count("_calls")
+
+        attempt = 0
+        while True:
+            try:
+                r = self._send(method, send, idempotent)
+            except retry_on:
+                if not self._may_retry(idempotent, attempt):
+                    raise
+                delay = self._delay(None, attempt)
+            else:
+                if not self._retryable(r) or not self._may_retry(idempotent, attempt):
+                    return r, attempt
+                delay = self._delay(r, attempt)
+                _close(r)
+
+            self.sleep(delay)
+            attempt += 1
+
+    def _send(self, method: str, send: Callable[[], Any], idempotent: bool) -> Any:
+        hedge_delay = self._hedge_delay(method, idempotent)
+        if hedge_delay is None:
+            start = time.perf_counter()
+            r = send()
+            self._observe(method, time.perf_counter() - start)
+            return r
+
+        # the first attempt runs on the caller's thread, only the hedge uses the pool
+        hedge = _Hedge(send)
+        with self._lock:
+            if self._timer is None:
+                self._timer = _HedgeTimer(self._start_hedge)
+            timer = self._timer
+
+        start = time.perf_counter()
+        timer.schedule(start + hedge_delay, hedge)
+        try:
+            r = send()
+        except Exception as e:
+            if hedge.finish() is None:
+                raise
+            return self._rescue(hedge, e)
+        latency = time.perf_counter() - start
+        self._observe(method, latency)
+
+        hedged = hedge.finish()
+        if hedged is None:
+            return r
+        if hedged.done() and hedged.exception() is None and not self._retryable(hedged.result()):
+            # the hedge answered while the first attempt was still running
+            self._count("_hedge_wins")
+            _close(r)
+            return hedged.result()
+        if not self._retryable(r):
+            hedged.add_done_callback(_close_result)
+            return r
+        return self._rescue(hedge, r)
+
+    def _rescue(self, hedge: "_Hedge", first: Any) -> Any:
+        """The hedge's answer when the first attempt raised or got a retryable status."""
+        try:
+            r = hedge.future.result()
+        except Exception:
+            r = None
+        if r is None or self._retryable(r):
+            _close(r)
+            if isinstance(first, Exception):
+                raise first
+            return first
+        self._count("_hedge_wins")
+        if not isinstance(first, Exception):
+            _close(first)
+        return r
+
+    def _start_hedge(self, hedge: "_Hedge") -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(thread_name_prefix="hedge")
+            executor = self._executor
+        hedge.start(lambda: executor.submit(hedge.send) if self._hedge_allowed() else None)
+
+    async def acall(
+        self,
+        payload: dict | list,
+        send: Callable[[], Awaitable[Any]],
+        retry_on: tuple[type[BaseException], ...] = (),
+    ) -> tuple[Any, int]:
+        """asyncio variant of ``call``; ``retry_on`` are the transport's connection errors."""
+        method = rpc_method(payload)
+        idempotent = self.is_idempotent(payload)
+        self.budget.deposit()
+        self._count("_calls")
+
+        attempt = 0
+        while True:
+            try:
+                r = await self._asend(method, send, idempotent)
+            except retry_on:
+                if not self._may_retry(idempotent, attempt):
+                    raise
+                delay = self._delay(None, attempt)
+            else:
+                if not self._retryable(r) or not self._may_retry(idempotent, attempt):
+                    return r, attempt
+                delay = self._delay(r, attempt)
+                await _aclose(r)
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _asend(self, method: str, send: Callable[[], Awaitable[Any]], idempotent: bool):
+        hedge_delay = self._hedge_delay(method, idempotent)
+        start = time.perf_counter()
+        if hedge_delay is None:
+            r = await send()
+            self._observe(method, time.perf_counter() - start)
+            return r
+
+        first = asyncio.ensure_future(send())
+        done, _ = await asyncio.wait({first}, timeout=hedge_delay)
+        if done or not self._hedge_allowed():
+            r = await first
+            self._observe(method, time.perf_counter() - start)
+            return r
+
+        hedged = asyncio.ensure_future(send())
+        pending = {first, hedged}
+        finished: list[asyncio.Future] = []
+        winner: Optional[asyncio.Future] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                finished.extend(done)
+                for f in done:
+                    if f.exception() is None and not self._retryable(f.result()):
+                        if f is hedged:
+                            self._count("_hedge_wins")
+                        self._observe(method, time.perf_counter() - start)
+                        winner = f
+                        return f.result()
+            winner = finished[-1]
+            return winner.result()
+        finally:
+            for loser in pending:
+                loser.cancel()
+            # a loser that finished in the same round as the winner holds a response
+            for f in finished:
+                if f is not winner and f.exception() is None:
+                    await _aclose(f.result())
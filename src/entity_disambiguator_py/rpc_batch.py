@@ -0,0 +1,460 @@
+import json
+import logging
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar
+
+from entity_disambiguator_py.batching import afan_out, fan_out
+from entity_disambiguator_py.client import NoSynonymsFound, _check_sort_prefix
+from entity_disambiguator_py.decoding import traversal_entry
+from entity_disambiguator_py.model import (
+    CanonicalSynonym,
+    CanonicalSynonymsResponse,
+    DocDBRelationship,
+    GetAliasesResponse,
+    GetAliasNameResponse,
+    GetAliasResponse,
+    GetConceptInfoResponse,
+    GetConceptResponse,
+    GetNeighborsResponse,
+    GetTypeDefinitionResponse,
+    GraphTraversalResponse,
+    SynonymSetResponse,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# statuses meaning the service does not take batches; anything else is a failure
+# of the batch itself and is not retried call by call
+BATCH_UNSUPPORTED_STATUSES = frozenset({400, 404, 405, 415})
+
+
+class RpcError(Exception):
+    def __init__(self, method: str, code: Optional[int], message: str):
+        self.method = method
+        self.code = code
+        self.message = f"{method} failed with code {code}: {message}"
+        super().__init__(self.message)
+
+
+class BatchCall(Generic[T]):
+    """Handle for one queued call, filled in when the batch is executed."""
+
+    def __init__(
+        self,
+        method: str,
+        params: Optional[dict],
+        parse: Callable[[dict], T],
+        single: Callable[[Any], Any],
+        cache_key: Optional[Hashable] = None,
+        not_found: Optional[Callable[[], T]] = None,
+        batched: bool = True,
+    ) -> None:
+        self.method = method
+        self.params = params
+        self.parse = parse
+        self.single = single
+        self.cache_key = cache_key
+        # the result of a 404, or raises the error the single call raises for it
+        self.not_found = not_found
+        # False when the response cannot be matched to its request inside a batch
+        self.batched = batched
+
+        self.done = False
+        self._result: Optional[T] = None
+        self._error: Optional[BaseException] = None
+
+    def set_result(self, result: T) -> None:
+        self._result = result
+        self.done = True
+
+    def set_error(self, error: BaseException) -> None:
+        self._error = error
+        self.done = True
+
+    def result(self) -> T:
+        if not self.done:
+            raise RuntimeError(f"{self.method} has not been executed")
+        if self._error is not None:
+            raise self._error
+        return self._result  # type: ignore[return-value]
+
+    def error(self) -> Optional[BaseException]:
+        return self._error
+
+
+def _no_synonyms(ssid: str) -> SynonymSetResponse:
+    raise NoSynonymsFound(ssid)
+
+
+class _RpcBatchBase:
+    def __init__(self, client, parallelism: Optional[int] = None) -> None:
+        self.client = client
+        self.parallelism = parallelism or client.batch_parallelism
+        self.calls: list[BatchCall] = []
+        self.executed = False
+
+    def _add(self, call: BatchCall[T]) -> BatchCall[T]:
+        if self.executed:
+            raise RuntimeError("batch has already been executed")
+        self.calls.append(call)
+        return call
+
+    def _lookup(self, method: str, model, value: str, single, not_found=None) -> BatchCall:
+        return self._add(
+            BatchCall(
+                method,
+                {"id": value},
+                model.model_validate,
+                single,
+                cache_key=value,
+                not_found=not_found,
+            )
+        )
+
+    def _graph(self, method, umls_id, sort_prefix, parse, single, cache=True, validate=True):
+        if validate:
+            _check_sort_prefix(sort_prefix)
+        return self._add(
+            BatchCall(
+                method,
+                {"query": {"start_node": umls_id, "sort_prefix": sort_prefix}},
+                parse,
+                single,
+                cache_key=(umls_id, sort_prefix) if cache else None,
+            )
+        )
+
+    def get_alias_id(self, alias_id: str) -> BatchCall[GetAliasResponse]:
+        return self._lookup(
+            "get_alias_id", GetAliasResponse, alias_id, lambda c: c.get_alias_id(alias_id)
+        )
+
+    def get_alias_name(self, name: str) -> BatchCall[GetAliasNameResponse]:
+        return self._lookup(
+            "get_alias_name", GetAliasNameResponse, name, lambda c: c.get_alias_name(name)
+        )
+
+    def get_type_definition(self, type_id: str) -> BatchCall[GetTypeDefinitionResponse]:
+        return self._lookup(
+            "get_type_definition",
+            GetTypeDefinitionResponse,
+            type_id,
+            lambda c: c.get_type_definition(type_id),
+        )
+
+    def get_aliases(self, name: str) -> BatchCall[GetAliasesResponse]:
+        return self._lookup(
+            "get_aliases",
+            GetAliasesResponse,
+            name,
+            lambda c: c.get_aliases(name),
+            not_found=lambda: GetAliasesResponse(id=self.client.call_id, result=[]),
+        )
+
+    def get_concept(self, concept_id: str) -> BatchCall[GetConceptResponse]:
+        return self._lookup(
+            "get_concept", GetConceptResponse, concept_id, lambda c: c.get_concept(concept_id)
+        )
+
+    def get_concept_info(self, concept_id: str) -> BatchCall[GetConceptInfoResponse]:
+        # the response has no JSON-RPC envelope or id, so it is always a single call
+        call = BatchCall(
+            "get_concept_info",
+            {"id": concept_id},
+            GetConceptInfoResponse.model_validate,
+            lambda c: c.get_concept_info(concept_id),
+            cache_key=concept_id,
+            batched=False,
+        )
+        return self._add(call)
+
+    def get_canonical_synonym(self, cid: str) -> BatchCall[CanonicalSynonymsResponse]:
+        return self._lookup(
+            "get_canonical_synonym",
+            CanonicalSynonymsResponse,
+            cid,
+            lambda c: c.get_canonical_synonym(cid),
+            not_found=lambda: CanonicalSynonymsResponse(
+                id=self.client.call_id,
+                result=CanonicalSynonym(cui_id=cid, canonical_cui=cid, synset_id="-1"),
+            ),
+        )
+
+    def get_synonym_set(self, ssid: str) -> BatchCall[SynonymSetResponse]:
+        call = BatchCall(
+            "get_synonym_subgraph",
+            {"id": ssid},
+            SynonymSetResponse.model_validate,
+            lambda c: c.get_synonym_set(ssid),
+            cache_key=ssid,
+            not_found=lambda: _no_synonyms(ssid),
+        )
+        return self._add(call)
+
+    def create_relationship(self, relationship: DocDBRelationship) -> BatchCall[None]:
+        call = BatchCall(
+            "create_relationship",
+            {"data": relationship.model_dump()},
+            lambda entry: None,
+            lambda c: c.create_relationship(relationship),
+        )
+        return self._add(call)
+
+    def get_parents(self, umls_id: str, sort_prefix: str) -> BatchCall[GetNeighborsResponse]:
+        return self._graph(
+            "get_parents",
+            umls_id,
+            sort_prefix,
+            GetNeighborsResponse.model_validate,
+            lambda c: c.get_parents(umls_id, sort_prefix),
+        )
+
+    def get_children(self, umls_id: str, sort_prefix: str) -> BatchCall[GetNeighborsResponse]:
+        return self._graph(
+            "get_children",
+            umls_id,
+            sort_prefix,
+            GetNeighborsResponse.model_validate,
+            lambda c: c.get_children(umls_id, sort_prefix),
+        )
+
+    def get_neighbors(self, umls_id: str, sort_prefix: str) -> BatchCall[GetNeighborsResponse]:
+        return self._graph(
+            "get_neighbors",
+            umls_id,
+            sort_prefix,
+            GetNeighborsResponse.model_validate,
+            lambda c: c.get_neighbors(umls_id, sort_prefix),
+            validate=False,
+        )
+
+    def get_ancestors(self, umls_id: str, sort_prefix: str) -> BatchCall[GraphTraversalResponse]:
+        return self._graph(
+            "get_ancestors",
+            umls_id,
+            sort_prefix,
+            traversal_entry,
+            lambda c: c.get_ancestors(umls_id, sort_prefix),
+            cache=False,
+        )
+
+    def get_descendants(self, umls_id: str, sort_prefix: str) -> BatchCall[GraphTraversalResponse]:
+        return self._graph(
+            "get_descendants",
+            umls_id,
+            sort_prefix,
+            traversal_entry,
+            lambda c: c.get_descendants(umls_id, sort_prefix),
+            cache=False,
+        )
+
+    def get_subgraph(self, umls_id: str, sort_prefix: str) -> BatchCall[GraphTraversalResponse]:
+        return self._graph(
+            "get_subgraph",
+            umls_id,
+            sort_prefix,
+            traversal_entry,
+            lambda c: c.get_subgraph(umls_id, sort_prefix),
+            cache=False,
+        )
+
+    def _cache_name(self, call: BatchCall) -> str:
+        return "get_synonym_set" if call.method == "get_synonym_subgraph" else call.method
+
+    def _claim(self) -> list[BatchCall]:
+        if self.executed:
+            raise RuntimeError("batch has already been executed")
+        self.executed = True
+        return self.calls
+
+    def _pending(self) -> list[BatchCall]:
+        pending = []
+        for call in self._claim():
+            if call.cache_key is not None:
+                cached = self.client._cache_get(self._cache_name(call), call.cache_key)
+                if cached is not None:
+                    call.set_result(cached)
+                    continue
+            pending.append(call)
+        return pending
+
+    def _payload(self, pending: list[BatchCall]) -> list[dict]:
+        payload = []
+        for i, call in enumerate(pending, start=1):
+            entry: dict = {"id": i, "method": call.method}
+            if call.params is not None:
+                entry["params"] = call.params
+            payload.append(entry)
+        return payload
+
+    def _entries(self, pending: list[BatchCall], r) -> Optional[list]:
+        """The entries of a batch response, ``None`` if the service does not take batches.
+
+        Any other failure is set as the error of every pending call and gives an
+        empty list, so writes the service may have applied are not sent again.
+        """
+        if r.status_code in BATCH_UNSUPPORTED_STATUSES:
+            logger.debug(f"batch rejected with status {r.status_code}, using single calls")
+            return None
+        if r.status_code != 200:
+            self._fail(pending, RpcError("batch", r.status_code, str(r.content)))
+            return []
+
+        try:
+            content = self.client._decode(json.loads, r.content)
+        except ValueError as e:
+            self._fail(pending, RpcError("batch", r.status_code, f"invalid response: {e}"))
+            return []
+        if not isinstance(content, list):
+            logger.debug("batch response is not a list, using single calls")
+            return None
+        return content
+
+    def _fail(self, pending: list[BatchCall], error: BaseException) -> None:
+        for call in pending:
+            call.set_error(error)
+
+    def _split(self, pending: list[BatchCall]) -> tuple[list[BatchCall], list[BatchCall]]:
+        return [c for c in pending if c.batched], [c for c in pending if not c.batched]
+
+    def _complete(self, pending: list[BatchCall], entries: list) -> None:
+        by_id = {e.get("id"): e for e in entries if isinstance(e, dict)}
+        for i, call in enumerate(pending, start=1):
+            if call.done:
+                continue
+            entry = by_id.get(i)
+            if entry is None:
+                call.set_error(RpcError(call.method, None, "no response in batch"))
+                continue
+
+            error = entry.get("error")
+            if error is not None:
+                code = error.get("code") if isinstance(error, dict) else None
+                if code == 404 and call.not_found is not None:
+                    try:
+                        self._finish(call, call.not_found())
+                    except Exception as e:
+                        call.set_error(e)
+                else:
+                    message = error.get("message", error) if isinstance(error, dict) else error
+                    call.set_error(RpcError(call.method, code, str(message)))
+                continue
+
+            try:
+                self._finish(call, call.parse(entry))
+            except Exception as e:
+                call.set_error(e)
+
+    def _finish(self, call: BatchCall, result: Any) -> None:
+        if call.cache_key is not None:
+            result = self.client._cache_put(self._cache_name(call), call.cache_key, result)
+        call.set_result(result)
+
+
+class RpcBatch(_RpcBatchBase):
+    """Queue different RPC calls and send them as one JSON-RPC batch request.
+
+    If the service does not take batches the calls are made individually in
+    parallel. A batch that fails otherwise, e.g. with a 429 or 5xx or because the
+    request raised, fails each of its calls.
+    """
+
+    def execute(self) -> list[BatchCall]:
+        batched, singles = self._split(self._pending())
+        if batched:
+            try:
+                r = self.client._rpc(self._payload(batched))
+            except Exception as e:
+                # the request itself failed, e.g. on a timeout, and so did each call in it
+                self._fail(batched, e)
+                entries: Optional[list] = []
+            else:
+                entries = self._entries(batched, r)
+            if entries is None:
+                singles = batched + singles
+            else:
+                self._complete(batched, entries)
+        if not singles:
+            return self.calls
+
+        def run(call: BatchCall) -> None:
+            try:
+                call.set_result(call.single(self.client))
+            except Exception as e:
+                call.set_error(e)
+
+        fan_out(run, singles, self.parallelism)
+        return self.calls
+
+    def __enter__(self) -> "RpcBatch":
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        if exc_type is None:
+            self.execute()
+
+
+class AsyncRpcBatch(_RpcBatchBase):
+    """asyncio variant of ``RpcBatch``.
+
+    The client's cache is read and written with ``await``, as it may be on disk.
+    """
+
+    def __init__(self, client, parallelism: Optional[int] = None) -> None:
+        super().__init__(client, parallelism)
+        self._uncached: list[tuple[BatchCall, Any]] = []
+
+    async def _apending(self) -> list[BatchCall]:
+        pending = []
+        for call in self._claim():
+            if call.cache_key is not None:
+                cached = await self.client._cache_get(self._cache_name(call), call.cache_key)
+                if cached is not None:
+                    call.set_result(cached)
+                    continue
+            pending.append(call)
+        return pending
+
+    def _finish(self, call: BatchCall, result: Any) -> None:
+        if call.cache_key is None:
+            call.set_result(result)
+        else:
+            self._uncached.append((call, result))
+
+    async def execute(self) -> list[BatchCall]:
+        batched, singles = self._split(await self._apending())
+        if batched:
+            try:
+                r = await self.client._rpc(self._payload(batched))
+            except Exception as e:
+                # the request itself failed, e.g. on a timeout, and so did each call in it
+                self._fail(batched, e)
+                entries: Optional[list] = []
+            else:
+                entries = self._entries(batched, r)
+            if entries is None:
+                singles = batched + singles
+            else:
+                self._complete(batched, entries)
+                for call, result in self._uncached:
+                    name = self._cache_name(call)
+                    call.set_result(await self.client._cache_put(name, call.cache_key, result))
+        if not singles:
+            return self.calls
+
+        async def run(call: BatchCall) -> None:
+            try:
+                call.set_result(await call.single(self.client))
+            except Exception as e:
+                call.set_error(e)
+
+        await afan_out(run, singles, self.parallelism)
+        return self.calls
+
+    async def __aenter__(self) -> "AsyncRpcBatch":
+        return self
+
+    async def __aexit__(self, exc_type, *exc_info) -> None:
+        if exc_type is None:
+            await self.execute()
@@ -0,0 +1,152 @@
+import threading
+from collections import OrderedDict, defaultdict, deque
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from entity_disambiguator_py.batching import chunked, dedupe, fan_out
+from entity_disambiguator_py.client import _check_sort_prefix
+from entity_disambiguator_py.interning import Interner
+from entity_disambiguator_py.model import GraphTraversalResponse, RelationshipType
+
+DEFAULT_CLOSURE_CACHE_SIZE = 100_000
+
+# ancestor code to its distance in edges, the concept itself at 0
+Closure = dict[int, int]
+
+
+@dataclass(frozen=True)
+class PairScore:
+    cui_a: str
+    cui_b: str
+    # edges on the shortest path through a common ancestor, None when there is none
+    distance: Optional[int]
+    lcas: list[str]
+    similarity: float
+
+
+class HierarchySimilarity:
+    """Path length, lowest common ancestors and similarity for many concept pairs.
+
+    The ancestor closure of each distinct CUI is fetched once with ``get_ancestors``,
+    in JSON-RPC batches when ``graph`` is a client, and kept as a map of interned
+    ancestor codes to depths, so a pair is scored with one set intersection. The
+    lowest common ancestors of a pair are the common ancestors on its shortest
+    path, and the similarity is ``1 / (1 + distance)``. ``graph`` is a client or any
+    ``UMLSGraphInterface`` such as ``LocalUMLSGraph``. The codes come from a new
+    ``Interner`` that goes away with the instance, unless one is passed.
+    """
+
+    def __init__(
+        self,
+        graph,
+        sort_prefix: str | RelationshipType = "PRED",
+        interner: Optional[Interner] = None,
+        chunk_size: Optional[int] = None,
+        parallelism: Optional[int] = None,
+        maxsize: int = DEFAULT_CLOSURE_CACHE_SIZE,
+    ) -> None:
+        if isinstance(sort_prefix, RelationshipType):
+            sort_prefix = sort_prefix.name
+        _check_sort_prefix(sort_prefix)
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+
+        self.graph = graph
+        self.sort_prefix = sort_prefix
+        self.interner = interner if interner is not None else Interner()
+        self.chunk_size = chunk_size or getattr(graph, "batch_chunk_size", 100)
+        self.parallelism = parallelism or getattr(graph, "batch_parallelism", 1)
+        self.maxsize = maxsize
+
+        self._closures: OrderedDict[str, Closure] = OrderedDict()
+        self._lock = threading.Lock()
+        self.fetched = 0
+
+    def closure(self, cui: str) -> Closure:
+        closure = self._cached(cui)
+        if closure is None:
+            self.prefetch([cui])
+            closure = self._cached(cui)
+        if closure is None:
+            # evicted by a concurrent prefetch, rebuild it for this call only
+            closure = self._closure(cui, self.graph.get_ancestors(cui, self.sort_prefix))
+        return closure
+
+    def prefetch(self, cuis: Iterable[str]) -> None:
+        """Fetch the closures of ``cuis`` that are not cached yet."""
+        missing = [c for c in dedupe(cuis) if self._cached(c) is None]
+        if not missing:
+            return
+        fan_out(self._fetch_chunk, chunked(missing, self.chunk_size), self.parallelism)
+
+    def _fetch_chunk(self, cuis: list[str]) -> None:
+        if hasattr(self.graph, "batch"):
+            with self.graph.batch(parallelism=1) as rpc:
+                calls = [rpc.get_ancestors(cui, self.sort_prefix) for cui in cuis]
+            responses = [call.result() for call in calls]
+        else:
+            responses = [self.graph.get_ancestors(cui, self.sort_prefix) for cui in cuis]
+
+        closures = [self._closure(cui, r) for cui, r in zip(cuis, responses)]
+        with self._lock:
+            self.fetched += len(cuis)
+            for cui, closure in zip(cuis, closures):
+                self._closures[cui] = closure
+                self._closures.move_to_end(cui)
+            while len(self._closures) > self.maxsize:
+                self._closures.popitem(last=False)
+
+    def _cached(self, cui: str) -> Optional[Closure]:
+        with self._lock:
+            closure = self._closures.get(cui)
+            if closure is not None:
+                self._closures.move_to_end(cui)
+            return closure
+
+    def _closure(self, cui: str, response: GraphTraversalResponse) -> Closure:
+        intern = self.interner.intern
+        parents: dict[int, list[int]] = defaultdict(list)
+        for edge in response.edges:
+            parents[intern(edge.child)].append(intern(edge.parent))
+
+        start = intern(cui)
+        depths = {start: 0}
+        frontier = deque([start])
+        while frontier:
+            node = frontier.popleft()
+            depth = depths[node] + 1
+            for parent in parents.get(node, ()):
+                if parent not in depths:
+                    depths[parent] = depth
+                    frontier.append(parent)
+        return depths
+
+    def score(self, cui_a: str, cui_b: str) -> PairScore:
+        return self.score_pairs([(cui_a, cui_b)])[0]
+
+    def score_pairs(self, pairs: Iterable[tuple[str, str]]) -> list[PairScore]:
+        """Scores in the order of ``pairs``; closures are fetched once per distinct CUI."""
+        pairs = list(pairs)
+        scores: list[PairScore] = []
+        # a window never needs more closures than the cache holds
+        for window in chunked(pairs, max(self.maxsize // 2, 1)):
+            cuis = dedupe(c for pair in window for c in pair)
+            self.prefetch(cuis)
+            with self._lock:
+                closures = {c: self._closures[c] for c in cuis if c in self._closures}
+            scores.extend(self._score(a, b, closures) for a, b in window)
+        return scores
+
+    def _score(self, a: str, b: str, closures: dict[str, Closure]) -> PairScore:
+        ca = closures.get(a) or self.closure(a)
+        cb = closures.get(b) or self.closure(b)
+        if len(ca) > len(cb):
+            ca, cb = cb, ca
+        common = ca.keys() & cb.keys()
+        if not common:
+            return PairScore(a, b, None, [], 0.0)
+
+        distance = min(ca[x] + cb[x] for x in common)
+        string = self.interner.string
+        lcas = sorted(string(x) for x in common if ca[x] + cb[x] == distance)
+        return PairScore(a, b, distance, lcas, 1 / (1 + distance))
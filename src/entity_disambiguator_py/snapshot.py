@@ -0,0 +1,325 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from pathlib import Path
+from typing import Iterable, Optional
+
+from requests.exceptions import HTTPError
+
+from entity_disambiguator_py.batching import dedupe
+from entity_disambiguator_py.model import (
+    BatchGetAliasNameResponse,
+    BatchGetAliasResponse,
+    BatchGetConceptResponse,
+    GetAliasesResponse,
+    GetAliasNameResponse,
+    GetAliasResponse,
+    GetConceptResponse,
+    GetTypeDefinitionResponse,
+    UMLSAtom,
+    UMLSAtomName,
+    UMLSConcept,
+    UMLSTypeDefinition,
+)
+
+# File layout (little endian):
+#   header     MAGIC, u32 version, u32 table count
+#   directory  per table: 16 byte name, u64 offset, u64 record count
+#   table      u64 key offsets[count + 1], u64 value offsets[count + 1], key blob, value blob
+# Keys are utf-8 sorted bytewise so lookups are a binary search over the mapped
+# offsets; values are small JSON arrays decoded only for the records asked for.
+MAGIC = b"EDSNAP\x00\x01"
+VERSION = 1
+_HEADER = struct.Struct("<8sII")
+_DIRECTORY_ENTRY = struct.Struct("<16sQQ")
+
+ATOMS = "atoms"
+NAMES = "names"
+CONCEPTS = "concepts"
+TYPES = "types"
+
+
+def _pad(n: int) -> int:
+    return (n + 7) & ~7
+
+
+class SnapshotBuilder:
+    """Collects vocabulary records and writes them as a snapshot file."""
+
+    def __init__(self) -> None:
+        self.atoms: dict[str, UMLSAtom] = {}
+        self.names: dict[str, tuple[list[str], list[str]]] = {}
+        self.concepts: dict[str, UMLSConcept] = {}
+        self.types: dict[str, UMLSTypeDefinition] = {}
+
+    def add_atom(self, atom: UMLSAtom) -> None:
+        self.atoms[atom.atom_id] = atom
+        atom_ids, concept_ids = self.names.setdefault(atom.name, ([], []))
+        if atom.atom_id not in atom_ids:
+            atom_ids.append(atom.atom_id)
+        if atom.concept_id not in concept_ids:
+            concept_ids.append(atom.concept_id)
+
+    def add_atoms(self, atoms: Iterable[UMLSAtom]) -> None:
+        for atom in atoms:
+            self.add_atom(atom)
+
+    def add_atom_name(self, atom_name: UMLSAtomName) -> None:
+        atom_ids, concept_ids = self.names.setdefault(atom_name.name, ([], []))
+        atom_ids.extend(a for a in atom_name.atom_ids if a not in atom_ids)
+        concept_ids.extend(c for c in atom_name.concept_ids if c not in concept_ids)
+
+    def add_concept(self, concept: UMLSConcept) -> None:
+        self.concepts[concept.concept_id] = concept
+
+    def add_concepts(self, concepts: Iterable[UMLSConcept]) -> None:
+        for concept in concepts:
+            self.add_concept(concept)
+
+    def add_type_definition(self, type_definition: UMLSTypeDefinition) -> None:
+        self.types[type_definition.type_id] = type_definition
+
+    def _tables(self) -> dict[str, dict[str, list]]:
+        return {
+            ATOMS: {k: [a.concept_id, a.name, a.source] for k, a in self.atoms.items()},
+            NAMES: {k: [atoms, concepts] for k, (atoms, concepts) in self.names.items()},
+            CONCEPTS: {
+                k: [c.language, c.alias_list, c.definition] for k, c in self.concepts.items()
+            },
+            TYPES: {
+                k: [t.abbreviation, t.definition, t.is_relation, t.name]
+                for k, t in self.types.items()
+            },
+        }
+
+    def write(self, path: str | os.PathLike) -> Path:
+        path = Path(path)
+        tables = self._tables()
+
+        encoded = []
+        for name, records in tables.items():
+            items = sorted(
+                (k.encode(), json.dumps(v, separators=(",", ":")).encode())
+                for k, v in records.items()
+            )
+            encoded.append((name, items))
+
+        directory_size = _HEADER.size + _DIRECTORY_ENTRY.size * len(encoded)
+        offset = _pad(directory_size)
+        directory = []
+        layouts = []
+        for name, items in encoded:
+            count = len(items)
+            key_size = sum(len(k) for k, _ in items)
+            value_size = sum(len(v) for _, v in items)
+            directory.append((name, offset, count))
+            layouts.append((offset, items))
+            offset = _pad(offset + 16 * (count + 1) + key_size + value_size)
+
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(MAGIC, VERSION, len(directory)))
+                for name, table_offset, count in directory:
+                    f.write(_DIRECTORY_ENTRY.pack(name.encode(), table_offset, count))
+
+                for table_offset, items in layouts:
+                    f.write(b"\0" * (table_offset - f.tell()))
+                    key_offsets = [0]
+                    for k, _ in items:
+                        key_offsets.append(key_offsets[-1] + len(k))
+                    value_offsets = [0]
+                    for _, v in items:
+                        value_offsets.append(value_offsets[-1] + len(v))
+                    f.write(struct.pack(f"<{len(key_offsets)}Q", *key_offsets))
+                    f.write(struct.pack(f"<{len(value_offsets)}Q", *value_offsets))
+                    for k, _ in items:
+                        f.write(k)
+                    for _, v in items:
+                        f.write(v)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+        return path
+
+
+class _Table:
+    __slots__ = ("count", "key_offsets", "value_offsets", "keys", "values")
+
+    def __init__(self, view: memoryview, offset: int, count: int) -> None:
+        n = count + 1
+        self.count = count
+        self.key_offsets = view[offset : offset + 8 * n].cast("Q")
+        self.value_offsets = view[offset + 8 * n : offset + 16 * n].cast("Q")
+        keys_start = offset + 16 * n
+        values_start = keys_start + self.key_offsets[count]
+        self.keys = view[keys_start:values_start]
+        self.values = view[values_start : values_start + self.value_offsets[count]]
+
+    def _key(self, i: int) -> bytes:
+        return self.keys[self.key_offsets[i] : self.key_offsets[i + 1]].tobytes()
+
+    def get(self, key: str) -> Optional[list]:
+        target = key.encode()
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        if lo == self.count or self._key(lo) != target:
+            return None
+        return json.loads(
+            self.values[self.value_offsets[lo] : self.value_offsets[lo + 1]].tobytes()
+        )
+
+    def release(self) -> None:
+        for view in (self.key_offsets, self.value_offsets, self.keys, self.values):
+            view.release()
+
+
+class SnapshotVocabulary:
+    """``UMLSVocabularyInterface`` backed by a memory mapped snapshot file.
+
+    Opening only maps the file, so start up is immediate and worker processes
+    share the pages through the OS page cache.
+    """
+
+    def __init__(self, path: str | os.PathLike, call_id: int = 1) -> None:
+        if sys.byteorder != "little":
+            raise RuntimeError("snapshot files can only be mapped on little endian hosts")
+
+        self.path = Path(path)
+        self.call_id = call_id
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        magic, version, count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{self.path} is not a version {VERSION} snapshot")
+
+        self._tables: dict[str, _Table] = {}
+        for i in range(count):
+            raw_name, offset, records = _DIRECTORY_ENTRY.unpack_from(
+                self._mmap, _HEADER.size + i * _DIRECTORY_ENTRY.size
+            )
+            name = raw_name.rstrip(b"\0").decode()
+            self._tables[name] = _Table(self._view, offset, records)
+
+    def close(self) -> None:
+        for table in getattr(self, "_tables", {}).values():
+            table.release()
+        self._tables = {}
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "SnapshotVocabulary":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._tables[CONCEPTS].count
+
+    def _atom(self, alias_id: str) -> Optional[UMLSAtom]:
+        record = self._tables[ATOMS].get(alias_id)
+        if record is None:
+            return None
+        concept_id, name, source = record
+        return UMLSAtom(atom_id=alias_id, concept_id=concept_id, name=name, source=source)
+
+    def _atom_name(self, name: str) -> Optional[UMLSAtomName]:
+        record = self._tables[NAMES].get(name)
+        if record is None:
+            return None
+        return UMLSAtomName(name=name, atom_ids=record[0], concept_ids=record[1])
+
+    def _concept(self, concept_id: str) -> Optional[UMLSConcept]:
+        record = self._tables[CONCEPTS].get(concept_id)
+        if record is None:
+            return None
+        language, alias_list, definition = record
+        return UMLSConcept(
+            concept_id=concept_id, language=language, alias_list=alias_list, definition=definition
+        )
+
+    def get_alias_id(self, alias_id: str) -> GetAliasResponse:
+        atom = self._atom(alias_id)
+        if atom is None:
+            raise HTTPError(f"status: 404 error in get_alias_id {alias_id} not in snapshot")
+        return GetAliasResponse(id=self.call_id, result=atom)
+
+    def get_batch_alias_id(self, alias_ids: list[str]) -> BatchGetAliasResponse:
+        result, missing = [], []
+        for alias_id in dedupe(alias_ids):
+            atom = self._atom(alias_id)
+            if atom is None:
+                missing.append(alias_id)
+            else:
+                result.append(atom)
+        return BatchGetAliasResponse(id=self.call_id, result=result, missing=missing)
+
+    def get_alias_name(self, name: str) -> GetAliasNameResponse:
+        atom_name = self._atom_name(name)
+        if atom_name is None:
+            raise HTTPError(f"status: 404 error in get_alias_name {name} not in snapshot")
+        return GetAliasNameResponse(id=self.call_id, result=atom_name)
+
+    def get_batch_alias_name(self, names: list[str]) -> BatchGetAliasNameResponse:
+        result, missing = [], []
+        for name in dedupe(names):
+            atom_name = self._atom_name(name)
+            if atom_name is None:
+                missing.append(name)
+            else:
+                result.append(atom_name)
+        return BatchGetAliasNameResponse(id=self.call_id, result=result, missing=missing)
+
+    def get_aliases(self, name: str) -> GetAliasesResponse:
+        atom_name = self._atom_name(name)
+        if atom_name is None:
+            return GetAliasesResponse(id=self.call_id, result=[])
+
+        atoms = [self._atom(a) for a in atom_name.atom_ids]
+        return GetAliasesResponse(id=self.call_id, result=[a for a in atoms if a is not None])
+
+    def get_concept(self, concept_id: str) -> GetConceptResponse:
+        concept = self._concept(concept_id)
+        if concept is None:
+            raise HTTPError(f"status: 404 error in get_concept {concept_id} not in snapshot")
+        return GetConceptResponse(id=self.call_id, result=concept)
+
+    def get_batch_concept(self, concept_ids: list[str]) -> BatchGetConceptResponse:
+        result, missing = [], []
+        for concept_id in dedupe(concept_ids):
+            concept = self._concept(concept_id)
+            if concept is None:
+                missing.append(concept_id)
+            else:
+                result.append(concept)
+        return BatchGetConceptResponse(id=self.call_id, result=result, missing=missing)
+
+    def get_type_definition(self, tui: str) -> GetTypeDefinitionResponse:
+        record = self._tables[TYPES].get(tui)
+        if record is None:
+            raise HTTPError(f"status: 404 error in get_type_definition {tui} not in snapshot")
+
+        abbreviation, definition, is_relation, name = record
+        type_definition = UMLSTypeDefinition(
+            type_id=tui,
+            abbreviation=abbreviation,
+            definition=definition,
+            is_relation=is_relation,
+            name=name,
+        )
+        return GetTypeDefinitionResponse(id=self.call_id, result=type_definition)
@@ -0,0 +1,495 @@
+"""Local stand-in for the entity disambiguator lambda.
+
+Serves the ``/api/rpc`` JSON-RPC protocol over synthetic UMLS data so the client
+can be tested and benchmarked without AWS:
+
+python -m entity_disambiguator_py.stand_in --concepts 100000 --latency 0.02 --port 8080
+"""
+
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional
+
+from requests.exceptions import HTTPError
+
+from entity_disambiguator_py.compression import (
+    CODECS,
+    UnsupportedEncoding,
+    compress,
+    decompress,
+)
+from entity_disambiguator_py.graph import LocalUMLSGraph
+from entity_disambiguator_py.model import (
+    DocDBRelationship,
+    RelationshipType,
+    UMLSRelationship,
+)
+
+logger = logging.getLogger(__name__)
+
+HELLO = "Silχ Digital Health entity disambiguator service"
+SOURCES = ["MSH", "SNOMEDCT_US", "RXNORM", "ICD10CM"]
+
+
+class NotFound(Exception):
+    def __init__(self, method: str, key: Any):
+        self.message = f"{key} not found in {method}"
+        super().__init__(self.message)
+
+
+class SyntheticUMLS:
+    """Deterministic UMLS-shaped data: concepts, atoms, names, types, synsets and a graph.
+
+    Concept ``i`` has ``atoms_per_concept`` atoms and a ``PRED`` parent ``(i - 1) //
+    fanout``, so traversals have a predictable shape. Every tenth concept has no
+    synonym set and atom names repeat every ``name_period`` concepts so names map
+    to several concepts.
+    """
+
+    def __init__(
+        self,
+        num_concepts: int = 10_000,
+        atoms_per_concept: int = 3,
+        fanout: int = 4,
+        cross_edges: int = 1_000,
+        name_period: int = 5_000,
+        seed: int = 0,
+    ) -> None:
+        rng = random.Random(seed)
+        self.concept_ids = [f"C{i:07d}" for i in range(num_concepts)]
+
+        self.atoms: dict[str, dict] = {}
+        self.names: dict[str, dict] = {}
+        self.concepts: dict[str, dict] = {}
+        for i, cid in enumerate(self.concept_ids):
+            aliases = []
+            for j in range(atoms_per_concept):
+                aid = f"A{i * atoms_per_concept + j:08d}"
+                name = f"term {i % name_period} variant {j}"
+                self.atoms[aid] = {
+                    "atom_id": aid,
+                    "concept_id": cid,
+                    "name": name,
+                    "source": SOURCES[(i + j) % len(SOURCES)],
+                }
+                entry = self.names.setdefault(
+                    name, {"name": name, "atom_ids": [], "concept_ids": []}
+                )
+                entry["atom_ids"].append(aid)
+                if cid not in entry["concept_ids"]:
+                    entry["concept_ids"].append(cid)
+                aliases.append(name)
+
+            self.concepts[cid] = {
+                "concept_id": cid,
+                "language": "ENG",
+                "alias_list": aliases,
+                "definition": f"synthetic concept number {i}",
+            }
+
+        self.types = {
+            f"T{t:03d}": {
+                "type_id": f"T{t:03d}",
+                "abbreviation": f"t{t:03d}",
+                "definition": f"synthetic semantic type {t}",
+                "is_relation": t % 10 == 0,
+                "name": f"Type {t}",
+            }
+            for t in range(1, 128)
+        }
+
+        self.synsets: dict[str, list[str]] = {}
+        self.canonical: dict[str, dict] = {}
+        for i, cid in enumerate(self.concept_ids):
+            if i % 10 == 9:
+                continue
+            ssid = f"S{i // 3:07d}"
+            members = self.synsets.setdefault(ssid, [])
+            members.append(cid)
+            self.canonical[cid] = {"cui_id": cid, "canonical_cui": members[0], "synset_id": ssid}
+
+        rows = [
+            UMLSRelationship(
+                parent=self.concept_ids[(i - 1) // fanout],
+                child=cid,
+                rel_type="PRED",
+                umls_primary="isa",
+                umls_secondary=None,
+            )
+            for i, cid in enumerate(self.concept_ids)
+            if i > 0
+        ]
+        for _ in range(cross_edges if num_concepts > 1 else 0):
+            a, b = rng.sample(self.concept_ids, 2)
+            rows.append(
+                UMLSRelationship(
+                    parent=a, child=b, rel_type="ASSOC", umls_primary="RO", umls_secondary=None
+                )
+            )
+        self.graph = LocalUMLSGraph.from_relationships(rows)
+
+
+@dataclass
+class FaultProfile:
+    """Latency and failures added to every RPC.
+
+    Each request sleeps ``latency`` plus up to ``jitter`` seconds. A request arriving
+    after ``cold_start_idle`` seconds without traffic, or with probability
+    ``cold_start_rate``, sleeps an extra ``cold_start_latency``. With probability
+    ``error_rate`` the request fails with ``error_status``. With ``bandwidth`` in
+    bytes per second, sending a response body takes its size over the bandwidth.
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    cold_start_latency: float = 0.0
+    cold_start_rate: float = 0.0
+    cold_start_idle: Optional[float] = None
+    error_rate: float = 0.0
+    error_status: int = 503
+    bandwidth: Optional[float] = None
+    seed: Optional[int] = None
+
+
+class _RpcDispatcher:
+    def __init__(self, data: SyntheticUMLS) -> None:
+        self.data = data
+        self.created: list[dict] = []
+        self.methods: dict[str, Callable[[dict], Any]] = {
+            "get_alias_id": lambda p: self._lookup("get_alias_id", data.atoms, p["id"]),
+            "batch_get_alias_id": lambda p: self._batch(data.atoms, p["ids"]),
+            "get_alias_name": lambda p: self._lookup("get_alias_name", data.names, p["id"]),
+            "batch_get_alias_name": lambda p: self._batch(data.names, p["ids"]),
+            "get_type_definition": lambda p: self._lookup(
+                "get_type_definition", data.types, p["id"]
+            ),
+            "get_aliases": self._aliases,
+            "list_concepts": self._list_concepts,
+            "get_concept": lambda p: self._lookup("get_concept", data.concepts, p["id"]),
+            "batch_get_concept": lambda p: self._batch(data.concepts, p["ids"]),
+            "get_canonical_synonym": lambda p: self._lookup(
+                "get_canonical_synonym", data.canonical, p["id"]
+            ),
+            "get_synonym_subgraph": self._synonym_set,
+            "create_relationship": self._create_relationship,
+        }
+        for method in ("get_parents", "get_children", "get_neighbors"):
+            self.methods[method] = self._neighbors(method)
+        for method in ("get_ancestors", "get_descendants", "get_subgraph"):
+            self.methods[method] = self._traversal(method)
+
+    def _lookup(self, method: str, table: dict[str, dict], key: str) -> dict:
+        if key not in table:
+            raise NotFound(method, key)
+        return table[key]
+
+    def _batch(self, table: dict[str, dict], keys: list[str]) -> list[dict]:
+        return [table[k] for k in keys if k in table]
+
+    def _aliases(self, params: dict) -> list[dict]:
+        entry = self._lookup("get_aliases", self.data.names, params["id"])
+        return [self.data.atoms[a] for a in entry["atom_ids"]]
+
+    def _list_concepts(self, params: dict) -> tuple[list[str], dict]:
+        ids = self.data.concept_ids
+        limit = params.get("limit")
+        if limit is None:
+            return ids, {}
+
+        start = int(params.get("cursor") or 0)
+        end = start + limit
+        extra = {"next_cursor": str(end)} if end < len(ids) else {}
+        return ids[start:end], extra
+
+    def _synonym_set(self, params: dict) -> dict:
+        members = self._lookup("get_synonym_subgraph", self.data.synsets, params["id"])
+        return {"synset_id": params["id"], "subgraph": members}
+
+    def _create_relationship(self, params: dict) -> dict:
+        relationship = DocDBRelationship.model_validate(params["data"])
+        _ = RelationshipType[relationship.rel_type]
+        self.created.append(params["data"])
+        return {"created": True}
+
+    def _neighbors(self, method: str) -> Callable[[dict], list[dict]]:
+        def call(params: dict) -> list[dict]:
+            query = params["query"]
+            resp = getattr(self.data.graph, method)(query["start_node"], query["sort_prefix"])
+            return [r.model_dump() for r in resp.result]
+
+        return call
+
+    def _traversal(self, method: str) -> Callable[[dict], dict]:
+        def call(params: dict) -> dict:
+            query = params["query"]
+            resp = getattr(self.data.graph, method)(query["start_node"], query["sort_prefix"])
+            return {"edges": [e.model_dump() for e in resp.edges]}
+
+        return call
+
+    def call(self, entry: dict) -> tuple[int, dict]:
+        """Run one JSON-RPC call, returning the HTTP status and response object."""
+        call_id = entry.get("id")
+        method = entry.get("method")
+        params = entry.get("params") or {}
+        if method == "get_concept_info":
+            try:
+                concept = self._lookup(method, self.data.concepts, params["id"])
+            except NotFound as e:
+                return 404, {"id": call_id, "error": {"code": 404, "message": e.message}}
+            info = {
+                "concept_id": concept["concept_id"],
+                "definition": concept["definition"],
+                "alias_names": concept["alias_list"],
+            }
+            return 200, info
+
+        fn = self.methods.get(method)
+        if fn is None:
+            message = f"unknown method {method}"
+            return 404, {"id": call_id, "error": {"code": 404, "message": message}}
+
+        try:
+            result = fn(params)
+        except NotFound as e:
+            return 404, {"id": call_id, "error": {"code": 404, "message": e.message}}
+        except (HTTPError, KeyError, TypeError, ValueError) as e:
+            return 400, {"id": call_id, "error": {"code": 400, "message": str(e)}}
+
+        extra: dict = {}
+        if isinstance(result, tuple):
+            result, extra = result
+        return 200, {"id": call_id, "result": result, **extra}
+
+
+def _negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """The first coding this server knows that ``Accept-Encoding`` allows."""
+    offered = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.partition(";")
+        q = params.strip().removeprefix("q=")
+        try:
+            offered[name.strip().lower()] = float(q) if q else 1.0
+        except ValueError:
+            continue
+    return next((c for c in CODECS if offered.get(c, 0) > 0), None)
+
+
+class StandInServer:
+    """Threaded HTTP server speaking the lambda's protocol on ``url``.
+
+    Response bodies of at least ``compress_min_bytes`` are compressed with a
+    coding the request accepts; ``None`` always sends them as is. Request bodies
+    are decompressed according to their ``Content-Encoding``.
+    """
+
+    def __init__(
+        self,
+        data: Optional[SyntheticUMLS] = None,
+        faults: Optional[FaultProfile] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        compress_min_bytes: Optional[int] = 1024,
+    ) -> None:
+        self.data = data if data is not None else SyntheticUMLS()
+        self.faults = faults if faults is not None else FaultProfile()
+        self.dispatcher = _RpcDispatcher(self.data)
+        self.compress_min_bytes = compress_min_bytes
+
+        self.requests = 0
+        self.compressed_requests = 0
+        self.compressed_responses = 0
+        self.cold_starts = 0
+        self.injected_errors = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.faults.seed)
+        self._last_request: Optional[float] = None
+
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self) -> None:
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _delay(self) -> tuple[float, bool]:
+        """Sleep time for the next request and whether it fails."""
+        faults = self.faults
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            idle = self._last_request is None or (
+                faults.cold_start_idle is not None
+                and now - self._last_request > faults.cold_start_idle
+            )
+            self._last_request = now
+
+            delay = faults.latency + self._rng.uniform(0, faults.jitter)
+            cold = (faults.cold_start_idle is not None and idle) or (
+                self._rng.random() < faults.cold_start_rate
+            )
+            if cold and faults.cold_start_latency > 0:
+                self.cold_starts += 1
+                delay += faults.cold_start_latency
+
+            fail = self._rng.random() < faults.error_rate
+            if fail:
+                self.injected_errors += 1
+        return delay, fail
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # headers and body go out in one segment, avoiding delayed ACK stalls
+            wbufsize = -1
+            disable_nagle_algorithm = True
+
+            def _send(self, status: int, body: bytes, content_type: str) -> None:
+                encoding = None
+                threshold = server.compress_min_bytes
+                if threshold is not None and len(body) >= threshold:
+                    encoding = _negotiate(self.headers.get("Accept-Encoding"))
+                if encoding is not None:
+                    body = compress(encoding, body)
+                    with server._lock:
+                        server.compressed_responses += 1
+
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                if encoding is not None:
+                    self.send_header("Content-Encoding", encoding)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                bandwidth = server.faults.bandwidth
+                if bandwidth:
+                    time.sleep(len(body) / bandwidth)
+                self.wfile.write(body)
+
+            def _faults(self) -> bool:
+                delay, fail = server._delay()
+                if delay > 0:
+                    time.sleep(delay)
+                if fail:
+                    status = server.faults.error_status
+                    self._send(status, b"injected error", "text/plain")
+                return fail
+
+            def do_GET(self) -> None:
+                if self._faults():
+                    return
+                self._send(200, HELLO.encode(), "text/plain; charset=utf-8")
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self._faults():
+                    return
+                if self.path != "/api/rpc":
+                    self._send(404, b"not found", "text/plain")
+                    return
+
+                encoding = self.headers.get("Content-Encoding")
+                try:
+                    body = decompress(encoding, body)
+                except UnsupportedEncoding as e:
+                    self._send(415, e.message.encode(), "text/plain")
+                    return
+                except Exception:
+                    self._send(400, b"invalid content encoding", "text/plain")
+                    return
+                if encoding:
+                    with server._lock:
+                        server.compressed_requests += 1
+
+                try:
+                    payload = json.loads(body)
+                except ValueError:
+                    self._send(400, b"invalid json", "text/plain")
+                    return
+
+                if isinstance(payload, list):
+                    status = 200
+                    content: Any = [server.dispatcher.call(e)[1] for e in payload]
+                elif payload.get("method") == "reset_cache":
+                    self._send(200, b"cache reset", "text/plain")
+                    return
+                else:
+                    status, content = server.dispatcher.call(payload)
+                self._send(status, json.dumps(content).encode(), "application/json")
+
+            def log_message(self, format: str, *args: Any) -> None:
+                logger.debug(format % args)
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--concepts", type=int, default=10_000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--cold-start-latency", type=float, default=0.0)
+    parser.add_argument("--cold-start-rate", type=float, default=0.0)
+    parser.add_argument("--cold-start-idle", type=float, default=None)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--bandwidth", type=float, default=None, help="bytes per second")
+    parser.add_argument("--compress-min-bytes", type=int, default=1024)
+    args = parser.parse_args()
+
+    faults = FaultProfile(
+        latency=args.latency,
+        jitter=args.jitter,
+        cold_start_latency=args.cold_start_latency,
+        cold_start_rate=args.cold_start_rate,
+        cold_start_idle=args.cold_start_idle,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        bandwidth=args.bandwidth,
+    )
+    server = StandInServer(
+        SyntheticUMLS(args.concepts), faults, args.host, args.port, args.compress_min_bytes
+    )
+    print(f"serving {args.concepts} synthetic concepts on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
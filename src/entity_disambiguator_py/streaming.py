@@ -0,0 +1,226 @@
+import codecs
+import json
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+from requests.exceptions import HTTPError
+
+DEFAULT_PAGE_SIZE = 10_000
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",:]}"
+_COMPACT_AT = 1 << 16
+
+
+class JsonArrayStreamParser:
+    """Push parser yielding the elements of one array member of a JSON object.
+
+    Bytes are fed as they arrive and each complete element is returned as soon as
+    it has been read, so only the current element and a small buffer are held.
+    The object's other members are decoded into ``meta``.
+    """
+
+    def __init__(self, key: str = "result") -> None:
+        self.key = key
+        self.meta: dict[str, Any] = {}
+
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._state = "start"
+        self._member: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self._state == "done"
+
+    def feed(self, data: bytes) -> list[Any]:
+        self._buf += self._text.decode(data)
+        return self._run(final=False)
+
+    def close(self) -> list[Any]:
+        self._buf += self._text.decode(b"", final=True)
+        items = self._run(final=True)
+        if self._state != "done":
+            raise ValueError(f"truncated JSON response while reading {self.key}")
+        return items
+
+    def _skip(self) -> Optional[str]:
+        buf, pos = self._buf, self._pos
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        self._pos = pos
+        return buf[pos] if pos < len(buf) else None
+
+    def _expect(self, ch: str, expected: str) -> None:
+        if ch not in expected:
+            raise ValueError(f"unexpected {ch!r} at {self._pos} while reading {self.key}")
+        self._pos += 1
+
+    def _value(self, final: bool) -> tuple[bool, Any]:
+        try:
+            value, end = self._decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return False, None
+
+        # a number cut by a chunk boundary ("2" of "2.5") decodes too early, so a
+        # value only counts once the delimiter after it has arrived
+        if not final and (end == len(self._buf) or self._buf[end] not in _DELIMITERS):
+            return False, None
+        self._pos = end
+        return True, value
+
+    def _run(self, final: bool) -> list[Any]:
+        items: list[Any] = []
+        while True:
+            ch = self._skip()
+            if ch is None or self._state == "done":
+                break
+
+            state = self._state
+            if state == "start":
+                self._expect(ch, "{")
+                self._state = "member"
+            elif state == "member":
+                if ch == "}":
+                    self._pos += 1
+                    self._state = "done"
+                    continue
+                ok, self._member = self._value(final)
+                if not ok:
+                    break
+                self._state = "colon"
+            elif state == "colon":
+                self._expect(ch, ":")
+                self._state = "array" if self._member == self.key else "value"
+            elif state == "array":
+                if ch == "n":
+                    # "result": null
+                    ok, value = self._value(final)
+                    if not ok:
+                        break
+                    self.meta[self.key] = value
+                    self._state = "member_end"
+                    continue
+                self._expect(ch, "[")
+                self._state = "item_or_end"
+            elif state == "item_or_end":
+                if ch == "]":
+                    self._pos += 1
+                    self._state = "member_end"
+                else:
+                    self._state = "item"
+            elif state == "item":
+                ok, value = self._value(final)
+                if not ok:
+                    break
+                items.append(value)
+                self._state = "item_end"
+            elif state == "item_end":
+                self._expect(ch, ",]")
+                self._state = "item" if ch == "," else "member_end"
+            elif state == "value":
+                ok, value = self._value(final)
+                if not ok:
+                    break
+                self.meta[self._member] = value
+                self._state = "member_end"
+            elif state == "member_end":
+                self._expect(ch, ",}")
+                self._state = "member" if ch == "," else "done"
+
+        if self._pos > _COMPACT_AT:
+            self._buf = self._buf[self._pos :]
+            self._pos = 0
+        return items
+
+
+def _page_payload(call_id: int, page_size: int, cursor: Optional[str]) -> dict:
+    params: dict[str, Any] = {"limit": page_size}
+    if cursor is not None:
+        params["cursor"] = cursor
+    return {"id": call_id, "method": "list_concepts", "params": params}
+
+
+def _finish_page(parser: JsonArrayStreamParser) -> Optional[str]:
+    if "error" in parser.meta:
+        raise HTTPError(f"error in list_concepts {parser.meta['error']}")
+    return parser.meta.get("next_cursor")
+
+
+class ConceptStream:
+    """Iterator over concept ids, read page by page from ``list_concepts``.
+
+    ``cursor`` is the cursor of the page currently being read; passing it back to
+    ``iter_concepts`` resumes from the start of that page. It is ``None`` once
+    the last page has been read.
+    """
+
+    def __init__(
+        self,
+        open_page: Callable[[Optional[str]], Iterator[bytes]],
+        cursor: Optional[str] = None,
+    ) -> None:
+        self.open_page = open_page
+        self.cursor = cursor
+        self.count = 0
+        self._items = self._run()
+
+    def __iter__(self) -> "ConceptStream":
+        return self
+
+    def __next__(self) -> str:
+        return next(self._items)
+
+    def _run(self) -> Iterator[str]:
+        while True:
+            parser = JsonArrayStreamParser("result")
+            for chunk in self.open_page(self.cursor):
+                for item in parser.feed(chunk):
+                    self.count += 1
+                    yield item
+            for item in parser.close():
+                self.count += 1
+                yield item
+
+            self.cursor = _finish_page(parser)
+            if not self.cursor:
+                return
+
+
+class AsyncConceptStream:
+    """asyncio variant of ``ConceptStream``."""
+
+    def __init__(
+        self,
+        open_page: Callable[[Optional[str]], AsyncIterator[bytes]],
+        cursor: Optional[str] = None,
+    ) -> None:
+        self.open_page = open_page
+        self.cursor = cursor
+        self.count = 0
+        self._items = self._run()
+
+    def __aiter__(self) -> "AsyncConceptStream":
+        return self
+
+    async def __anext__(self) -> str:
+        return await self._items.__anext__()
+
+    async def _run(self) -> AsyncIterator[str]:
+        while True:
+            parser = JsonArrayStreamParser("result")
+            async for chunk in self.open_page(self.cursor):
+                for item in parser.feed(chunk):
+                    self.count += 1
+                    yield item
+            for item in parser.close():
+                self.count += 1
+                yield item
+
+            self.cursor = _finish_page(parser)
+            if not self.cursor:
+                return
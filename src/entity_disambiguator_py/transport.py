@@ -0,0 +1,120 @@
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import AuthBase
+from requests.models import Response
+
+from entity_disambiguator_py.compression import CompressionPolicy, decode_response
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 3.05
+DEFAULT_READ_TIMEOUT = 30.0
+
+
+class TransportClosed(Exception):
+    def __init__(self):
+        self.message = "transport has been closed"
+        super().__init__(self.message)
+
+
+class LambdaTransport:
+    """Keep-alive connection pool shared by every RPC of a client.
+
+    Cookies are never stored so the session holds no mutable per-request state and
+    can be shared across threads; with ``pool_block`` threads wait for a free
+    connection rather than opening more than ``pool_maxsize`` per host.
+
+    With ``compression`` the bodies of non-streamed POSTs are encoded and decoded
+    here, and the response gets a ``wire`` attribute with their sizes as sent.
+    """
+
+    def __init__(
+        self,
+        auth: Optional[AuthBase],
+        headers: dict[str, str],
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        pool_block: bool = True,
+        compression: Optional[CompressionPolicy] = None,
+    ) -> None:
+        self.auth = auth
+        self.headers = headers
+        self.compression = compression
+        self.timeout = (connect_timeout, read_timeout)
+
+        self._session = requests.Session()
+        self._session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_retries=0,
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        data: Optional[bytes | str] = None,
+        stream: bool = False,
+        headers: Optional[dict[str, str]] = None,
+    ) -> Response:
+        if self._closed:
+            raise TransportClosed()
+
+        return self._session.request(
+            method,
+            url,
+            auth=self.auth,
+            headers=headers if headers is not None else self.headers,
+            data=data,
+            timeout=self.timeout,
+            stream=stream,
+        )
+
+    def get(self, url: str) -> Response:
+        return self.request("GET", url)
+
+    def post(self, url: str, data: bytes | str, stream: bool = False) -> Response:
+        if stream or self.compression is None:
+            return self.request("POST", url, data=data, stream=stream)
+
+        body = data.encode() if isinstance(data, str) else data
+        body, headers = self.compression.prepare(body, self.headers)
+        # read without urllib3 decoding it so the size on the wire is known
+        r = self.request("POST", url, data=body, stream=True, headers=headers)
+        raw = r.raw.read(decode_content=False)
+        content, wire = decode_response(r.headers.get("Content-Encoding"), raw, len(body))
+        # what Response.content would have read
+        r._content = content
+        r._content_consumed = True
+        r.wire = wire
+        return r
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._session.close()
+
+    def __enter__(self) -> "LambdaTransport":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,268 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from entity_disambiguator_py.batching import afan_out, chunked, fan_out
+from entity_disambiguator_py.model import GraphTraversalResponse, Relationship
+
+DEFAULT_WALKER_MAXSIZE = 100_000
+
+Adjacency = tuple[tuple[str, ...], tuple[str, ...]]
+
+
+@dataclass
+class Traversal:
+    """Result of a walk: edges as (parent, child) in discovery order and node depths.
+
+    ``truncated`` is set when ``max_nodes`` stopped the walk before ``depth_limit``.
+    """
+
+    edges: list[tuple[str, str]] = field(default_factory=list)
+    depths: dict[str, int] = field(default_factory=dict)
+    truncated: bool = False
+    requests: int = 0
+
+    def to_response(self, call_id: int) -> GraphTraversalResponse:
+        edges = [Relationship.model_construct(parent=p, child=c) for p, c in self.edges]
+        return GraphTraversalResponse.model_construct(id=call_id, edges=edges)
+
+
+class _Walk:
+    """Level synchronous BFS state; the walker fetches ``missing()`` before each ``advance()``."""
+
+    def __init__(
+        self,
+        walker: "GraphWalker",
+        start_nodes: list[str],
+        sort_prefix: str,
+        up: bool,
+        down: bool,
+        depth_limit: Optional[int],
+        max_nodes: Optional[int],
+    ) -> None:
+        self.walker = walker
+        self.sort_prefix = sort_prefix
+        self.up = up
+        self.down = down
+        self.depth_limit = depth_limit if depth_limit is not None and depth_limit >= 0 else None
+        self.max_nodes = max_nodes
+
+        self.frontier = list(dict.fromkeys(start_nodes))
+        self.result = Traversal(depths={n: 0 for n in self.frontier})
+        self.depth = 0
+        # parents and children of the frontier, kept here so memo evictions cannot lose them
+        self.level: dict[str, Adjacency] = {}
+        self._seen_edges: set[tuple[str, str]] = set()
+
+    @property
+    def active(self) -> bool:
+        if not self.frontier or self.result.truncated:
+            return False
+        return self.depth_limit is None or self.depth < self.depth_limit
+
+    def missing(self) -> list[str]:
+        return [n for n in self.frontier if not self.walker._recall(n, self.sort_prefix, self)]
+
+    def advance(self) -> None:
+        depths = self.result.depths
+        next_frontier = []
+        for node in self.frontier:
+            parents, children = self.level.get(node, ((), ()))
+            for others, reverse in (
+                (parents if self.up else (), True),
+                (children if self.down else (), False),
+            ):
+                for other in others:
+                    if other not in depths:
+                        if self.max_nodes is not None and len(depths) >= self.max_nodes:
+                            self.result.truncated = True
+                            continue
+                        depths[other] = self.depth + 1
+                        next_frontier.append(other)
+
+                    edge = (other, node) if reverse else (node, other)
+                    if edge not in self._seen_edges:
+                        self._seen_edges.add(edge)
+                        self.result.edges.append(edge)
+
+        self.frontier = next_frontier
+        self.level = {}
+        self.depth += 1
+
+
+class _WalkerBase:
+    def __init__(
+        self,
+        client,
+        chunk_size: Optional[int] = None,
+        parallelism: Optional[int] = None,
+        maxsize: int = DEFAULT_WALKER_MAXSIZE,
+    ) -> None:
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+
+        self.client = client
+        self.chunk_size = chunk_size or client.batch_chunk_size
+        self.parallelism = parallelism or client.batch_parallelism
+        self.maxsize = maxsize
+
+        # (node, sort_prefix) -> parent and child ids, filled by any walk, least recent first
+        self._parents: OrderedDict[tuple[str, str], tuple[str, ...]] = OrderedDict()
+        self._children: OrderedDict[tuple[str, str], tuple[str, ...]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._parents.clear()
+            self._children.clear()
+
+    def _recall(self, node: str, sort_prefix: str, walk: _Walk) -> bool:
+        """Copy the memoized adjacency of ``node`` into the walk, if all of it is known."""
+        key = (node, sort_prefix)
+        with self._lock:
+            if (walk.up and key not in self._parents) or (walk.down and key not in self._children):
+                return False
+            walk.level[node] = (
+                _touch(self._parents, key) if walk.up else (),
+                _touch(self._children, key) if walk.down else (),
+            )
+            return True
+
+    def _walk(self, start_nodes, sort_prefix, up, down, depth_limit, max_nodes) -> _Walk:
+        return _Walk(self, start_nodes, sort_prefix, up, down, depth_limit, max_nodes)
+
+    def _method(self, walk: _Walk) -> str:
+        # one get_neighbors answers both directions of a subgraph walk
+        if walk.up and walk.down:
+            return "get_neighbors"
+        return "get_parents" if walk.up else "get_children"
+
+    def _queue(self, batch, method: str, nodes: list[str], sort_prefix: str) -> list:
+        return [getattr(batch, method)(node, sort_prefix) for node in nodes]
+
+    def _store(self, walk: _Walk, method: str, nodes: list[str], calls: list) -> None:
+        with self._lock:
+            for node, call in zip(nodes, calls):
+                key = (node, walk.sort_prefix)
+                rows = call.result().result
+                parents: tuple[str, ...] = ()
+                children: tuple[str, ...] = ()
+                if method != "get_children":
+                    parents = tuple(r.parent for r in rows if r.child == node)
+                    self._remember(self._parents, key, parents)
+                if method != "get_parents":
+                    children = tuple(r.child for r in rows if r.parent == node)
+                    self._remember(self._children, key, children)
+                walk.level[node] = (parents, children)
+
+    def _remember(self, memo: OrderedDict, key: tuple[str, str], ids: tuple[str, ...]) -> None:
+        memo[key] = ids
+        memo.move_to_end(key)
+        while len(memo) > self.maxsize:
+            memo.popitem(last=False)
+
+
+def _touch(memo: OrderedDict, key: tuple[str, str]) -> tuple[str, ...]:
+    memo.move_to_end(key)
+    return memo[key]
+
+
+class GraphWalker(_WalkerBase):
+    """Multi-hop traversals built from single-hop lookups of a client.
+
+    Every BFS level sends the adjacency lookups of the whole frontier as JSON-RPC
+    batches of ``chunk_size`` nodes, ``parallelism`` at a time. The adjacency of
+    the ``maxsize`` most recently used nodes is memoized across walks, so shared
+    ancestry is fetched once.
+    """
+
+    def walk(
+        self,
+        start_nodes: list[str],
+        sort_prefix: str,
+        up: bool = True,
+        down: bool = False,
+        depth_limit: Optional[int] = None,
+        max_nodes: Optional[int] = None,
+    ) -> Traversal:
+        walk = self._walk(start_nodes, sort_prefix, up, down, depth_limit, max_nodes)
+        method = self._method(walk)
+        while walk.active:
+            missing = walk.missing()
+            if missing:
+                chunks = chunked(missing, self.chunk_size)
+                fan_out(lambda c: self._fetch(walk, method, c), chunks, self.parallelism)
+                walk.result.requests += len(chunks)
+            walk.advance()
+        return walk.result
+
+    def _fetch(self, walk: _Walk, method: str, nodes: list[str]) -> None:
+        with self.client.batch(parallelism=1) as batch:
+            calls = self._queue(batch, method, nodes, walk.sort_prefix)
+        self._store(walk, method, nodes, calls)
+
+    def get_ancestors(
+        self, umls_id: str, sort_prefix: str, depth_limit: Optional[int] = None
+    ) -> GraphTraversalResponse:
+        traversal = self.walk([umls_id], sort_prefix, True, False, depth_limit)
+        return traversal.to_response(self.client.call_id)
+
+    def get_descendants(
+        self, umls_id: str, sort_prefix: str, depth_limit: Optional[int] = None
+    ) -> GraphTraversalResponse:
+        traversal = self.walk([umls_id], sort_prefix, False, True, depth_limit)
+        return traversal.to_response(self.client.call_id)
+
+    def get_subgraph(
+        self, umls_id: str, sort_prefix: str, depth_limit: Optional[int] = None
+    ) -> GraphTraversalResponse:
+        traversal = self.walk([umls_id], sort_prefix, True, True, depth_limit)
+        return traversal.to_response(self.client.call_id)
+
+
+class AsyncGraphWalker(_WalkerBase):
+    """asyncio variant of ``GraphWalker``."""
+
+    async def walk(
+        self,
+        start_nodes: list[str],
+        sort_prefix: str,
+        up: bool = True,
+        down: bool = False,
+        depth_limit: Optional[int] = None,
+        max_nodes: Optional[int] = None,
+    ) -> Traversal:
+        walk = self._walk(start_nodes, sort_prefix, up, down, depth_limit, max_nodes)
+        method = self._method(walk)
+        while walk.active:
+            missing = walk.missing()
+            if missing:
+                chunks = chunked(missing, self.chunk_size)
+                await afan_out(lambda c: self._fetch(walk, method, c), chunks, self.parallelism)
+                walk.result.requests += len(chunks)
+            walk.advance()
+        return walk.result
+
+    async def _fetch(self, walk: _Walk, method: str, nodes: list[str]) -> None:
+        async with self.client.batch(parallelism=1) as batch:
+            calls = self._queue(batch, method, nodes, walk.sort_prefix)
+        self._store(walk, method, nodes, calls)
+
+    async def get_ancestors(
+        self, umls_id: str, sort_prefix: str, depth_limit: Optional[int] = None
+    ) -> GraphTraversalResponse:
+        traversal = await self.walk([umls_id], sort_prefix, True, False, depth_limit)
+        return traversal.to_response(self.client.call_id)
+
+    async def get_descendants(
+        self, umls_id: str, sort_prefix: str, depth_limit: Optional[int] = None
+    ) -> GraphTraversalResponse:
+        traversal = await self.walk([umls_id], sort_prefix, False, True, depth_limit)
+        return traversal.to_response(self.client.call_id)
+
+    async def get_subgraph(
+        self, umls_id: str, sort_prefix: str, depth_limit: Optional[int] = None
+    ) -> GraphTraversalResponse:
+        traversal = await self.walk([umls_id], sort_prefix, True, True, depth_limit)
+        return traversal.to_response(self.client.call_id)
@@ -52,3 +52,42 @@ class UMLSSynonymInterface(Protocol):
 class UMLSDbInterface(
     UMLSGraphInterface, UMLSVocabularyInterface, UMLSSynonymInterface, Protocol
 ): ...
+
+
+@runtime_checkable
+class AsyncUMLSGraphInterface(Protocol):
+    async def get_parents(self, umls_id: str, sort_prefix: str) -> GetNeighborsResponse: ...
+    async def get_children(self, umls_id: str, sort_prefix: str) -> GetNeighborsResponse: ...
+    async def get_neighbors(self, umls_id: str, sort_prefix: str) -> GetNeighborsResponse: ...
+    async def get_ancestors(
+        self, umls_id: str, sort_prefix: str, depth_limit: int
+    ) -> GraphTraversalResponse: ...
+    async def get_descendants(
+        self, umls_id: str, sort_prefix: str, depth_limit: int
+    ) -> GraphTraversalResponse: ...
+    async def get_subgraph(
+        self, umls_id: str, sort_prefix: str, depth_limit: int
+    ) -> GraphTraversalResponse: ...
+
+
+@runtime_checkable
+class AsyncUMLSVocabularyInterface(Protocol):
+    async def get_alias_id(self, alias_id: str) -> GetAliasResponse: ...
+    async def get_batch_alias_id(self, alias_ids: list[str]) -> BatchGetAliasResponse: ...
+    async def get_alias_name(self, name: str) -> GetAliasNameResponse: ...
+    async def get_batch_alias_name(self, names: list[str]) -> BatchGetAliasNameResponse: ...
+    async def get_concept(self, concept_id: str) -> GetConceptResponse: ...
+    async def get_type_definition(self, tui: str) -> GetTypeDefinitionResponse: ...
+    async def get_batch_concept(self, concept_ids: list[str]) -> BatchGetConceptResponse: ...
+
+
+@runtime_checkable
+class AsyncUMLSSynonymInterface(Protocol):
+    async def get_synonym_set(self, ssid: str) -> SynonymSetResponse: ...
+    async def get_canonical_synonyms(self, cid: str) -> CanonicalSynonymsResponse: ...
+
+
+@runtime_checkable
+class AsyncUMLSDbInterface(
+    AsyncUMLSGraphInterface, AsyncUMLSVocabularyInterface, AsyncUMLSSynonymInterface, Protocol
+): ...
@@ -0,0 +1,296 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from entity_disambiguator_py.model import DocDBRelationship
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WRITE_BATCH_SIZE = 100
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_DEDUPE_WINDOW = 100_000
+
+Triple = tuple[str, str, str]
+
+
+def _triple(relationship: DocDBRelationship) -> Triple:
+    return relationship.parent, relationship.child, relationship.rel_type
+
+
+@dataclass(frozen=True)
+class WriteFailure:
+    relationship: DocDBRelationship
+    error: BaseException
+
+
+@dataclass(frozen=True)
+class WriterStats:
+    added: int
+    duplicates: int
+    written: int
+    failed: int
+    batches: int
+    pending: int
+
+
+class _Spool:
+    """Append-only journal of added and finished triples, replayed after a crash."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+
+    def replay(self) -> list[DocDBRelationship]:
+        pending: dict[Triple, DocDBRelationship] = {}
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # the last line of a crashed run may be cut short
+                    continue
+                if "add" in entry:
+                    relationship = DocDBRelationship.model_validate(entry["add"])
+                    pending[_triple(relationship)] = relationship
+                else:
+                    pending.pop(tuple(entry["done"]), None)
+        return list(pending.values())
+
+    def add(self, relationship: DocDBRelationship) -> None:
+        self.file.write(json.dumps({"add": relationship.model_dump()}) + "\n")
+        self.file.flush()
+
+    def done(self, triples: list[Triple]) -> None:
+        self.file.writelines(json.dumps({"done": list(t)}) + "\n" for t in triples)
+        self.file.flush()
+
+    def compact(self, keep: list[DocDBRelationship]) -> None:
+        self.file.close()
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps({"add": r.model_dump()}) + "\n" for r in keep)
+        os.replace(tmp, self.path)
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class RelationshipWriter:
+    """Write-behind buffer for ``create_relationship``.
+
+    Added relationships are deduplicated by (parent, child, rel_type) against
+    the ones still buffered or in flight and the last ``dedupe_window`` written
+    ones, so a long-lived writer stays bounded. They are sent as JSON-RPC batches of ``batch_size`` once that many are buffered or the oldest
+    has waited ``flush_interval`` seconds, with up to ``parallelism`` batches in
+    flight. ``flush()`` returns the failures of the items it wrote. With ``spool``
+    every item is journaled to that file until written, or until a flush has
+    returned its failure, and items left over by a crashed run are queued again
+    when the writer is opened.
+    """
+
+    def __init__(
+        self,
+        client,
+        batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+        flush_interval: Optional[float] = DEFAULT_FLUSH_INTERVAL,
+        parallelism: Optional[int] = None,
+        spool: Optional[str | os.PathLike] = None,
+        dedupe_window: int = DEFAULT_DEDUPE_WINDOW,
+    ) -> None:
+        if batch_size <= 0:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+        if dedupe_window < 0:
+            raise ValueError(f"dedupe_window must not be negative, got {dedupe_window}")
+
+        self.client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.parallelism = parallelism or client.batch_parallelism
+        self.dedupe_window = dedupe_window
+
+        self._lock = threading.Condition()
+        self._buffer: list[DocDBRelationship] = []
+        self._oldest: Optional[float] = None
+        # triples buffered or in flight, and the most recently written ones
+        self._unwritten: set[Triple] = set()
+        self._written_recently: OrderedDict[Triple, None] = OrderedDict()
+        self._in_flight: set[Future] = set()
+        self._sending = 0
+        self._slots = threading.BoundedSemaphore(self.parallelism)
+        self._executor = ThreadPoolExecutor(self.parallelism, thread_name_prefix="writer")
+        self._failures: list[WriteFailure] = []
+        self._closed = False
+
+        self._added = 0
+        self._duplicates = 0
+        self._written = 0
+        self._failed = 0
+        self._batches = 0
+
+        self._spool: Optional[_Spool] = None
+        if spool is not None:
+            self._spool = _Spool(Path(spool))
+            recovered = self._spool.replay()
+            if recovered:
+                logger.info(f"requeueing {len(recovered)} relationships from {spool}")
+            self._spool.compact(recovered)
+            for relationship in recovered:
+                self._buffer_item(relationship)
+
+        self._timer: Optional[threading.Thread] = None
+        if flush_interval is not None:
+            self._timer = threading.Thread(target=self._flush_on_time, daemon=True)
+            self._timer.start()
+
+    def __enter__(self) -> "RelationshipWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add(self, relationship: DocDBRelationship) -> bool:
+        """Buffer ``relationship``; ``False`` when the same triple was already added."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("writer is closed")
+            triple = _triple(relationship)
+            if triple in self._unwritten or triple in self._written_recently:
+                self._duplicates += 1
+                return False
+            if self._spool is not None:
+                self._spool.add(relationship)
+            self._buffer_item(relationship)
+            batch = self._take(full_only=True)
+            self._lock.notify_all()
+
+        if batch:
+            self._submit(batch)
+        return True
+
+    def add_many(self, relationships: list[DocDBRelationship]) -> int:
+        return sum(self.add(r) for r in relationships)
+
+    def flush(self) -> list[WriteFailure]:
+        """Send everything buffered, wait for it and return the failures since the last flush."""
+        while True:
+            with self._lock:
+                batch = self._take(full_only=False)
+            if not batch:
+                break
+            self._submit(batch)
+
+        with self._lock:
+            # also waits for batches another thread has taken but not submitted yet
+            while self._in_flight or self._sending:
+                self._lock.wait()
+            failures, self._failures = self._failures, []
+            if self._spool is not None and not self._buffer and not self._sending:
+                # only failed items still need the journal
+                self._spool.compact([f.relationship for f in failures])
+        return failures
+
+    def close(self) -> list[WriteFailure]:
+        if self._closed:
+            return []
+        failures = self.flush()
+        with self._lock:
+            self._closed = True
+            self._lock.notify_all()
+        self._executor.shutdown(wait=True)
+        if self._spool is not None:
+            self._spool.close()
+        for failure in failures:
+            logger.warning(f"could not create {_triple(failure.relationship)}: {failure.error}")
+        return failures
+
+    def stats(self) -> WriterStats:
+        with self._lock:
+            return WriterStats(
+                added=self._added,
+                duplicates=self._duplicates,
+                written=self._written,
+                failed=self._failed,
+                batches=self._batches,
+                pending=len(self._buffer) + self._sending,
+            )
+
+    def _buffer_item(self, relationship: DocDBRelationship) -> None:
+        self._unwritten.add(_triple(relationship))
+        self._buffer.append(relationship)
+        self._added += 1
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+
+    def _take(self, full_only: bool) -> list[DocDBRelationship]:
+        if not self._buffer or (full_only and len(self._buffer) < self.batch_size):
+            return []
+        batch = self._buffer[: self.batch_size]
+        del self._buffer[: self.batch_size]
+        self._oldest = time.monotonic() if self._buffer else None
+        # counted from here, so a flush never compacts the journal of a batch
+        # that is out of the buffer but not yet in flight
+        self._sending += len(batch)
+        return batch
+
+    def _submit(self, batch: list[DocDBRelationship]) -> None:
+        # blocks the producer while ``parallelism`` batches are already in flight
+        self._slots.acquire()
+        with self._lock:
+            future = self._executor.submit(self._send, batch)
+            self._in_flight.add(future)
+            self._batches += 1
+        future.add_done_callback(self._finished)
+
+    def _finished(self, future: Future) -> None:
+        self._slots.release()
+        with self._lock:
+            self._in_flight.discard(future)
+            self._lock.notify_all()
+
+    def _send(self, batch: list[DocDBRelationship]) -> None:
+        try:
+            with self.client.batch(parallelism=1) as rpc:
+                calls = [rpc.create_relationship(r) for r in batch]
+            errors = [call.error() for call in calls]
+        except Exception as e:
+            errors = [e] * len(batch)
+
+        written = [_triple(r) for r, e in zip(batch, errors) if e is None]
+        failures = [WriteFailure(r, e) for r, e in zip(batch, errors) if e is not None]
+        with self._lock:
+            self._sending -= len(batch)
+            self._written += len(written)
+            self._failed += len(failures)
+            self._failures.extend(failures)
+            # a failed triple may be added again to retry it
+            self._unwritten.difference_update(_triple(r) for r in batch)
+            for triple in written:
+                self._written_recently[triple] = None
+                self._written_recently.move_to_end(triple)
+            while len(self._written_recently) > self.dedupe_window:
+                self._written_recently.popitem(last=False)
+            if self._spool is not None and written:
+                self._spool.done(written)
+
+    def _flush_on_time(self) -> None:
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                due = None
+                if self._oldest is not None:
+                    due = self._oldest + self.flush_interval - time.monotonic()
+                if due is None or due > 0:
+                    self._lock.wait(timeout=due if due is not None else self.flush_interval)
+                    continue
+                batch = self._take(full_only=False)
+            if batch:
+                self._submit(batch)
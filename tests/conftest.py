@@ -0,0 +1,60 @@
+import httpx
+import pytest
+
+from entity_disambiguator_py.async_client import AsyncEntityDisambiguatorLambdaClient
+from entity_disambiguator_py.auth import UnsignedAuth
+from entity_disambiguator_py.client import EntityDisambiguatorLambdaClient
+
+# the url of clients whose requests are answered by a fake transport
+FAKE_URL = "https://lambda.test"
+
+
+class StreamingMockTransport(httpx.MockTransport):
+    """``httpx.MockTransport`` whose responses stream their bodies like a connection.
+
+    Responses built from bytes are read by httpx as they are created, so the
+    client would find their stream consumed.
+    """
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await super().handle_async_request(request)
+        content = await response.aread()
+
+        async def body():
+            yield content
+
+        return httpx.Response(
+            response.status_code, headers=response.headers, content=body(), request=request
+        )
+
+
+@pytest.fixture
+def make_client():
+    """Builds unsigned clients for ``url``, e.g. of a stand-in server.
+
+    With ``transport``, a fake with ``post(url, data)``, requests never leave the
+    process.
+    """
+
+    def make(url: str = FAKE_URL, transport=None, **kwargs) -> EntityDisambiguatorLambdaClient:
+        kwargs.setdefault("auth", UnsignedAuth())
+        client = EntityDisambiguatorLambdaClient(url, "local", **kwargs)
+        if transport is not None:
+            client.transport = transport
+        return client
+
+    return make
+
+
+@pytest.fixture
+def make_async_client():
+    """Builds unsigned async clients whose requests ``handler`` answers, see ``make_client``."""
+
+    def make(handler=None, url: str = FAKE_URL, **kwargs) -> AsyncEntityDisambiguatorLambdaClient:
+        kwargs.setdefault("auth", UnsignedAuth())
+        client = AsyncEntityDisambiguatorLambdaClient(url, "local", **kwargs)
+        if handler is not None:
+            client.http = httpx.AsyncClient(transport=StreamingMockTransport(handler))
+        return client
+
+    return make
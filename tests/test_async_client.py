@@ -0,0 +1,87 @@
+import asyncio
+import json
+import threading
+
+import httpx
+import pytest
+
+from entity_disambiguator_py.auth import LazySigV4Auth
+from entity_disambiguator_py.typing import AsyncUMLSDbInterface
+
+
+class _Credentials:
+    def get_frozen_credentials(self):
+        from botocore.credentials import ReadOnlyCredentials
+
+        return ReadOnlyCredentials("AKIDEXAMPLE", "secret", "token")
+
+
+@pytest.fixture
+def make_signed_client(make_async_client):
+    auth = LazySigV4Auth("ca-central-1", credentials_provider=_Credentials)
+    return lambda handler, **kwargs: make_async_client(handler, auth=auth, **kwargs)
+
+
+def test_satisfies_async_protocol(make_signed_client):
+    client = make_signed_client(lambda r: httpx.Response(200))
+    assert isinstance(client, AsyncUMLSDbInterface)
+
+
+def test_requests_are_signed_and_bounded(make_signed_client):
+    in_flight = 0
+    peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        assert request.headers["Authorization"].startswith("AWS4-HMAC-SHA256")
+        assert request.headers["X-Amz-Security-Token"] == "token"
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        cid = json.loads(request.content)["params"]["id"]
+        body = {
+            "id": 1,
+            "result": {"concept_id": cid, "language": "ENG", "alias_list": [], "definition": None},
+        }
+        return httpx.Response(200, json=body)
+
+    async def run():
+        async with make_signed_client(handler, max_concurrency=5) as client:
+            ids = [f"C{i:07d}" for i in range(50)]
+            results = await asyncio.gather(*(client.get_concept(cid) for cid in ids))
+            return ids, results
+
+    ids, results = asyncio.run(run())
+    assert [r.result.concept_id for r in results] == ids
+    assert peak == 5
+
+
+def test_canonical_synonym_not_found(make_signed_client):
+    async def run():
+        async with make_signed_client(lambda r: httpx.Response(404)) as client:
+            return await client.get_canonical_synonym("not in graph")
+
+    r = asyncio.run(run())
+    assert r.result.synset_id == "-1"
+
+
+def test_credentials_are_resolved_off_the_event_loop(make_async_client):
+    threads = []
+
+    def provider():
+        threads.append(threading.current_thread())
+        return _Credentials()
+
+    auth = LazySigV4Auth("ca-central-1", credentials_provider=provider)
+    concept = {"concept_id": "C1", "language": "ENG", "alias_list": [], "definition": None}
+
+    async def run():
+        handler = lambda r: httpx.Response(200, json={"id": 1, "result": concept})
+        async with make_async_client(handler, auth=auth) as client:
+            for _ in range(3):
+                await client.get_concept("C1")
+
+    asyncio.run(run())
+    # later requests sign with the recently fetched credentials
+    assert len(threads) == 1 and threads[0] is not threading.main_thread()
@@ -0,0 +1,52 @@
+import subprocess
+import sys
+
+import requests
+from botocore.credentials import ReadOnlyCredentials
+
+from entity_disambiguator_py.auth import LazySigV4Auth, UnsignedAuth
+from entity_disambiguator_py.client import EntityDisambiguatorLambdaClient
+
+
+class _RotatingCredentials:
+    def __init__(self):
+        self.calls = 0
+
+    def get_frozen_credentials(self):
+        self.calls += 1
+        return ReadOnlyCredentials("AKIDEXAMPLE", "secret", f"token-{self.calls // 2}")
+
+
+def _prepared():
+    return requests.Request("POST", "https://lambda.test/api/rpc", data=b"{}").prepare()
+
+
+def test_client_import_does_not_load_boto3():
+    code = (
+        "import sys, entity_disambiguator_py.client;"
+        "print('boto3' in sys.modules, 'requests_aws4auth' in sys.modules)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ["False", "False"]
+
+
+def test_credentials_resolved_on_first_request_and_refreshed():
+    provided = []
+
+    def provider():
+        provided.append(_RotatingCredentials())
+        return provided[-1]
+
+    auth = LazySigV4Auth("ca-central-1", credentials_provider=provider)
+    client = EntityDisambiguatorLambdaClient("https://lambda.test", "ca-central-1", auth=auth)
+    assert client.auth is auth
+    assert provided == []
+
+    tokens = [auth(_prepared()).headers["x-amz-security-token"] for _ in range(4)]
+    assert len(provided) == 1
+    assert tokens == ["token-0", "token-1", "token-1", "token-2"]
+
+
+def test_unsigned_auth():
+    r = UnsignedAuth()(_prepared())
+    assert "Authorization" not in r.headers
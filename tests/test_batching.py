@@ -0,0 +1,65 @@
+import json
+import threading
+from types import SimpleNamespace
+
+from entity_disambiguator_py.batching import chunked, dedupe, merge_in_order
+from entity_disambiguator_py.client import fold_name
+
+
+class _Transport:
+    def __init__(self, known: set[str]):
+        self.known = known
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def post(self, url, data):
+        ids = json.loads(data)["params"]["ids"]
+        with self.lock:
+            self.batches.append(ids)
+        result = [
+            {"concept_id": cid, "language": "ENG", "alias_list": [], "definition": None}
+            for cid in reversed(ids)
+            if cid in self.known
+        ]
+        return SimpleNamespace(status_code=200, content=json.dumps({"id": 1, "result": result}))
+
+
+def test_helpers():
+    assert dedupe(["b", "a", "b", "c", "a"]) == ["b", "a", "c"]
+    assert chunked([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+
+    result, missing = merge_in_order([["a", "b"], ["c"]], [["a", "z", "y"], ["c"]], key=lambda x: x)
+    assert result == ["a", "c", "z", "y"]
+    assert missing == ["b"]
+
+    # results keyed differently than asked for are never paired by position
+    result, missing = merge_in_order([["a", "B", "C"]], [["a", "c", "b"]], key=lambda x: x)
+    assert result == ["a", "c", "b"] and missing == ["B", "C"]
+
+    # but match by the server's normalization
+    chunks, results = [["a", "B", "C", "c "]], [["a", "c", "b"]]
+    result, missing = merge_in_order(chunks, results, key=lambda x: x, normalize=fold_name)
+    assert result == ["a", "b", "c", "c"] and missing == []
+
+
+def test_batch_concept_is_chunked_and_ordered(make_client):
+    ids = [f"C{i:07d}" for i in range(1000)]
+    known = set(ids) - {"C0000007", "C0000500"}
+    client = make_client(batch_chunk_size=64, batch_parallelism=8)
+    client.transport = _Transport(known)
+
+    r = client.get_batch_concept(ids + ids[:10])
+
+    assert max(len(b) for b in client.transport.batches) == 64
+    assert sum(len(b) for b in client.transport.batches) == 1000
+    assert [c.concept_id for c in r.result] == [cid for cid in ids if cid in known]
+    assert r.missing == ["C0000007", "C0000500"]
+
+
+def test_empty_batch_makes_no_request(make_client):
+    client = make_client()
+    client.transport = _Transport(set())
+
+    r = client.get_batch_concept([])
+    assert r.result == [] and r.missing == []
+    assert client.transport.batches == []
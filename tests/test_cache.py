@@ -0,0 +1,206 @@
+import asyncio
+import json
+import multiprocessing
+import sqlite3
+import threading
+from types import SimpleNamespace
+
+import httpx
+
+from entity_disambiguator_py.cache import DiskCache, ResponseCache, TieredCache
+from entity_disambiguator_py.model import GetConceptResponse, MessageResponse
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class _Transport:
+    def __init__(self):
+        self.calls = []
+
+    def post(self, url, data):
+        payload = json.loads(data)
+        self.calls.append(payload["method"])
+        if payload["method"] == "reset_cache":
+            return SimpleNamespace(status_code=200, content=b"cache reset")
+
+        cid = payload["params"]["id"]
+        body = {
+            "id": 1,
+            "result": {"concept_id": cid, "language": "ENG", "alias_list": [], "definition": None},
+        }
+        return SimpleNamespace(status_code=200, content=json.dumps(body).encode())
+
+
+def test_lru_eviction():
+    cache = ResponseCache(maxsize=2)
+    cache.put("get_concept", "a", MessageResponse(message="a"))
+    cache.put("get_concept", "b", MessageResponse(message="b"))
+    assert cache.get("get_concept", "a") is not None
+    cache.put("get_concept", "c", MessageResponse(message="c"))
+
+    assert cache.get("get_concept", "b") is None
+    assert cache.get("get_concept", "a").message == "a"
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.size) == (2, 1, 1, 2)
+
+
+def test_per_method_ttl():
+    clock = _Clock()
+    cache = ResponseCache(ttl=100, method_ttls={"get_aliases": 1, "get_parents": 0}, clock=clock)
+    cache.put("get_concept", "a", MessageResponse(message="a"))
+    cache.put("get_aliases", "a", MessageResponse(message="a"))
+    cache.put("get_parents", "a", MessageResponse(message="a"))
+    assert len(cache) == 2
+
+    clock.now = 2
+    assert cache.get("get_aliases", "a") is None
+    assert cache.get("get_concept", "a") is not None
+    assert cache.stats().expirations == 1
+
+
+def test_client_returns_cached_model(make_client):
+    client = make_client(transport=_Transport(), cache=ResponseCache())
+    first = client.get_concept("C1453225")
+    second = client.get_concept("C1453225")
+
+    assert first is second
+    assert client.transport.calls == ["get_concept"]
+
+
+def test_reset_cache_flushes_local_cache(make_client):
+    cache = ResponseCache()
+    client = make_client(transport=_Transport(), cache=cache)
+    client.get_concept("C1453225")
+    client.reset_cache()
+    client.get_concept("C1453225")
+
+    assert client.transport.calls == ["get_concept", "reset_cache", "get_concept"]
+
+
+def test_disk_cache_round_trips_models(tmp_path):
+    cache = DiskCache(tmp_path / "cache.db")
+    concept = GetConceptResponse.model_validate(
+        {
+            "id": 1,
+            "result": {"concept_id": "C1", "language": "ENG", "alias_list": [], "definition": None},
+        }
+    )
+    cache.put("get_concept", "C1", concept)
+    cache.put("get_parents", ("C1", "PRED"), MessageResponse(message="p"))
+
+    reopened = DiskCache(tmp_path / "cache.db")
+    assert reopened.get("get_concept", "C1") == concept
+    assert reopened.get("get_parents", ("C1", "PRED")).message == "p"
+    assert reopened.get("get_parents", ("C1", "SYN")) is None
+    assert (reopened.stats().hits, reopened.stats().misses, len(reopened)) == (2, 1, 2)
+
+
+def test_disk_cache_drops_entries_it_cannot_read(tmp_path):
+    path = tmp_path / "cache.db"
+    cache = DiskCache(path)
+    for key in ["import", "zlib", "schema"]:
+        cache.put("get_concept", key, MessageResponse(message=key))
+
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE entries SET model = 'os:system' WHERE key = '\"import\"'")
+    conn.execute("UPDATE entries SET value = x'00' WHERE key = '\"zlib\"'")
+    conn.execute("UPDATE entries SET model = 'GetConceptResponse' WHERE key = '\"schema\"'")
+    conn.commit()
+    conn.close()
+
+    for key in ["import", "zlib", "schema"]:
+        assert cache.get("get_concept", key) is None
+    assert (cache.stats().misses, len(cache)) == (3, 0)
+
+
+def test_disk_cache_new_dataset_version_empties_it(tmp_path):
+    DiskCache(tmp_path / "cache.db", dataset_version="2024AA").put(
+        "get_concept", "a", MessageResponse(message="a")
+    )
+    assert len(DiskCache(tmp_path / "cache.db", dataset_version="2024AA")) == 1
+    assert len(DiskCache(tmp_path / "cache.db", dataset_version="2024AB")) == 0
+
+
+def test_disk_cache_ttl_and_size_cap(tmp_path):
+    clock = _Clock()
+    cache = DiskCache(
+        tmp_path / "cache.db", max_bytes=2_000, method_ttls={"get_aliases": 1}, clock=clock
+    )
+    cache.put("get_aliases", "a", MessageResponse(message="a"))
+    clock.now = 2
+    assert cache.get("get_aliases", "a") is None
+    assert cache.stats().expirations == 1
+
+    for i in range(200):
+        clock.now += 1
+        cache.put("get_concept", str(i), MessageResponse(message=f"message {i}"))
+    assert cache.size_bytes() <= 2_000
+    assert cache.stats().evictions > 0
+    assert cache.get("get_concept", "199") is not None
+    assert cache.get("get_concept", "0") is None
+
+
+def _fill_disk_cache(path, start):
+    cache = DiskCache(path)
+    for i in range(start, start + 100):
+        cache.put("get_concept", str(i), MessageResponse(message=str(i)))
+
+
+def test_disk_cache_is_shared_between_processes(tmp_path):
+    path = tmp_path / "cache.db"
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=_fill_disk_cache, args=(path, n * 100)) for n in range(3)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    assert [w.exitcode for w in workers] == [0, 0, 0]
+    cache = DiskCache(path)
+    assert len(cache) == 300
+    assert cache.get("get_concept", "250").message == "250"
+
+
+def test_tiered_cache_promotes_disk_hits(tmp_path, make_client):
+    disk = DiskCache(tmp_path / "cache.db")
+    make_client(transport=_Transport(), cache=disk).get_concept("C1453225")
+
+    memory = ResponseCache()
+    client = make_client(transport=_Transport(), cache=TieredCache(memory, disk))
+    client.get_concept("C1453225")
+    client.get_concept("C1453225")
+
+    assert client.transport.calls == []
+    assert (memory.stats().hits, disk.stats().hits) == (1, 1)
+    assert client.cache.stats().hits == 2
+
+    client.reset_cache()
+    assert (len(memory), len(disk)) == (0, 0)
+
+
+def test_async_client_keeps_disk_cache_off_the_loop(tmp_path, make_async_client):
+    threads = []
+
+    class _RecordingCache(DiskCache):
+        def get(self, method, key):
+            threads.append(threading.current_thread())
+            return super().get(method, key)
+
+    concept = {"concept_id": "C1", "language": "ENG", "alias_list": [], "definition": None}
+    handler = lambda r: httpx.Response(200, json={"id": 1, "result": concept})
+    cache = _RecordingCache(tmp_path / "cache.db")
+
+    async def run():
+        async with make_async_client(handler, cache=cache) as client:
+            return [await client.get_concept("C1") for _ in range(2)]
+
+    first, second = asyncio.run(run())
+    assert first == second
+    assert len(threads) == 2 and threading.main_thread() not in threads
+    cache.close()
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from requests.exceptions import HTTPError
+
+from entity_disambiguator_py.batching import AsyncCoalescer
+
+
+def _concept(cid: str) -> dict:
+    return {"concept_id": cid, "language": "ENG", "alias_list": [], "definition": None}
+
+
+class _Transport:
+    def __init__(self):
+        self.methods = []
+        self.lock = threading.Lock()
+
+    def post(self, url, data):
+        payload = json.loads(data)
+        with self.lock:
+            self.methods.append(payload["method"])
+
+        if payload["method"] == "batch_get_concept":
+            ids = payload["params"]["ids"]
+            if "BAD" in ids:
+                return SimpleNamespace(status_code=400, content=b"bad id")
+            if "BUSY" in ids:
+                return SimpleNamespace(status_code=503, content=b"busy")
+            body = {"id": 1, "result": [_concept(cid) for cid in ids if cid != "C404"]}
+        else:
+            cid = payload["params"]["id"]
+            if cid in ("BAD", "C404"):
+                status = 500 if cid == "BAD" else 404
+                return SimpleNamespace(status_code=status, content=b"error")
+            body = {"id": 1, "result": _concept(cid)}
+        return SimpleNamespace(status_code=200, content=json.dumps(body))
+
+    def close(self):
+        pass
+
+
+def test_concurrent_lookups_are_batched(make_client):
+    client = make_client(transport=_Transport(), coalesce_window=0.05, coalesce_max_batch_size=50)
+    ids = [f"C{i:07d}" for i in range(200)]
+    with ThreadPoolExecutor(max_workers=64) as pool:
+        results = list(pool.map(client.get_concept, ids))
+    stats = client.coalescer_stats()["get_concept"]
+    client.close()
+
+    assert [r.result.concept_id for r in results] == ids
+    assert stats.requests == 200
+    assert stats.max_batch_size <= 50
+    assert stats.batches < 200
+    assert set(client.transport.methods) == {"batch_get_concept"}
+
+
+def test_errors_are_isolated_per_caller(make_client):
+    client = make_client(transport=_Transport(), coalesce_window=0.05)
+    ids = ["C0000001", "BAD", "C404", "C0000002"]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(client.get_concept, cid) for cid in ids]
+    client.close()
+
+    assert futures[0].result().result.concept_id == "C0000001"
+    assert futures[3].result().result.concept_id == "C0000002"
+    with pytest.raises(HTTPError):
+        futures[1].result()
+    with pytest.raises(HTTPError):
+        futures[2].result()
+
+
+def test_overloaded_batches_are_not_split(make_client):
+    client = make_client(transport=_Transport(), coalesce_window=0.05)
+    ids = ["C0000001", "BUSY", "C0000002"]
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(client.get_concept, cid) for cid in ids]
+    client.close()
+
+    for future in futures:
+        with pytest.raises(HTTPError, match="503"):
+            future.result()
+    assert client.transport.methods == ["batch_get_concept"]
+
+
+def test_async_coalescer():
+    batches = []
+
+    async def fetch_batch(ids):
+        batches.append(ids)
+        return [SimpleNamespace(id=i) for i in ids]
+
+    async def run():
+        coalescer = AsyncCoalescer("batch", fetch_batch, key=lambda x: x.id, window=0.01)
+        results = await asyncio.gather(*(coalescer.get(str(i % 30)) for i in range(60)))
+        await coalescer.aclose()
+        return coalescer, results
+
+    coalescer, results = asyncio.run(run())
+    assert [r.id for r in results] == [str(i % 30) for i in range(60)]
+    assert len(batches) == 1 and len(batches[0]) == 30
+    assert coalescer.stats().mean_batch_size == 30
@@ -0,0 +1,100 @@
+import asyncio
+import json
+
+import pytest
+
+from entity_disambiguator_py.compression import (
+    CODECS,
+    CompressionPolicy,
+    UnsupportedEncoding,
+    compress,
+    decompress,
+)
+from entity_disambiguator_py.instrumentation import Instrumentation
+from entity_disambiguator_py.stand_in import StandInServer, SyntheticUMLS
+
+
+@pytest.fixture(scope="module")
+def server():
+    with StandInServer(SyntheticUMLS(num_concepts=400, cross_edges=0)) as s:
+        yield s
+
+
+def test_codecs_round_trip_and_stack():
+    data = json.dumps([{"parent": f"C{i // 4:07d}", "child": f"C{i:07d}"} for i in range(500)])
+    data = data.encode()
+    for name in CODECS:
+        assert decompress(name, compress(name, data)) == data
+    assert decompress("gzip, gzip", compress("gzip", compress("gzip", data))) == data
+    assert decompress(None, data) == decompress("identity", data) == data
+    with pytest.raises(UnsupportedEncoding):
+        decompress("lzma", data)
+
+
+def test_policy_compresses_only_large_request_bodies():
+    with pytest.raises(ValueError):
+        CompressionPolicy(accept=("lzma",))
+    assert CompressionPolicy(accept=()).accept_encoding == "identity"
+
+    policy = CompressionPolicy(request_encoding="gzip", min_request_bytes=100)
+    headers = {"Content-Type": "application/json"}
+    body, small = policy.prepare(b"x" * 99, headers)
+    assert body == b"x" * 99 and "Content-Encoding" not in small
+    body, large = policy.prepare(b"x" * 100, headers)
+    assert large["Content-Encoding"] == "gzip" and decompress("gzip", body) == b"x" * 100
+    assert large["Accept-Encoding"] == policy.accept_encoding
+    assert headers == {"Content-Type": "application/json"}
+
+
+def test_responses_are_negotiated_and_metered(server, make_client):
+    instrumentation = Instrumentation()
+    with make_client(server.url, instrumentation=instrumentation) as client:
+        assert client.headers["Accept"] == "application/json"
+        subgraph = client.get_subgraph("C0000000", "PRED")
+        client.get_concept("C0000001")
+    with make_client(server.url, compression=CompressionPolicy(accept=())) as client:
+        plain = client.get_subgraph("C0000000", "PRED")
+
+    assert subgraph == plain and len(subgraph.edges) == 399
+    stats = instrumentation.snapshot()
+    graph = stats["get_subgraph"]
+    assert graph.encodings == {next(iter(CODECS)): 1}
+    assert graph.response_wire_bytes.sum * 4 < graph.response_bytes.sum
+    assert graph.compression_ratio > 4 and graph.bytes_saved > 0
+    assert graph.decompress_time.count == 1
+    # small bodies are not worth compressing
+    assert stats["get_concept"].encodings == {"identity": 1}
+    assert stats["get_concept"].bytes_saved == 0
+
+
+def test_large_request_bodies_are_compressed(server, make_client):
+    ids = server.data.concept_ids[:300]
+    policy = CompressionPolicy(request_encoding="gzip", min_request_bytes=1024)
+    instrumentation = Instrumentation()
+    before = server.compressed_requests
+    with make_client(server.url, compression=policy, instrumentation=instrumentation) as client:
+        concepts = client.get_batch_concept(ids, chunk_size=300).result
+        client.get_concept("C0000001")
+
+    assert [c.concept_id for c in concepts] == ids
+    assert server.compressed_requests == before + 1
+    batch = instrumentation.snapshot()["batch_get_concept"]
+    assert batch.request_wire_bytes.sum * 2 < batch.request_bytes.sum
+
+
+def test_async_client_negotiates_compression(server, make_async_client):
+    instrumentation = Instrumentation()
+    policy = CompressionPolicy(request_encoding="gzip", min_request_bytes=0)
+
+    async def run():
+        async with make_async_client(
+            url=server.url, instrumentation=instrumentation, compression=policy
+        ) as client:
+            return await client.get_subgraph("C0000000", "PRED")
+
+    before = server.compressed_requests
+    subgraph = asyncio.run(run())
+    assert len(subgraph.edges) == 399
+    assert server.compressed_requests == before + 1
+    graph = instrumentation.snapshot()["get_subgraph"]
+    assert graph.compression_ratio > 4 and graph.decompress_time.count == 1
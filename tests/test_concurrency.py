@@ -0,0 +1,171 @@
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from entity_disambiguator_py.concurrency import (
+    AdaptiveLimiter,
+    TokenBucket,
+    latency_class,
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class _Transport:
+    """Answers every call after ``delay`` seconds and records the peak concurrency."""
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def post(self, url, data):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+        ids = json.loads(data)["params"]["ids"]
+        concepts = [
+            {"concept_id": i, "language": "ENG", "alias_list": [], "definition": None} for i in ids
+        ]
+        body = {"id": 1, "result": concepts}
+        return SimpleNamespace(status_code=200, content=json.dumps(body).encode())
+
+
+def _fill(limiter):
+    for _ in range(limiter.limit):
+        limiter.acquire()
+
+
+def test_limit_grows_only_while_saturated():
+    limiter = AdaptiveLimiter(initial_limit=2, clock=_Clock())
+    limiter.acquire()
+    limiter.release("get_concept", 0.01, 200)
+    assert limiter.limit == 2
+
+    for _ in range(4):
+        _fill(limiter)
+        for _ in range(2):
+            limiter.release("get_concept", 0.01, 200)
+    assert limiter.limit == 3
+
+
+def test_overload_decreases_once_per_round_trip():
+    clock = _Clock()
+    limiter = AdaptiveLimiter(initial_limit=10, backoff=0.5, clock=clock)
+    _fill(limiter)
+    for _ in range(3):
+        limiter.release("get_concept", 0.2, 429)
+    assert limiter.limit == 5
+
+    clock.now = 1.0
+    limiter.release("get_concept", 0.2, 503)
+    stats = limiter.stats()
+    assert (stats.limit, stats.overloads, stats.decreases, stats.in_flight) == (2, 4, 2, 6)
+
+
+def test_latency_gradient_is_per_method():
+    clock = _Clock()
+    limiter = AdaptiveLimiter(initial_limit=10, tolerance=2.0, clock=clock)
+    _fill(limiter)
+    limiter.release("get_concept", 0.01, 200)
+    limiter.release("get_subgraph", 0.5, 200)
+    assert limiter.limit == 10
+
+    limiter.release("get_concept", 0.05, 200)
+    assert limiter.limit == 7
+    assert limiter.stats().min_latencies == {"get_concept": 0.01, "get_subgraph": 0.5}
+
+
+def test_token_bucket_spaces_requests():
+    clock = _Clock()
+    bucket = TokenBucket(rate=10, burst=2, clock=clock)
+    assert [bucket.reserve() for _ in range(4)] == pytest.approx([0, 0, 0.1, 0.2])
+    clock.now = 1.0
+    assert bucket.reserve() == 0
+
+
+def test_client_calls_share_the_limit(make_client):
+    limiter = AdaptiveLimiter(initial_limit=3, max_limit=3)
+    client = make_client(transport=_Transport(), limiter=limiter)
+
+    ids = [f"C{i}" for i in range(40)]
+    threads = [
+        threading.Thread(target=client.get_batch_concept, args=(ids,), kwargs={"chunk_size": 2})
+        for _ in range(2)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert client.transport.peak == 3
+    stats = limiter.stats()
+    assert (stats.in_flight, stats.queued, stats.successes) == (0, 0, 40)
+    assert list(stats.min_latencies) == ["batch_get_concept[2]"]
+
+
+def test_latency_class_buckets_batch_sizes():
+    def concepts(n):
+        return {"method": "batch_get_concept", "params": {"ids": [f"C{i}" for i in range(n)]}}
+
+    assert latency_class({"method": "get_concept", "params": {"id": "C1"}}) == "get_concept"
+    assert latency_class(concepts(1)) == "batch_get_concept[1]"
+    assert latency_class(concepts(33)) == latency_class(concepts(64)) == "batch_get_concept[64]"
+    batch = [{"method": "get_parents"}, {"method": "get_concept"}, {"method": "get_concept"}]
+    assert latency_class(batch) == "batch(get_concept,get_parents)[4]"
+
+
+def test_small_last_chunks_do_not_set_the_baseline_of_full_ones():
+    limiter = AdaptiveLimiter(initial_limit=4, tolerance=2.0)
+    for _ in range(3):
+        limiter.acquire()
+        limiter.release(latency_class({"method": "m", "params": {"ids": ["a"]}}), 0.01, 200)
+        limiter.acquire()
+        limiter.release(latency_class({"method": "m", "params": {"ids": ["a"] * 100}}), 0.2, 200)
+    assert limiter.stats().decreases == 0
+
+
+def test_async_client_waits_for_a_slot_and_frees_cancelled_ones(make_async_client):
+    in_flight = 0
+    peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        concept = {"concept_id": "C1", "language": "ENG", "alias_list": [], "definition": None}
+        return httpx.Response(200, json={"id": 1, "result": concept})
+
+    limiter = AdaptiveLimiter(initial_limit=2, max_limit=2)
+    client = make_async_client(handler, limiter=limiter)
+
+    async def run():
+        await asyncio.gather(*(client.get_concept(f"C{i}") for i in range(10)))
+        slow = asyncio.create_task(client.get_concept("C1"))
+        await asyncio.sleep(0.001)
+        slow.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await slow
+        await client.get_concept("C1")
+
+    asyncio.run(run())
+    assert peak == 2
+    stats = limiter.stats()
+    assert (stats.in_flight, stats.queued, stats.successes, stats.overloads) == (0, 0, 11, 0)
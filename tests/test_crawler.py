@@ -0,0 +1,143 @@
+import pytest
+
+from entity_disambiguator_py.crawler import (
+    GRAPH_FILE,
+    PREVIOUS_CONCEPTS_FILE,
+    STATE_FILE,
+    VOCABULARY_FILE,
+    Crawler,
+    main,
+    parse_range,
+)
+from entity_disambiguator_py.graph import LocalUMLSGraph
+from entity_disambiguator_py.snapshot import SnapshotVocabulary
+from entity_disambiguator_py.stand_in import StandInServer, SyntheticUMLS
+
+
+@pytest.fixture
+def server():
+    with StandInServer(SyntheticUMLS(num_concepts=60, name_period=20, cross_edges=10)) as s:
+        yield s
+
+
+@pytest.fixture
+def crawler(server, make_client):
+    def make(directory, **kwargs) -> Crawler:
+        kwargs.setdefault("sort_prefixes", ["PRED", "ASSOC"])
+        return Crawler(make_client(server.url), directory, chunk_size=8, page_size=25, **kwargs)
+
+    return make
+
+
+def test_crawl_loads_offline(server, tmp_path, crawler):
+    stats = crawler(tmp_path, type_ids=["T001", "T999"]).run()
+    assert (stats.chunks_fetched, stats.concepts, stats.atoms) == (8, 60, 180)
+
+    data = server.data
+    with SnapshotVocabulary(tmp_path / VOCABULARY_FILE) as vocabulary:
+        assert len(vocabulary) == 60
+        assert vocabulary.get_concept("C0000042").result.model_dump() == data.concepts["C0000042"]
+        assert vocabulary.get_alias_id("A00000007").result.model_dump() == data.atoms["A00000007"]
+        names = vocabulary.get_alias_name("term 3 variant 1").result
+        assert names.concept_ids == ["C0000003", "C0000023", "C0000043"]
+        assert vocabulary.get_type_definition("T001").result.name == "Type 1"
+
+    graph = LocalUMLSGraph.load(tmp_path / GRAPH_FILE)
+    assert graph.num_edges() == data.graph.num_edges()
+    assert graph.get_descendants("C0000001", "PRED") == data.graph.get_descendants(
+        "C0000001", "PRED"
+    )
+
+
+def test_resume_and_refresh_only_fetch_missing_chunks(server, tmp_path, crawler):
+    crawler(tmp_path).run()
+    (tmp_path / "shards" / "000003.jsonl.gz").unlink()
+
+    stats = crawler(tmp_path).run()
+    assert (stats.chunks_fetched, stats.chunks_skipped) == (1, 7)
+
+    server.data.concepts["C0000050"]["definition"] = "revised"
+    stats = crawler(tmp_path).run(refresh=[parse_range("C0000049:C0000050")])
+    assert (stats.chunks_fetched, stats.chunks_skipped) == (1, 7)
+    with SnapshotVocabulary(tmp_path / VOCABULARY_FILE) as vocabulary:
+        assert vocabulary.get_concept("C0000050").result.definition == "revised"
+
+
+def test_refresh_lists_new_concepts(server, tmp_path, crawler):
+    crawler(tmp_path).run()
+    data = server.data
+    data.concept_ids.append("C0000050A")
+    data.concepts["C0000050A"] = {**data.concepts["C0000050"], "concept_id": "C0000050A"}
+
+    stats = crawler(tmp_path).run(refresh=[parse_range("C0000049:C0000050")])
+    assert (stats.chunks_fetched, stats.chunks_skipped) == (1, 7)
+    assert not (tmp_path / PREVIOUS_CONCEPTS_FILE).exists()
+    with SnapshotVocabulary(tmp_path / VOCABULARY_FILE) as vocabulary:
+        assert len(vocabulary) == 61
+        assert vocabulary.get_concept("C0000050A").result.concept_id == "C0000050A"
+
+
+def test_new_concepts_only_change_the_chunk_of_their_range(server, tmp_path, crawler):
+    crawler(tmp_path).run()
+    data = server.data
+    data.concept_ids.insert(1, "C0000000A")
+    data.concepts["C0000000A"] = {**data.concepts["C0000000"], "concept_id": "C0000000A"}
+
+    stats = crawler(tmp_path).run(refresh=[parse_range("C0000058:C0000059")])
+    # the refreshed range and the range of the new id, the chunks between keep their shards
+    assert (stats.chunks_fetched, stats.chunks_skipped) == (2, 6)
+
+
+def test_failed_lookups_are_recorded_and_fetched_again(server, tmp_path, crawler):
+    methods = server.dispatcher.methods
+    get_children = methods["get_children"]
+
+    def failing(params):
+        if params["query"]["start_node"] == "C0000012":
+            raise ValueError("boom")
+        return get_children(params)
+
+    methods["get_children"] = failing
+    stats = crawler(tmp_path, sort_prefixes=["PRED"]).run()
+    assert stats.failures == 1
+    assert (stats.chunks_fetched, stats.concepts) == (8, 60)
+
+    methods["get_children"] = get_children
+    stats = crawler(tmp_path, sort_prefixes=["PRED"]).run()
+    assert (stats.chunks_fetched, stats.chunks_skipped, stats.failures) == (1, 7, 0)
+    graph = LocalUMLSGraph.load(tmp_path / GRAPH_FILE)
+    assert graph.get_children("C0000012", "PRED") == server.data.graph.get_children(
+        "C0000012", "PRED"
+    )
+
+
+def test_interrupted_listing_resumes_from_last_page(server, tmp_path, crawler):
+    crawl = crawler(tmp_path)
+    stream = crawl.client.iter_concepts(25)
+    with open(tmp_path / "concepts.txt", "w") as f:
+        page = [next(stream) for _ in range(25)]
+        next(stream)
+        crawl._listed_page(f, page, stream.cursor)
+        # a partial second page that was never checkpointed
+        f.write("C0000025\nC00000")
+
+    assert crawler(tmp_path).list_concepts() == server.data.concept_ids
+
+
+def test_chunk_size_must_match(server, tmp_path, crawler, make_client):
+    crawler(tmp_path).list_concepts()
+    with pytest.raises(ValueError):
+        Crawler(make_client(server.url), tmp_path, chunk_size=16)
+    assert (tmp_path / STATE_FILE).exists()
+
+
+def test_main(server, tmp_path, capsys):
+    main(
+        ["--url", server.url, "--region", "local", "--unsigned", "-o", str(tmp_path)]
+        + ["--chunk-size", "8", "--sort-prefix", "PRED"]
+    )
+    assert (
+        "8 chunks fetched, 0 already done: 60 concepts, 180 atoms and 59 edges"
+        in capsys.readouterr().err
+    )
+    assert LocalUMLSGraph.load(tmp_path / GRAPH_FILE).num_nodes == 60
@@ -0,0 +1,73 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from requests.exceptions import HTTPError
+
+from entity_disambiguator_py.decoding import Edge, EdgeColumns, traversal_response
+from entity_disambiguator_py.model import GraphTraversalResponse
+
+EDGES = [{"parent": f"C{i}", "child": f"C{i + 1}"} for i in range(5)]
+ROWS = [{**e, "rel_type": "PRED", "umls_primary": "RN", "umls_secondary": None} for e in EDGES]
+
+
+class _Transport:
+    def __init__(self, status_code: int = 200):
+        self.status_code = status_code
+
+    def post(self, url, data):
+        method = json.loads(data)["method"]
+        if method in ("get_parents", "get_children", "get_neighbors"):
+            content = {"id": 1, "result": ROWS}
+        else:
+            content = {"id": 1, "result": {"edges": EDGES}}
+        return SimpleNamespace(status_code=self.status_code, content=json.dumps(content).encode())
+
+    def close(self):
+        pass
+
+
+def test_traversal_matches_two_pass_decoding():
+    raw = json.dumps({"id": 3, "result": {"edges": EDGES}}).encode()
+    expected = GraphTraversalResponse.model_validate({"id": 3, "edges": EDGES})
+    assert traversal_response(raw) == expected
+
+
+def test_graph_methods_decode(make_client):
+    client = make_client(transport=_Transport())
+    assert len(client.get_subgraph("C0", "PRED").edges) == 5
+    for method in (client.get_parents, client.get_children, client.get_neighbors):
+        resp = method("C0", "PRED")
+        assert [r.child for r in resp.result] == [e["child"] for e in EDGES]
+
+
+GRAPH_METHODS = [
+    "get_ancestors",
+    "get_descendants",
+    "get_parents",
+    "get_children",
+    "get_neighbors",
+    "get_subgraph",
+]
+
+
+@pytest.mark.parametrize("method", GRAPH_METHODS)
+def test_graph_errors_name_the_method(method, make_client):
+    with pytest.raises(HTTPError, match=f"error in {method} "):
+        getattr(make_client(transport=_Transport(500)), method)("C0", "PRED")
+
+
+def test_edge_columns(make_client):
+    client = make_client(transport=_Transport())
+    for method in ("get_descendants", "get_children"):
+        columns = client.get_edge_columns(method, "C0", "PRED")
+        assert columns.parents == [e["parent"] for e in EDGES]
+        assert columns.children == [e["child"] for e in EDGES]
+        assert list(columns)[0] == Edge("C0", "C1")
+
+    columns = client.get_edge_columns("get_ancestors", "C0", "PRED")
+    assert columns.to_traversal_response() == client.get_ancestors("C0", "PRED")
+    assert columns == EdgeColumns(1, columns.parents, columns.children)
+
+    with pytest.raises(ValueError):
+        client.get_edge_columns("get_concept", "C0", "PRED")
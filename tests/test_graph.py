@@ -0,0 +1,84 @@
+import pytest
+from requests.exceptions import HTTPError
+
+from entity_disambiguator_py.graph import LocalUMLSGraph
+from entity_disambiguator_py.model import DocDBRelationship, UMLSRelationship
+from entity_disambiguator_py.typing import UMLSGraphInterface
+
+
+def _rel(parent: str, child: str, rel_type: str = "PRED") -> UMLSRelationship:
+    return UMLSRelationship(
+        parent=parent, child=child, rel_type=rel_type, umls_primary="isa", umls_secondary=None
+    )
+
+
+@pytest.fixture
+def graph() -> LocalUMLSGraph:
+    # C1 -> C2 -> C3 -> C4, C1 -> C5, with a SYN edge that must stay separate
+    rows = [
+        _rel("C1", "C2"),
+        _rel("C2", "C3"),
+        _rel("C3", "C4"),
+        _rel("C1", "C5"),
+        _rel("C2", "C3"),
+        _rel("C3", "C9", "SYN"),
+    ]
+    rows.append(
+        DocDBRelationship(
+            parent="C6", child="C4", rel_type="PRED", umls_primary=None, umls_secondary=None
+        )
+    )
+    return LocalUMLSGraph.from_relationships(rows)
+
+
+def test_is_graph_interface(graph):
+    assert isinstance(graph, UMLSGraphInterface)
+    assert graph.num_edges("PRED") == 5
+    assert graph.num_edges() == 6
+
+
+def test_neighbors(graph):
+    parents = graph.get_parents("C4", "PRED").result
+    assert sorted(r.parent for r in parents) == ["C3", "C6"]
+    assert {r.umls_primary for r in parents} == {"isa", None}
+
+    children = graph.get_children("C1", "PRED").result
+    assert sorted(r.child for r in children) == ["C2", "C5"]
+    assert len(graph.get_neighbors("C3", "PRED").result) == 2
+    assert graph.get_children("C3", "SYN").result[0].child == "C9"
+    assert graph.get_parents("unknown", "PRED").result == []
+
+
+def test_traversals(graph):
+    ancestors = graph.get_ancestors("C4", "PRED")
+    assert {(e.parent, e.child) for e in ancestors.edges} == {
+        ("C3", "C4"),
+        ("C6", "C4"),
+        ("C2", "C3"),
+        ("C1", "C2"),
+    }
+
+    limited = graph.get_ancestors("C4", "PRED", depth_limit=1)
+    assert {e.parent for e in limited.edges} == {"C3", "C6"}
+
+    descendants = graph.get_descendants("C1", "PRED", depth_limit=2)
+    assert {e.child for e in descendants.edges} == {"C2", "C5", "C3"}
+
+    subgraph = graph.get_subgraph("C5", "PRED")
+    assert len(subgraph.edges) == 5
+
+
+def test_invalid_sort_prefix(graph):
+    with pytest.raises(HTTPError):
+        graph.get_ancestors("C4", "NOPE")
+
+
+def test_save_and_load(graph, tmp_path):
+    loaded = LocalUMLSGraph.load(graph.save(tmp_path / "graph.bin"))
+
+    assert loaded.num_nodes == graph.num_nodes
+    assert loaded.num_edges() == graph.num_edges()
+    for node in ("C1", "C3", "C4"):
+        for prefix in ("PRED", "SYN"):
+            assert loaded.get_neighbors(node, prefix) == graph.get_neighbors(node, prefix)
+    assert loaded.get_subgraph("C2", "PRED") == graph.get_subgraph("C2", "PRED")
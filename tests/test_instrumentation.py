@@ -0,0 +1,84 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+from requests.exceptions import HTTPError
+
+from entity_disambiguator_py.instrumentation import Histogram, Instrumentation
+from entity_disambiguator_py.stand_in import StandInServer, SyntheticUMLS
+
+
+def test_histogram_percentiles():
+    histogram = Histogram(1e-6, 10.0, growth=1.05)
+    for i in range(1, 1001):
+        histogram.add(i / 1000)
+
+    snapshot = histogram.snapshot()
+    assert snapshot.count == 1000
+    assert snapshot.min == 0.001 and snapshot.max == 1.0
+    assert snapshot.p50 == pytest.approx(0.5, rel=0.05)
+    assert snapshot.p99 == pytest.approx(0.99, rel=0.05)
+    assert snapshot.mean == pytest.approx(0.5005)
+
+
+def test_client_records_per_method(make_client):
+    events = []
+    instrumentation = Instrumentation(hooks=[events.append, lambda e: 1 / 0])
+    with StandInServer(SyntheticUMLS(num_concepts=50, cross_edges=0)) as server:
+        with make_client(server.url, instrumentation=instrumentation) as client:
+            client.get_concept("C0000001")
+            client.get_concept("C0000002")
+            client.get_subgraph("C0000000", "PRED")
+            with pytest.raises(HTTPError):
+                client.get_concept("C9999999")
+
+    snapshot = instrumentation.snapshot()
+    concept = snapshot["get_concept"]
+    assert concept.calls == 3
+    assert concept.errors == 1
+    assert concept.status_codes == {200: 2, 404: 1}
+    assert concept.decode_time.count == 2
+    assert concept.ttfb.count == 3
+    assert concept.request_bytes.min > 0
+    assert snapshot["get_subgraph"].response_bytes.max > concept.response_bytes.max
+
+    methods = [e.method for e in events]
+    assert methods == ["get_concept", "get_concept", "get_subgraph", "get_concept"]
+    assert events[0].decode_time is not None
+    assert events[-1].status_code == 404 and events[-1].decode_time is None
+
+
+def test_async_client_records_ttfb_and_decode(make_async_client):
+    def handler(request: httpx.Request) -> httpx.Response:
+        concept = {"concept_id": "C1", "language": "ENG", "alias_list": [], "definition": None}
+        return httpx.Response(200, json={"id": 1, "result": concept})
+
+    instrumentation = Instrumentation()
+
+    async def run():
+        client = make_async_client(handler, instrumentation=instrumentation)
+        async with client:
+            await asyncio.gather(*(client.get_concept(f"C{i}") for i in range(5)))
+
+    asyncio.run(run())
+    concept = instrumentation.snapshot()["get_concept"]
+    assert concept.calls == 5
+    assert concept.ttfb.count == 5
+    assert concept.decode_time.count == 5
+
+
+def test_raw_rpc_calls_are_emitted_at_once(make_client):
+    events = []
+    instrumentation = Instrumentation(hooks=[events.append])
+    with StandInServer(SyntheticUMLS(num_concepts=10, cross_edges=0)) as server:
+        with make_client(server.url, instrumentation=instrumentation) as client:
+            payload = {"id": 1, "method": "get_concept", "params": {"id": "C0000001"}}
+            worker = threading.Thread(target=client.rpc_call, args=(payload,))
+            worker.start()
+            worker.join()
+            assert [e.method for e in events] == ["get_concept"]
+            assert events[0].decode_time is None
+
+            client.get_concept("C0000002")
+            assert len(events) == 2 and events[1].decode_time is not None
@@ -0,0 +1,88 @@
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from entity_disambiguator_py.decoding import Edge
+from entity_disambiguator_py.interning import INTERNER, InternedEdges, Interner
+
+EDGES = [{"parent": f"C{i // 2}", "child": f"C{i + 1}"} for i in range(6)]
+
+
+class _Transport:
+    def post(self, url, data):
+        method = json.loads(data)["method"]
+        if method == "get_children":
+            rows = [
+                {**e, "rel_type": "PRED", "umls_primary": None, "umls_secondary": None}
+                for e in EDGES
+            ]
+            content = {"id": 1, "result": rows}
+        else:
+            content = {"id": 1, "result": {"edges": EDGES}}
+        return SimpleNamespace(status_code=200, content=json.dumps(content).encode())
+
+
+def test_interner_codes_are_dense_and_stable():
+    interner = Interner()
+    assert list(interner.intern_many(["C5", "C7", "C5", "A1"])) == [0, 1, 0, 2]
+    assert interner.code("C7") == 1
+    assert interner.code("C9") is None and "C9" not in interner
+    assert interner.strings([2, 0]) == ["A1", "C5"]
+    assert len(interner) == 3
+
+
+def test_interner_is_thread_safe():
+    interner = Interner()
+    ids = [f"C{i}" for i in range(2_000)]
+    threads = [threading.Thread(target=interner.intern_many, args=(ids,)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(interner) == 2_000
+    assert interner.strings(interner.intern_many(ids)) == ids
+
+
+def test_interned_edges_round_trip(make_client):
+    client = make_client(transport=_Transport())
+    interner = Interner()
+    edges = client.get_interned_edges("get_subgraph", "C0", "PRED", interner=interner)
+
+    assert list(edges.parents) == [0, 0, 1, 1, 2, 2]
+    assert list(edges.children) == [1, 2, 3, 4, 5, 6]
+    assert memoryview(edges.children).format == "i"
+    assert edges.nbytes == 12 * edges.parents.itemsize
+    assert list(edges)[2] == Edge("C1", "C3")
+    assert interner.strings(edges.nodes()) == ["C0", "C1", "C2", "C3", "C4", "C5", "C6"]
+    assert edges.to_edge_columns() == client.get_edge_columns("get_subgraph", "C0", "PRED")
+    assert edges.to_traversal_response() == client.get_subgraph("C0", "PRED")
+
+    children = client.get_interned_edges("get_children", "C0", "PRED", interner=interner)
+    assert children == edges
+    assert len(interner) == 7
+
+
+def test_results_share_the_default_interner(make_client):
+    client = make_client(transport=_Transport())
+    first = client.get_interned_edges("get_descendants", "C0", "PRED")
+    second = InternedEdges.from_edge_columns(client.get_edge_columns("get_ancestors", "C0", "PRED"))
+
+    assert first.interner is INTERNER
+    assert first == second
+    # the strings handed back are the interned objects, not copies
+    assert INTERNER.string(first.parents[0]) is INTERNER.string(second.parents[0])
+
+    with pytest.raises(ValueError):
+        client.get_interned_edges("get_concept", "C0", "PRED")
+
+
+def test_scoped_interners(make_client):
+    interner = Interner()
+    client = make_client(transport=_Transport(), interner=interner)
+    edges = client.get_interned_edges("get_descendants", "C0", "PRED")
+    assert edges.interner is interner
+    assert InternedEdges.from_edge_columns(edges.to_edge_columns(), interner) == edges
+    assert len(interner) == 7
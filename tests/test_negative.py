@@ -0,0 +1,73 @@
+import pytest
+
+from entity_disambiguator_py.negative import BloomFilter, NegativeCache
+from entity_disambiguator_py.stand_in import StandInServer, SyntheticUMLS
+
+
+def test_bloom_filter_error_rate():
+    bloom = BloomFilter.from_keys((f"key {i}" for i in range(5_000)), error_rate=0.01)
+    assert all(f"key {i}" in bloom for i in range(5_000))
+
+    false_positives = sum(f"other {i}" in bloom for i in range(20_000))
+    assert false_positives / 20_000 < 0.02
+
+
+def test_misses_expire_and_evict():
+    now = 0.0
+    cache = NegativeCache(maxsize=2, ttl=10, clock=lambda: now)
+    cache.add("get_aliases", "a")
+    cache.add("get_aliases", "b")
+    cache.add("get_aliases", "c")
+    assert not cache.is_absent("get_aliases", "a")
+    assert cache.is_absent("get_aliases", "c")
+    now = 11.0
+    assert not cache.is_absent("get_aliases", "c")
+
+
+def test_save_and_load(tmp_path):
+    cuis = [f"C{i:07d}" for i in range(1_000)]
+    cache = NegativeCache.from_keys({"get_canonical_synonym": cuis}, error_rate=0.001)
+    cache.add("get_aliases", "liver")
+    path = cache.save(tmp_path / "negative.bin")
+
+    loaded = NegativeCache.load(path)
+    assert not any(loaded.is_absent("get_canonical_synonym", cid) for cid in cuis)
+    assert loaded.is_absent("get_canonical_synonym", "C9999999")
+    assert loaded.is_absent("get_aliases", "liver")
+    assert not loaded.is_absent("get_aliases", "Liver")
+
+    (tmp_path / "bad.bin").write_bytes(b"nonsense" * 4)
+    with pytest.raises(ValueError):
+        NegativeCache.load(tmp_path / "bad.bin")
+
+
+def test_only_exact_id_methods_are_filtered():
+    with pytest.raises(ValueError):
+        NegativeCache.from_keys({"get_aliases": ["liver"]})
+
+
+def test_client_skips_known_misses(make_client):
+    data = SyntheticUMLS(num_concepts=50, cross_edges=0)
+    synonym_cuis = [cid for cid in data.concept_ids if cid in data.canonical]
+    negative = NegativeCache.from_keys({"get_canonical_synonym": synonym_cuis})
+
+    with StandInServer(data) as server:
+        with make_client(server.url, negative_cache=negative) as client:
+            assert client.get_canonical_synonym("C0000009").result.synset_id == "-1"
+            resp = client.canonicalize_many(["C0000019", "C0000029", "C9999999"])
+            assert {s.synset_id for s in resp.result} == {"-1"}
+            assert server.requests == 0
+
+            # names are always asked for, the service may know another spelling
+            assert client.get_aliases("term 1 variant 0").result[0].concept_id == "C0000001"
+            assert server.requests == 1
+
+    assert negative.stats().filter_hits == 4
+
+
+def test_client_remembers_misses_without_filter(make_client):
+    with StandInServer(SyntheticUMLS(num_concepts=20, cross_edges=0)) as server:
+        with make_client(server.url, negative_cache=NegativeCache()) as client:
+            for _ in range(3):
+                assert client.get_aliases("no such name").result == []
+            assert server.requests == 1
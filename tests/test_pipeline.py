@@ -0,0 +1,86 @@
+import io
+import json
+
+import pytest
+
+from entity_disambiguator_py.pipeline import (
+    DisambiguationPipeline,
+    main,
+    normalize_name,
+)
+from entity_disambiguator_py.stand_in import StandInServer, SyntheticUMLS
+
+
+@pytest.fixture(scope="module")
+def server():
+    with StandInServer(SyntheticUMLS(num_concepts=100, name_period=50, cross_edges=0)) as s:
+        yield s
+
+
+def _mentions(n: int) -> list[dict]:
+    return [{"doc": i, "text": f"  term {i % 60}   variant {i % 3}"} for i in range(n)]
+
+
+def test_normalize_name():
+    assert normalize_name(" Heart  Attack \n") == "Heart Attack"
+    assert normalize_name("Café", lowercase=True) == "café"
+
+
+def test_annotate_in_order_with_dedupe(server, make_client):
+    with make_client(server.url) as client:
+        pipeline = DisambiguationPipeline(client, block_size=16, queue_size=1, parents="PRED")
+        out = list(pipeline.annotate(_mentions(200) + ["no such term"]))
+
+    assert [r.get("doc") for r in out[:-1]] == list(range(200))
+    first = out[0]
+    assert first["normalized"] == "term 0 variant 0"
+    # names repeat every 50 concepts
+    assert [c["concept_id"] for c in first["concepts"]] == ["C0000000", "C0000050"]
+    assert first["concepts"][1]["canonical_cui"] == "C0000048"
+    assert first["concepts"][1]["parents"] == ["C0000012"]
+    assert out[-1] == {"text": "no such term", "normalized": "no such term", "concepts": []}
+
+    # every distinct name and concept is looked up once
+    assert pipeline.stats.records == 201
+    assert pipeline.stats.names_looked_up == 61
+    assert pipeline.stats.concepts_looked_up == 100
+
+
+def test_names_match_when_the_service_echoes_another_spelling(make_client):
+    data = SyntheticUMLS(num_concepts=10, cross_edges=0)
+    # the service answers for a name by the spelling it stores
+    data.names["Term 1 Variant 1"] = data.names["term 1 variant 1"]
+    with StandInServer(data) as s:
+        with make_client(s.url) as client:
+            pipeline = DisambiguationPipeline(client, block_size=4)
+            (out,) = pipeline.annotate([{"text": "Term 1 Variant 1"}])
+
+    assert [c["concept_id"] for c in out["concepts"]] == ["C0000001"]
+
+
+def test_stage_errors_propagate(server, make_client):
+    with make_client(server.url) as client:
+        pipeline = DisambiguationPipeline(client, block_size=4, parents="ISA")
+        with pytest.raises(Exception, match="ISA"):
+            list(pipeline.annotate(_mentions(50)))
+
+
+def test_cli_resumes_from_checkpoint(server, tmp_path, make_client):
+    source = tmp_path / "mentions.jsonl"
+    output = tmp_path / "out.jsonl"
+    checkpoint = tmp_path / "checkpoint.json"
+    source.write_text("".join(json.dumps(m) + "\n" for m in _mentions(100)))
+
+    # an interrupted run: 40 lines checkpointed and a partly written line after them
+    with make_client(server.url) as client:
+        buffer = io.StringIO()
+        DisambiguationPipeline(client).run(io.StringIO(source.read_text()), buffer)
+    done = "".join(buffer.getvalue().splitlines(keepends=True)[:40])
+    output.write_text(done + '{"doc": 40, "tex')
+    checkpoint.write_text(json.dumps({"lines": 40, "output_bytes": len(done.encode())}))
+
+    argv = [str(source), "-o", str(output), "--url", server.url, "--region", "local"]
+    main(argv + ["--unsigned", "--checkpoint", str(checkpoint), "--block-size", "16"])
+
+    assert output.read_text() == buffer.getvalue()
+    assert json.loads(checkpoint.read_text())["lines"] == 100
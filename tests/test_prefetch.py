@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from entity_disambiguator_py.cache import ResponseCache
+from entity_disambiguator_py.prefetch import PrefetchPolicy
+from entity_disambiguator_py.stand_in import FaultProfile, StandInServer, SyntheticUMLS
+
+
+@pytest.fixture(scope="module")
+def server():
+    with StandInServer(SyntheticUMLS(num_concepts=100, name_period=50, cross_edges=0)) as s:
+        yield s
+
+
+def test_alias_lookups_prefetch_follow_ups(server, make_client):
+    with make_client(server.url, cache=ResponseCache(), prefetch=PrefetchPolicy()) as client:
+        atoms = client.get_aliases("term 7 variant 1").result
+        client.get_batch_alias_name(["term 8 variant 0"])
+        assert client.prefetcher.join(timeout=5)
+
+        before = server.requests
+        for concept_id in ["C0000007", "C0000057", "C0000008", "C0000058"]:
+            client.get_concept_info(concept_id)
+            client.get_parents(concept_id, "PRED")
+            client.get_children(concept_id, "PRED")
+            client.get_canonical_synonym(concept_id)
+        assert server.requests == before
+
+        stats = client.prefetcher.stats()
+        assert [a.concept_id for a in atoms] == ["C0000007", "C0000057"]
+        assert (stats.scheduled, stats.prefetched, stats.used, stats.failed) == (4, 16, 16, 0)
+        assert stats.hit_rate == 1.0
+        assert stats.batches <= 2
+
+
+def test_async_alias_lookups_prefetch_follow_ups(server, make_async_client):
+    async def run():
+        client = make_async_client(url=server.url, cache=ResponseCache(), prefetch=PrefetchPolicy())
+        async with client:
+            await client.get_aliases("term 7 variant 1")
+            await client.get_batch_alias_name(["term 8 variant 0"])
+            assert await client.prefetcher.join(timeout=5)
+
+            before = server.requests
+            for concept_id in ["C0000007", "C0000057", "C0000008", "C0000058"]:
+                await client.get_concept_info(concept_id)
+                await client.get_parents(concept_id, "PRED")
+                await client.get_children(concept_id, "PRED")
+                await client.get_canonical_synonym(concept_id)
+            assert server.requests == before
+            return client.prefetcher.stats()
+
+    stats = asyncio.run(run())
+    assert (stats.scheduled, stats.prefetched, stats.used, stats.failed) == (4, 16, 16, 0)
+    assert stats.batches <= 2
+
+
+def test_cached_entries_are_not_fetched_again(server, make_client):
+    with make_client(server.url, cache=ResponseCache(), prefetch=PrefetchPolicy()) as client:
+        client.get_parents("C0000012", "PRED")
+        client.get_alias_id("A00000036")
+        assert client.prefetcher.join(timeout=5)
+
+        stats = client.prefetcher.stats()
+        assert (stats.prefetched, stats.used) == (3, 0)
+        client.get_parents("C0000012", "PRED")
+        assert client.prefetcher.stats().used == 0
+
+
+def test_queue_is_bounded_and_stale_concepts_are_dropped(make_client):
+    faults = FaultProfile(latency=0.05)
+    with StandInServer(SyntheticUMLS(num_concepts=100), faults) as server:
+        policy = PrefetchPolicy(batch_size=1, max_in_flight=1, max_queued=3, max_age=0.01)
+        with make_client(server.url, cache=ResponseCache(), prefetch=policy) as client:
+            client.prefetcher.schedule([f"C{i:07d}" for i in range(10)])
+            assert client.prefetcher.join(timeout=5)
+
+            stats = client.prefetcher.stats()
+            # one concept is taken at once, the rest overflow the queue or go stale
+            assert stats.batches == 1
+            assert stats.dropped == 9
+            assert client.get_concept_info("C0000009").concept_id == "C0000009"
+
+
+def test_policy_validation(server, make_client, make_async_client):
+    with pytest.raises(ValueError):
+        PrefetchPolicy(methods=("get_subgraph",))
+    with pytest.raises(ValueError):
+        make_client(server.url, prefetch=PrefetchPolicy())
+    with pytest.raises(ValueError):
+        make_async_client(url=server.url, prefetch=PrefetchPolicy())
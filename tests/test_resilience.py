@@ -0,0 +1,192 @@
+import asyncio
+import json
+import threading
+import time
+from email.utils import formatdate
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from requests.exceptions import ConnectionError, HTTPError
+
+from entity_disambiguator_py.instrumentation import Instrumentation
+from entity_disambiguator_py.model import DocDBRelationship
+from entity_disambiguator_py.resilience import (
+    HedgePolicy,
+    ResiliencePolicy,
+    RetryBudget,
+    RetryPolicy,
+    retry_after,
+)
+
+CONCEPT = {"concept_id": "C1", "language": "ENG", "alias_list": [], "definition": None}
+OK = json.dumps({"id": 1, "result": CONCEPT}).encode()
+
+
+class _Transport:
+    """Replays scripted responses; a callable entry is called with the call number."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def post(self, url, data):
+        with self.lock:
+            n = self.calls
+            self.calls += 1
+        step = self.script[min(n, len(self.script) - 1)]
+        if callable(step):
+            step = step(n)
+        if isinstance(step, Exception):
+            raise step
+        status, headers = step if isinstance(step, tuple) else (step, {})
+        content = OK if status == 200 else b"throttled"
+        return SimpleNamespace(status_code=status, content=content, headers=headers)
+
+    def close(self):
+        pass
+
+
+def test_retries_with_backoff_and_retry_after(make_client):
+    sleeps = []
+    policy = ResiliencePolicy(RetryPolicy(max_attempts=4), sleep=sleeps.append)
+    instrumentation = Instrumentation()
+    client = make_client(
+        transport=_Transport([(429, {"Retry-After": "1.5"}), ConnectionError("reset"), 200]),
+        resilience=policy,
+        instrumentation=instrumentation,
+    )
+
+    assert client.get_concept("C1").result.concept_id == "C1"
+    assert client.transport.calls == 3
+    assert sleeps[0] == 1.5
+    assert 0 <= sleeps[1] <= 0.1
+    assert policy.stats().retries == 2
+    assert instrumentation.snapshot()["get_concept"].retries == 2
+
+
+def test_gives_up_after_max_attempts(make_client):
+    policy = ResiliencePolicy(RetryPolicy(max_attempts=2), sleep=lambda s: None)
+    client = make_client(transport=_Transport([503]), resilience=policy)
+    with pytest.raises(HTTPError):
+        client.get_concept("C1")
+    assert client.transport.calls == 2
+
+
+def test_writes_are_never_retried(make_client):
+    policy = ResiliencePolicy(sleep=lambda s: None)
+    client = make_client(transport=_Transport([503, 200]), resilience=policy)
+    relationship = DocDBRelationship(
+        parent="C1", child="C2", rel_type="PRED", umls_primary=None, umls_secondary=None
+    )
+    with pytest.raises(HTTPError):
+        client.create_relationship(relationship)
+    assert client.transport.calls == 1
+
+
+def test_budget_stops_retry_storms(make_client):
+    budget = RetryBudget(ratio=0.0, min_tokens=1)
+    policy = ResiliencePolicy(RetryPolicy(max_attempts=5), budget=budget, sleep=lambda s: None)
+    client = make_client(transport=_Transport([503]), resilience=policy)
+    for _ in range(3):
+        with pytest.raises(HTTPError):
+            client.get_concept("C1")
+
+    # one retry from the reserve, then every call is sent only once
+    assert client.transport.calls == 4
+    assert policy.stats().budget_exhausted == 3
+
+
+def test_hedge_answers_for_a_slow_failed_attempt(make_client):
+    threads = []
+
+    def slow_failure(n):
+        threads.append(threading.current_thread().name)
+        if n == 0:
+            time.sleep(0.2)
+            return 503
+        return 200
+
+    policy = ResiliencePolicy(hedge=HedgePolicy(delay=0.02), sleep=lambda s: None)
+    client = make_client(transport=_Transport([slow_failure]), resilience=policy)
+
+    assert client.get_concept("C1").result.concept_id == "C1"
+    # the first attempt is sent by the caller, the hedge by the pool
+    assert threads[0] == threading.current_thread().name
+    assert threads[1].startswith("hedge")
+    stats = policy.stats()
+    assert (stats.hedges, stats.hedge_wins, stats.retries) == (1, 1, 0)
+    assert client.transport.calls == 2
+    policy.close()
+
+
+def test_fast_calls_are_not_hedged(make_client):
+    policy = ResiliencePolicy(hedge=HedgePolicy(delay=0.05))
+    client = make_client(transport=_Transport([200]), resilience=policy)
+
+    for _ in range(20):
+        assert client.get_concept("C1").result.concept_id == "C1"
+    time.sleep(0.1)
+    assert policy.stats().hedges == 0
+    assert client.transport.calls == 20
+    policy.close()
+
+
+def test_retry_after_http_date():
+    assert retry_after({"Retry-After": formatdate(time.time() + 30)}) == pytest.approx(30, abs=2)
+    assert retry_after({"Retry-After": "soon"}) is None
+    assert retry_after({}) is None
+
+
+def test_async_retries_and_hedges(make_async_client):
+    calls = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise httpx.ConnectError("refused")
+        if calls == 2:
+            return httpx.Response(503)
+        if calls == 3:
+            await asyncio.sleep(0.5)
+        return httpx.Response(200, content=OK)
+
+    policy = ResiliencePolicy(hedge=HedgePolicy(delay=0.02), sleep=lambda s: None)
+
+    async def run():
+        client = make_async_client(handler, resilience=policy)
+        async with client:
+            return await client.get_concept("C1")
+
+    start = time.perf_counter()
+    assert asyncio.run(run()).result.concept_id == "C1"
+    assert time.perf_counter() - start < 0.45
+    stats = policy.stats()
+    assert stats.retries == 2
+    assert stats.hedge_wins == 1
+
+
+def test_async_hedge_closes_a_loser_that_finished_with_the_winner():
+    gate = asyncio.Event()
+    responses = []
+
+    async def send():
+        response = SimpleNamespace(status_code=200, closed=False)
+
+        async def aclose():
+            response.closed = True
+
+        response.aclose = aclose
+        responses.append(response)
+        if len(responses) == 2:
+            gate.set()
+        await gate.wait()
+        return response
+
+    policy = ResiliencePolicy(hedge=HedgePolicy(delay=0.01))
+    r, _ = asyncio.run(policy.acall({"method": "get_concept"}, send))
+    assert len(responses) == 2
+    assert [x.closed for x in responses if x is not r] == [True]
+    assert not r.closed
@@ -0,0 +1,163 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from entity_disambiguator_py.cache import ResponseCache
+from entity_disambiguator_py.client import NoSynonymsFound
+from entity_disambiguator_py.model import DocDBRelationship
+from entity_disambiguator_py.rpc_batch import RpcError
+
+
+def _result(method: str, params: dict):
+    if method == "get_concept":
+        cid = params["id"]
+        return {"concept_id": cid, "language": "ENG", "alias_list": [], "definition": None}
+    if method == "get_canonical_synonym":
+        return {"cui_id": params["id"], "canonical_cui": "C1", "synset_id": "S1"}
+    if method == "get_parents":
+        node = params["query"]["start_node"]
+        return [
+            {
+                "parent": "C9",
+                "child": node,
+                "rel_type": "PRED",
+                "umls_primary": None,
+                "umls_secondary": None,
+            }
+        ]
+    if method == "get_ancestors":
+        return {"edges": [{"parent": "C9", "child": params["query"]["start_node"]}]}
+    raise KeyError(method)
+
+
+class _Transport:
+    def __init__(self, accept_batches: bool = True, batch_status: int = 400):
+        self.accept_batches = accept_batches
+        self.batch_status = batch_status
+        self.requests = []
+
+    def post(self, url, data):
+        payload = json.loads(data)
+        self.requests.append(payload)
+        if isinstance(payload, list):
+            if not self.accept_batches:
+                return SimpleNamespace(status_code=self.batch_status, content=b"no batch")
+            out = []
+            for entry in payload:
+                if entry["params"].get("id") == "missing":
+                    out.append({"id": entry["id"], "error": {"code": 404, "message": "nope"}})
+                elif entry["params"].get("id") == "broken":
+                    out.append({"id": entry["id"], "error": {"code": 500, "message": "boom"}})
+                else:
+                    result = _result(entry["method"], entry["params"])
+                    out.append({"id": entry["id"], "result": result})
+            return SimpleNamespace(status_code=200, content=json.dumps(out))
+
+        if payload["params"].get("id") == "missing":
+            return SimpleNamespace(status_code=404, content=b"")
+        if payload["method"] == "get_concept_info":
+            info = {"concept_id": payload["params"]["id"], "definition": "", "alias_names": []}
+            return SimpleNamespace(status_code=200, content=json.dumps(info))
+        body = {"id": 1, "result": _result(payload["method"], payload["params"])}
+        return SimpleNamespace(status_code=200, content=json.dumps(body))
+
+
+def test_mixed_calls_in_one_request(make_client):
+    client = make_client(transport=_Transport(), cache=ResponseCache())
+    with client.batch() as batch:
+        concept = batch.get_concept("C0699142")
+        canonical = batch.get_canonical_synonym("C0699142")
+        missing = batch.get_canonical_synonym("missing")
+        parents = batch.get_parents("C0699142", "PRED")
+        broken = batch.get_concept("broken")
+
+    assert len(client.transport.requests) == 1
+    assert [e["id"] for e in client.transport.requests[0]] == [1, 2, 3, 4, 5]
+    assert concept.result().result.concept_id == "C0699142"
+    assert canonical.result().result.canonical_cui == "C1"
+    assert missing.result().result.synset_id == "-1"
+    assert parents.result().result[0].parent == "C9"
+    with pytest.raises(RpcError):
+        broken.result()
+
+    assert client.get_concept("C0699142") is concept.result()
+    assert len(client.transport.requests) == 1
+
+
+def test_falls_back_to_single_calls(make_client):
+    client = make_client(transport=_Transport(accept_batches=False))
+    batch = client.batch()
+    concept = batch.get_concept("C0699142")
+    canonical = batch.get_canonical_synonym("missing")
+    batch.execute()
+
+    assert len(client.transport.requests) == 3
+    assert concept.result().result.concept_id == "C0699142"
+    assert canonical.result().result.synset_id == "-1"
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_failed_batch_is_not_replayed(status, make_client):
+    client = make_client(transport=_Transport(accept_batches=False, batch_status=status))
+    relationship = DocDBRelationship(
+        parent="C1", child="C2", rel_type="PRED", umls_primary=None, umls_secondary=None
+    )
+    with client.batch() as batch:
+        writes = [batch.create_relationship(relationship) for _ in range(5)]
+        concept = batch.get_concept("C0699142")
+
+    assert len(client.transport.requests) == 1
+    for call in writes + [concept]:
+        assert isinstance(call.error(), RpcError) and call.error().code == status
+
+
+def test_concept_info_is_sent_as_a_single_call(make_client):
+    client = make_client(transport=_Transport())
+    with client.batch() as batch:
+        info = batch.get_concept_info("C0699142")
+        concept = batch.get_concept("C0699142")
+
+    assert info.result().concept_id == "C0699142"
+    assert concept.result().result.concept_id == "C0699142"
+    assert [r["method"] for r in client.transport.requests[0]] == ["get_concept"]
+    assert client.transport.requests[1]["method"] == "get_concept_info"
+
+
+def test_lookups_match_their_single_calls(make_client):
+    client = make_client(transport=_Transport())
+    with client.batch() as batch:
+        synonyms = batch.get_synonym_set("missing")
+        ancestors = batch.get_ancestors("C0699142", "PRED")
+
+    assert len(client.transport.requests) == 1
+    with pytest.raises(NoSynonymsFound):
+        synonyms.result()
+    with pytest.raises(NoSynonymsFound):
+        client.get_synonym_set("missing")
+    assert ancestors.result().edges == client.get_ancestors("C0699142", "PRED").edges
+
+
+class _Unreachable:
+    def post(self, url, data):
+        raise ConnectionError("unreachable")
+
+
+def test_failed_request_fails_every_call(make_client, make_async_client):
+    client = make_client(transport=_Unreachable())
+    with client.batch() as batch:
+        calls = [batch.get_concept("C0699142"), batch.get_parents("C0699142", "PRED")]
+    assert all(isinstance(call.error(), ConnectionError) for call in calls)
+
+    def unreachable(request):
+        raise httpx.ConnectError("unreachable", request=request)
+
+    async def run():
+        async with make_async_client(unreachable) as client:
+            async with client.batch() as batch:
+                return [batch.get_concept("C0699142"), batch.get_parents("C0699142", "PRED")]
+
+    calls = asyncio.run(run())
+    assert all(isinstance(call.error(), httpx.ConnectError) for call in calls)
@@ -0,0 +1,78 @@
+import pytest
+from requests.exceptions import HTTPError
+
+from entity_disambiguator_py.graph import LocalUMLSGraph
+from entity_disambiguator_py.interning import INTERNER, Interner
+from entity_disambiguator_py.model import RelationshipType, UMLSRelationship
+from entity_disambiguator_py.similarity import HierarchySimilarity, PairScore
+from entity_disambiguator_py.stand_in import StandInServer, SyntheticUMLS
+
+
+def _rel(parent: str, child: str) -> UMLSRelationship:
+    return UMLSRelationship(
+        parent=parent, child=child, rel_type="PRED", umls_primary=None, umls_secondary=None
+    )
+
+
+@pytest.fixture
+def graph() -> LocalUMLSGraph:
+    #      R         X
+    #    /   \       |
+    #   A     B      Y
+    #   |   /   \
+    #   D  E     F
+    # with G under both D and E
+    rows = [("R", "A"), ("R", "B"), ("A", "D"), ("B", "E"), ("B", "F"), ("D", "G"), ("E", "G")]
+    return LocalUMLSGraph.from_relationships(_rel(p, c) for p, c in rows + [("X", "Y")])
+
+
+def test_scores(graph):
+    similarity = HierarchySimilarity(graph, RelationshipType.PRED, interner=Interner())
+    scores = similarity.score_pairs([("E", "F"), ("D", "F"), ("G", "F"), ("A", "A"), ("D", "Y")])
+
+    assert scores == [
+        PairScore("E", "F", 2, ["B"], 1 / 3),
+        PairScore("D", "F", 4, ["R"], 1 / 5),
+        PairScore("G", "F", 3, ["B"], 1 / 4),
+        PairScore("A", "A", 0, ["A"], 1.0),
+        PairScore("D", "Y", None, [], 0.0),
+    ]
+    assert similarity.score("D", "E").lcas == ["R"]
+    assert similarity.score("G", "R").distance == 3
+    # one closure per distinct CUI
+    assert similarity.fetched == 7
+
+
+def test_pairs_beyond_the_cache_size(graph):
+    similarity = HierarchySimilarity(graph, "PRED", maxsize=3)
+    pairs = [("E", "F"), ("D", "F"), ("G", "F"), ("A", "R")] * 3
+    expected = HierarchySimilarity(graph, "PRED").score_pairs(pairs)
+    assert similarity.score_pairs(pairs) == expected
+
+
+def test_client_fetches_closures_in_batches(make_client):
+    data = SyntheticUMLS(num_concepts=200, fanout=3, cross_edges=0)
+    ids = data.concept_ids
+    with StandInServer(data) as server:
+        client = make_client(server.url, batch_chunk_size=50, batch_parallelism=2)
+        similarity = HierarchySimilarity(client, "PRED")
+        pairs = [(ids[i], ids[(i * 7) % 200]) for i in range(200)]
+        scores = similarity.score_pairs(pairs)
+        assert server.requests == 4
+
+    offline = HierarchySimilarity(data.graph, "PRED").score_pairs(pairs)
+    assert scores == offline
+    # concept 13 is under 4, 1 and 0, concept 10 is under 3 and 0
+    assert similarity.score(ids[13], ids[10]) == PairScore(ids[13], ids[10], 5, [ids[0]], 1 / 6)
+
+
+def test_invalid_sort_prefix(graph):
+    with pytest.raises(HTTPError):
+        HierarchySimilarity(graph, "ISA")
+
+
+def test_uses_its_own_interner_by_default(graph):
+    similarity = HierarchySimilarity(graph, RelationshipType.PRED)
+    assert similarity.score("E", "F").lcas == ["B"]
+    assert similarity.interner is not INTERNER
+    assert "E" in similarity.interner and "E" not in HierarchySimilarity(graph).interner
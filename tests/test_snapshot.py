@@ -0,0 +1,77 @@
+import pytest
+from requests.exceptions import HTTPError
+
+from entity_disambiguator_py.model import UMLSAtom, UMLSConcept, UMLSTypeDefinition
+from entity_disambiguator_py.snapshot import SnapshotBuilder, SnapshotVocabulary
+from entity_disambiguator_py.typing import UMLSVocabularyInterface
+
+
+@pytest.fixture
+def vocabulary(tmp_path):
+    builder = SnapshotBuilder()
+    builder.add_atoms(
+        [
+            UMLSAtom(atom_id="A8401600", concept_id="C1453225", name="magnovatin b", source="MSH"),
+            UMLSAtom(atom_id="A17398278", concept_id="C1453225", name="magnovatin b", source="RX"),
+            UMLSAtom(atom_id="A0000001", concept_id="C0000001", name="fémur", source="MSH"),
+        ]
+    )
+    builder.add_concepts(
+        [
+            UMLSConcept(
+                concept_id="C1453225",
+                language="ENG",
+                alias_list=["A8401600", "A17398278"],
+                definition=None,
+            ),
+            UMLSConcept(
+                concept_id="C0000001", language="FRE", alias_list=["A0000001"], definition="bone"
+            ),
+        ]
+    )
+    builder.add_type_definition(
+        UMLSTypeDefinition(
+            type_id="T120", abbreviation="chvf", definition="d", is_relation=False, name="n"
+        )
+    )
+    path = builder.write(tmp_path / "vocab.snap")
+
+    with SnapshotVocabulary(path) as vocabulary:
+        yield vocabulary
+
+
+def test_is_vocabulary_interface(vocabulary):
+    assert isinstance(vocabulary, UMLSVocabularyInterface)
+    assert len(vocabulary) == 2
+
+
+def test_lookups(vocabulary):
+    assert vocabulary.get_alias_id("A8401600").result.concept_id == "C1453225"
+    assert vocabulary.get_alias_name("fémur").result.concept_ids == ["C0000001"]
+    assert vocabulary.get_concept("C0000001").result.definition == "bone"
+    assert vocabulary.get_type_definition("T120").result.abbreviation == "chvf"
+
+    names = vocabulary.get_alias_name("magnovatin b").result
+    assert sorted(names.atom_ids) == ["A17398278", "A8401600"]
+    assert len(vocabulary.get_aliases("magnovatin b").result) == 2
+    assert vocabulary.get_aliases("nothing").result == []
+
+    with pytest.raises(HTTPError):
+        vocabulary.get_concept("C9999999")
+
+
+def test_batches(vocabulary):
+    r = vocabulary.get_batch_concept(["C0000001", "C9", "C1453225", "C0000001"])
+    assert [c.concept_id for c in r.result] == ["C0000001", "C1453225"]
+    assert r.missing == ["C9"]
+
+    r = vocabulary.get_batch_alias_id(["A0000001", "A1"])
+    assert [a.atom_id for a in r.result] == ["A0000001"]
+    assert r.missing == ["A1"]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other"
+    path.write_bytes(b"x" * 64)
+    with pytest.raises(ValueError):
+        SnapshotVocabulary(path)
@@ -0,0 +1,84 @@
+import pytest
+import requests
+from requests.exceptions import HTTPError
+
+from entity_disambiguator_py.stand_in import FaultProfile, StandInServer, SyntheticUMLS
+
+
+@pytest.fixture(scope="module")
+def data():
+    return SyntheticUMLS(num_concepts=200, cross_edges=20, name_period=100)
+
+
+@pytest.fixture
+def client(data, make_client):
+    with StandInServer(data) as server:
+        with make_client(server.url) as client:
+            yield client
+
+
+def test_lookups(client):
+    assert client.say_hello().message.startswith("Silχ")
+    assert client.get_alias_id("A00000003").result.concept_id == "C0000001"
+    assert client.get_concept("C0000001").result.alias_list[0] == "term 1 variant 0"
+    assert client.get_alias_name("term 1 variant 0").result.concept_ids == [
+        "C0000001",
+        "C0000101",
+    ]
+    assert len(client.get_aliases("term 1 variant 0").result) == 2
+    assert client.get_aliases("unknown").result == []
+    assert client.get_type_definition("T010").result.is_relation
+    assert client.get_concept_info("C0000001").alias_names[0] == "term 1 variant 0"
+
+    batch = client.get_batch_concept(["C0000002", "C9999999", "C0000001"])
+    assert [c.concept_id for c in batch.result] == ["C0000002", "C0000001"]
+    assert batch.missing == ["C9999999"]
+
+    with pytest.raises(HTTPError):
+        client.get_concept("C9999999")
+
+
+def test_synonyms_and_graph(client):
+    canonical = client.get_canonical_synonym("C0000004").result
+    assert canonical.canonical_cui == "C0000003"
+    assert client.get_canonical_synonym("C0000009").result.synset_id == "-1"
+    assert client.get_synonym_set(canonical.synset_id).result.subgraph[0] == "C0000003"
+
+    assert [r.parent for r in client.get_parents("C0000005", "PRED").result] == ["C0000001"]
+    assert len(client.get_children("C0000001", "PRED").result) == 4
+    ancestors = client.get_ancestors("C0000021", "PRED").edges
+    assert {(e.parent, e.child) for e in ancestors} == {
+        ("C0000005", "C0000021"),
+        ("C0000001", "C0000005"),
+        ("C0000000", "C0000001"),
+    }
+    assert len(client.get_edge_columns("get_subgraph", "C0000000", "PRED")) == 199
+
+
+def test_rpc_batch_and_streaming(client):
+    with client.batch() as batch:
+        concept = batch.get_concept("C0000001")
+        missing = batch.get_concept("C9999999")
+        aliases = batch.get_aliases("unknown")
+    assert concept.result().result.concept_id == "C0000001"
+    assert missing.error() is not None
+    assert aliases.result().result == []
+
+    stream = client.iter_concepts(page_size=64)
+    assert len(list(stream)) == 200
+    assert stream.cursor is None
+
+
+def test_injected_faults(data):
+    faults = FaultProfile(error_rate=1.0, error_status=502, seed=1)
+    with StandInServer(data, faults) as server:
+        r = requests.post(server.url + "/api/rpc", json={"id": 1, "method": "get_concept"})
+        assert r.status_code == 502
+        assert server.injected_errors == 1
+
+    faults = FaultProfile(cold_start_latency=0.05, cold_start_idle=60)
+    with StandInServer(data, faults) as server:
+        first = requests.get(server.url + "/")
+        second = requests.get(server.url + "/")
+        assert first.elapsed > second.elapsed
+        assert server.cold_starts == 1
@@ -0,0 +1,127 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from entity_disambiguator_py.instrumentation import Instrumentation
+from entity_disambiguator_py.streaming import JsonArrayStreamParser
+
+CONCEPTS = [f"C{i:07d}" for i in range(25)]
+
+
+def _page(params: dict) -> dict:
+    start = int(params.get("cursor", 0))
+    end = start + params["limit"]
+    page = {"id": 1, "result": CONCEPTS[start:end]}
+    if end < len(CONCEPTS):
+        page["next_cursor"] = str(end)
+    return page
+
+
+def _concepts(ids: list[str]) -> dict:
+    result = [
+        {"concept_id": cid, "language": "ENG", "alias_list": [], "definition": None} for cid in ids
+    ]
+    return {"id": 1, "result": result}
+
+
+class _Transport:
+    def __init__(self):
+        self.pages = []
+
+    def post(self, url, data, stream=False):
+        payload = json.loads(data)
+        if payload["method"] == "batch_get_concept":
+            body = json.dumps(_concepts(payload["params"]["ids"])).encode()
+            return SimpleNamespace(status_code=200, content=body)
+
+        assert stream
+        self.pages.append(payload["params"].get("cursor"))
+        body = json.dumps(_page(payload["params"])).encode()
+        chunks = [body[i : i + 7] for i in range(0, len(body), 7)]
+        return SimpleNamespace(
+            status_code=200,
+            headers={"Content-Length": str(len(body))},
+            iter_content=lambda chunk_size: iter(chunks),
+            close=lambda: None,
+        )
+
+    def close(self):
+        pass
+
+
+def test_parser_handles_any_chunking():
+    body = json.dumps(
+        {"id": 12, "result": ["a", 10, 2.5, {"k": [1, "]"]}, None, "é"], "next_cursor": 30}
+    ).encode()
+    for size in (1, 2, 5, len(body)):
+        parser = JsonArrayStreamParser("result")
+        items = []
+        for i in range(0, len(body), size):
+            items.extend(parser.feed(body[i : i + size]))
+        items.extend(parser.close())
+        assert items == ["a", 10, 2.5, {"k": [1, "]"]}, None, "é"]
+        assert parser.meta == {"id": 12, "next_cursor": 30}
+
+
+def test_parser_rejects_truncated_body():
+    parser = JsonArrayStreamParser("result")
+    parser.feed(b'{"id": 1, "result": ["C1", "C2"')
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_iter_concepts_pages_and_resumes(make_client):
+    client = make_client(transport=_Transport())
+    assert list(client.iter_concepts(page_size=10)) == CONCEPTS
+    assert client.transport.pages == [None, "10", "20"]
+
+    stream = client.iter_concepts(page_size=10)
+    seen = [next(stream) for _ in range(13)]
+    assert stream.cursor == "10"
+
+    resumed = list(client.iter_concepts(page_size=10, cursor=stream.cursor))
+    assert seen[:10] + resumed == CONCEPTS
+
+
+def test_iter_concepts_pages_are_instrumented(make_client):
+    instrumentation = Instrumentation()
+    client = make_client(transport=_Transport(), instrumentation=instrumentation)
+    assert list(client.iter_concepts(page_size=10)) == CONCEPTS
+
+    pages = instrumentation.snapshot()["list_concepts"]
+    assert pages.calls == 3 and pages.status_codes == {200: 3}
+    assert pages.response_bytes.sum == sum(
+        len(json.dumps(_page({"cursor": c, "limit": 10}))) for c in (0, 10, 20)
+    )
+
+
+def test_iter_concepts_with_details_keeps_order(make_client):
+    client = make_client(transport=_Transport())
+    concepts = client.iter_concepts_with_details(page_size=10, chunk_size=4, parallelism=3)
+    assert [c.concept_id for c in concepts] == CONCEPTS
+
+
+def test_async_iter_concepts_with_details(make_async_client):
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        if payload["method"] == "batch_get_concept":
+            return httpx.Response(200, json=_concepts(payload["params"]["ids"]))
+        return httpx.Response(200, json=_page(payload["params"]))
+
+    instrumentation = Instrumentation()
+
+    async def run():
+        client = make_async_client(handler, max_concurrency=1, instrumentation=instrumentation)
+        async with client:
+            ids = [cid async for cid in client.iter_concepts(page_size=10)]
+            details = client.iter_concepts_with_details(page_size=10, chunk_size=4)
+            concepts = [c.concept_id async for c in details]
+        return ids, concepts
+
+    ids, concepts = asyncio.run(run())
+    assert ids == CONCEPTS
+    assert concepts == CONCEPTS
+    assert instrumentation.snapshot()["list_concepts"].calls == 6
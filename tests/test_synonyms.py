@@ -0,0 +1,81 @@
+import asyncio
+
+from entity_disambiguator_py.cache import NO_SYNSET, SynonymCache
+from entity_disambiguator_py.instrumentation import Instrumentation
+from entity_disambiguator_py.model import CanonicalSynonym, SynonymSet
+from entity_disambiguator_py.stand_in import StandInServer, SyntheticUMLS
+
+
+def test_synonym_cache_fills_members_and_expires_negatives():
+    now = 0.0
+    cache = SynonymCache(negative_ttl=10, clock=lambda: now)
+    cache.put_synset(SynonymSet(synset_id="S1", subgraph=["C1", "C2", "C3"]), "C1")
+    cache.put_canonical(CanonicalSynonym(cui_id="C9", canonical_cui="C9", synset_id=NO_SYNSET))
+
+    known, pending = cache.lookup(["C2", "C9", "C4"])
+    assert known["C2"].canonical_cui == "C1"
+    assert known["C9"].synset_id == NO_SYNSET
+    assert pending == ["C4"]
+
+    now = 11.0
+    assert cache.canonical("C9") is None
+    assert cache.canonical("C3").synset_id == "S1"
+
+
+def test_canonicalize_many_expands_synsets(make_client):
+    data = SyntheticUMLS(num_concepts=60, cross_edges=0)
+    instrumentation = Instrumentation()
+    # one CUI of every synset first, so expanding them resolves the rest
+    cids = sorted(data.concept_ids[:30], key=lambda c: int(c[1:]) % 3)
+    cids += ["C9999999", cids[1]]
+
+    with StandInServer(data) as server:
+        with make_client(server.url, instrumentation=instrumentation) as client:
+            resp = client.canonicalize_many(cids, chunk_size=3, parallelism=1)
+            requests = server.requests
+
+            # a second call is answered from the synonym cache
+            again = client.canonicalize_many(cids)
+            assert server.requests == requests
+
+    assert [s.cui_id for s in resp.result] == cids[:-1]
+    assert resp == again
+    for synonym in resp.result:
+        expected = data.canonical.get(synonym.cui_id)
+        if expected is None:
+            assert synonym.synset_id == NO_SYNSET
+            assert synonym.canonical_cui == synonym.cui_id
+        else:
+            assert synonym.model_dump() == expected
+
+    # 11 batches when every CUI is asked for separately
+    assert instrumentation.snapshot()["batch"].calls < 11
+
+
+def test_canonicalize_many_lists_failed_lookups_as_missing(make_client):
+    data = SyntheticUMLS(num_concepts=30, cross_edges=0)
+    # a response the client cannot read fails that one lookup
+    data.canonical["C0000004"] = {"cui_id": "C0000004"}
+
+    with StandInServer(data) as server:
+        with make_client(server.url) as client:
+            resp = client.canonicalize_many(["C0000003", "C0000004", "C0000005"], chunk_size=3)
+
+    assert [s.cui_id for s in resp.result] == ["C0000003", "C0000005"]
+    assert resp.missing == ["C0000004"]
+
+
+def test_async_canonicalize_many(make_async_client):
+    data = SyntheticUMLS(num_concepts=30, cross_edges=0)
+
+    with StandInServer(data) as server:
+
+        async def run():
+            async with make_async_client(url=server.url) as client:
+                return await client.canonicalize_many(data.concept_ids, chunk_size=4)
+
+        resp = asyncio.run(run())
+
+    assert len(resp.result) == 30
+    assert resp.result[1].canonical_cui == data.canonical["C0000001"]["canonical_cui"]
+    assert resp.result[9].synset_id == NO_SYNSET
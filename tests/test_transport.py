@@ -0,0 +1,83 @@
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from entity_disambiguator_py.transport import LambdaTransport, TransportClosed
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    srv.lock = threading.Lock()
+    srv.connections = 0
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_connections_are_reused(server):
+    url = f"http://127.0.0.1:{server.server_port}/api/rpc"
+    with LambdaTransport(None, {"Content-Type": "application/json"}) as transport:
+        for i in range(20):
+            r = transport.post(url, f'{{"id": {i}}}')
+            assert r.status_code == 200
+
+    assert server.connections == 1
+
+
+def test_pool_is_bounded_across_threads(server):
+    url = f"http://127.0.0.1:{server.server_port}/api/rpc"
+    transport = LambdaTransport(None, {}, pool_maxsize=4)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        codes = list(pool.map(lambda i: transport.post(url, str(i)).status_code, range(200)))
+    transport.close()
+
+    assert codes == [200] * 200
+    assert server.connections <= 4
+
+
+def test_closed_transport_raises(server):
+    transport = LambdaTransport(None, {})
+    transport.close()
+    transport.close()
+    with pytest.raises(TransportClosed):
+        transport.post(f"http://127.0.0.1:{server.server_port}/api/rpc", "{}")
+
+
+def test_client_import_leaves_opt_in_features_unloaded():
+    modules = ["sqlite3"] + [
+        f"entity_disambiguator_py.{m}"
+        for m in ("concurrency", "instrumentation", "negative", "resilience", "traversal")
+    ]
+    code = (
+        "import sys, entity_disambiguator_py.client\n"
+        f"print([m for m in {modules!r} if m in sys.modules])"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
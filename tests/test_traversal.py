@@ -0,0 +1,76 @@
+import asyncio
+
+from entity_disambiguator_py.stand_in import StandInServer, SyntheticUMLS
+from entity_disambiguator_py.traversal import GraphWalker
+
+
+def _edges(resp) -> set[tuple[str, str]]:
+    return {(e.parent, e.child) for e in resp.edges}
+
+
+def test_depth_limited_traversals_match_local_graph(make_client):
+    data = SyntheticUMLS(num_concepts=200, fanout=3)
+    with StandInServer(data) as server:
+        with make_client(server.url) as client:
+            for depth in (1, 2, -1):
+                for method in ("get_ancestors", "get_descendants", "get_subgraph"):
+                    remote = getattr(client, method)("C0000040", "PRED", depth_limit=depth)
+                    local = getattr(data.graph, method)("C0000040", "PRED", depth_limit=depth)
+                    assert _edges(remote) == _edges(local), (method, depth)
+
+
+def test_walk_shares_ancestry_and_memoizes(make_client):
+    data = SyntheticUMLS(num_concepts=400, fanout=2, cross_edges=0)
+    with StandInServer(data) as server:
+        with make_client(server.url) as client:
+            walker = GraphWalker(client, chunk_size=8, parallelism=4)
+            starts = ["C0000300", "C0000301", "C0000302"]
+            traversal = walker.walk(starts, "PRED")
+
+            # one batch per level, the shared ancestors are fetched once
+            assert traversal.requests == max(traversal.depths.values()) + 1
+            assert traversal.depths["C0000000"] == 8
+            assert len(traversal.edges) == len(set(traversal.edges))
+
+            requests = server.requests
+            again = walker.walk(["C0000300"], "PRED", depth_limit=3)
+            assert server.requests == requests
+            assert again.requests == 0
+            assert len(again.depths) == 4
+
+
+def test_memo_is_bounded_without_losing_edges(make_client):
+    data = SyntheticUMLS(num_concepts=300, fanout=3, cross_edges=0)
+    with StandInServer(data) as server:
+        with make_client(server.url) as client:
+            walker = GraphWalker(client, chunk_size=8, maxsize=16)
+            # levels far wider than the memo
+            traversal = walker.walk(["C0000000"], "PRED", up=False, down=True)
+            assert len(walker._children) == 16 and not walker._parents
+
+    local = data.graph.get_descendants("C0000000", "PRED")
+    assert set(traversal.edges) == _edges(local)
+
+
+def test_node_budget_truncates(make_client):
+    data = SyntheticUMLS(num_concepts=200, fanout=4, cross_edges=0)
+    with StandInServer(data) as server:
+        with make_client(server.url) as client:
+            traversal = client.walker.walk(["C0000000"], "PRED", up=False, down=True, max_nodes=10)
+
+    assert traversal.truncated
+    assert len(traversal.depths) == 10
+    assert all(p in traversal.depths and c in traversal.depths for p, c in traversal.edges)
+
+
+def test_async_depth_limit(make_async_client):
+    data = SyntheticUMLS(num_concepts=100, fanout=3)
+    with StandInServer(data) as server:
+
+        async def run():
+            async with make_async_client(url=server.url) as client:
+                return await client.get_descendants("C0000001", "PRED", depth_limit=2)
+
+        resp = asyncio.run(run())
+
+    assert _edges(resp) == _edges(data.graph.get_descendants("C0000001", "PRED", depth_limit=2))
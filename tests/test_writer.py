@@ -0,0 +1,133 @@
+import json
+import threading
+import time
+
+from entity_disambiguator_py.model import DocDBRelationship
+from entity_disambiguator_py.rpc_batch import RpcError
+from entity_disambiguator_py.stand_in import StandInServer, SyntheticUMLS
+from entity_disambiguator_py.writer import RelationshipWriter
+
+
+def _rel(i: int, rel_type: str = "PRED") -> DocDBRelationship:
+    return DocDBRelationship(
+        parent=f"C{i}", child=f"C{i + 1}", rel_type=rel_type, umls_primary=None, umls_secondary=None
+    )
+
+
+def test_batches_dedupes_and_reports_failures(make_client):
+    with StandInServer(SyntheticUMLS(num_concepts=10, cross_edges=0)) as server:
+        with make_client(server.url) as client:
+            with RelationshipWriter(client, batch_size=10, flush_interval=None) as writer:
+                assert writer.add_many([_rel(i) for i in range(25)]) == 25
+                assert not writer.add(_rel(3))
+                writer.add(_rel(100, rel_type="ISA"))
+                failures = writer.flush()
+
+                stats = writer.stats()
+                assert stats.written == 25 and stats.failed == 1 and stats.duplicates == 1
+                assert stats.batches == 3 and stats.pending == 0
+                # a failed triple can be retried
+                assert writer.add(_rel(100, rel_type="ISA"))
+
+        created = server.dispatcher.created
+        assert server.requests == 4
+
+    assert len(failures) == 1
+    assert failures[0].relationship.parent == "C100"
+    assert isinstance(failures[0].error, RpcError)
+    assert sorted(r["parent"] for r in created) == sorted(f"C{i}" for i in range(25))
+
+
+def test_only_recent_writes_are_remembered(make_client):
+    with StandInServer(SyntheticUMLS(num_concepts=10, cross_edges=0)) as server:
+        with make_client(server.url) as client:
+            writer = RelationshipWriter(
+                client, batch_size=2, flush_interval=None, parallelism=1, dedupe_window=3
+            )
+            with writer:
+                writer.add_many([_rel(i) for i in range(5)])
+                # still buffered
+                assert not writer.add(_rel(4))
+                writer.flush()
+                assert not writer.add(_rel(4))
+                assert len(writer._written_recently) == 3 and not writer._unwritten
+                # forgotten once three newer triples were written
+                assert writer.add(_rel(0))
+
+
+def test_flushes_on_time(make_client):
+    with StandInServer(SyntheticUMLS(num_concepts=10, cross_edges=0)) as server:
+        with make_client(server.url) as client:
+            with RelationshipWriter(client, batch_size=100, flush_interval=0.05) as writer:
+                writer.add(_rel(1))
+                deadline = time.monotonic() + 2
+                while writer.stats().written == 0 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                assert writer.stats().written == 1
+
+
+def test_spool_requeues_unwritten_items(tmp_path, make_client):
+    spool = tmp_path / "relationships.spool"
+    lines = [json.dumps({"add": _rel(i).model_dump()}) for i in range(5)]
+    lines.append(json.dumps({"done": ["C0", "C1", "PRED"]}))
+    spool.write_text("\n".join(lines) + '\n{"add": {"par')
+
+    with StandInServer(SyntheticUMLS(num_concepts=10, cross_edges=0)) as server:
+        with make_client(server.url) as client:
+            writer = RelationshipWriter(client, flush_interval=None, spool=spool)
+            assert writer.stats().pending == 4
+            writer.add(_rel(50, rel_type="ISA"))
+            failures = writer.close()
+
+        assert sorted(r["parent"] for r in server.dispatcher.created) == ["C1", "C2", "C3", "C4"]
+
+    # only the failed item is left in the spool
+    assert len(failures) == 1
+    assert [json.loads(line)["add"]["parent"] for line in spool.read_text().splitlines()] == ["C50"]
+
+
+def test_parallel_producers(make_client):
+    with StandInServer(SyntheticUMLS(num_concepts=10, cross_edges=0)) as server:
+        with make_client(server.url) as client:
+            with RelationshipWriter(client, batch_size=7, parallelism=3) as writer:
+                threads = [
+                    threading.Thread(target=writer.add_many, args=([_rel(i) for i in range(200)],))
+                    for _ in range(4)
+                ]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+                writer.flush()
+                assert writer.stats().duplicates == 600
+
+        assert len(server.dispatcher.created) == 200
+
+
+def test_flush_keeps_the_journal_of_batches_not_yet_sent(tmp_path, make_client):
+    spool = tmp_path / "relationships.spool"
+    with StandInServer(SyntheticUMLS(num_concepts=10, cross_edges=0)) as server:
+        with make_client(server.url) as client:
+            writer = RelationshipWriter(
+                client, batch_size=2, flush_interval=None, parallelism=1, spool=spool
+            )
+            # hold the only slot so the producer stops between taking and submitting
+            writer._slots.acquire()
+            producer = threading.Thread(target=writer.add_many, args=([_rel(1), _rel(2)],))
+            producer.start()
+            deadline = time.monotonic() + 2
+            while writer.stats().pending < 2 and time.monotonic() < deadline:
+                time.sleep(0.001)
+            flusher = threading.Thread(target=writer.flush)
+            flusher.start()
+            flusher.join(timeout=0.1)
+
+            assert flusher.is_alive()
+            assert len(spool.read_text().splitlines()) == 2
+            writer._slots.release()
+            producer.join()
+            flusher.join()
+            assert writer.close() == []
+
+        assert len(server.dispatcher.created) == 2
+    assert spool.read_text() == ""